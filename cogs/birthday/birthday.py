@@ -7,7 +7,7 @@ import time  # To auto remove birthday role on the next day.
 import asyncio
 from datetime import date, datetime, timedelta
 import discord
-from typing import Union
+from typing import List, Union
 from redbot.core import Config, checks, commands, data_manager
 from redbot.core.commands.context import Context
 from redbot.core.utils import AsyncIter
@@ -724,39 +724,44 @@ class Birthday(commands.Cog):
 
                 # Check to see if any users need to be removed.
                 memberData = await self.config.all_members(guild)  # dict
-                for memberId, memberDetails in memberData.items():
-                    # If assigned and the date is different than the date assigned, remove role.
-                    if memberDetails[KEY_IS_ASSIGNED] and memberDetails[KEY_BDAY_DAY] != int(
-                        time.strftime("%d")
-                    ):
-                        role = discord.utils.get(guild.roles, id=bdayRoleId)
-                        member = discord.utils.get(guild.members, id=memberId)
-
-                        if member:
-                            # Remove the role
-                            try:
-                                await member.remove_roles(role)
-                                self.logger.info(
-                                    "Removed birthday role from %s#%s (%s)",
-                                    member.name,
-                                    member.discriminator,
-                                    member.id,
-                                )
-                            except discord.Forbidden:
-                                self.logger.error(
-                                    "Could not remove birthday role from %s#%s (%s)",
-                                    member.name,
-                                    member.discriminator,
-                                    member.id,
-                                    exc_info=True,
-                                )
-                        else:
-                            # Do not remove role, wait until user rejoins, in case
-                            # another cog saves roles.
-                            continue
-
-                        # Update the list.
-                        await self.config.member(member).get_attr(KEY_IS_ASSIGNED).set(False)
+                removed = []
+                try:
+                    for memberId, memberDetails in memberData.items():
+                        # If assigned and the date is different than the date assigned,
+                        # remove role.
+                        if memberDetails[KEY_IS_ASSIGNED] and memberDetails[KEY_BDAY_DAY] != int(
+                            time.strftime("%d")
+                        ):
+                            role = discord.utils.get(guild.roles, id=bdayRoleId)
+                            member = discord.utils.get(guild.members, id=memberId)
+
+                            if member:
+                                # Remove the role
+                                try:
+                                    await member.remove_roles(role)
+                                    self.logger.info(
+                                        "Removed birthday role from %s#%s (%s)",
+                                        member.name,
+                                        member.discriminator,
+                                        member.id,
+                                    )
+                                except discord.Forbidden:
+                                    self.logger.error(
+                                        "Could not remove birthday role from %s#%s (%s)",
+                                        member.name,
+                                        member.discriminator,
+                                        member.id,
+                                        exc_info=True,
+                                    )
+                            else:
+                                # Do not remove role, wait until user rejoins, in case
+                                # another cog saves roles.
+                                continue
+
+                            # Update the list.
+                            removed.append(memberId)
+                finally:
+                    await self._saveAssigned(guild, removed, False)
 
     async def _dailyAdd(self):  # pylint: disable=too-many-branches
         """Add guild members to the birthday role."""
@@ -778,55 +783,81 @@ class Birthday(commands.Cog):
                     continue
 
                 memberData = await self.config.all_members(guild)  # dict
-                for memberId, memberDetails in memberData.items():
-                    # If today is the user's birthday, and the role is not assigned,
-                    # assign the role.
-
-                    # Check to see that birthdate day and month have been set.
-                    if (
-                        memberDetails[KEY_BDAY_DAY]
-                        and memberDetails[KEY_BDAY_MONTH]
-                        and memberDetails[KEY_BDAY_MONTH] == int(time.strftime("%m"))
-                        and memberDetails[KEY_BDAY_DAY] == int(time.strftime("%d"))
-                    ):
-                        # Get the necessary Discord objects.
-                        role = discord.utils.get(guild.roles, id=bdayRoleId)
-                        member = discord.utils.get(guild.members, id=memberId)
-                        channel = discord.utils.get(guild.channels, id=bdayChannelId)
-
-                        # Skip if member is no longer in server.
-                        if not member:
-                            continue
-
-                        if not memberDetails[KEY_IS_ASSIGNED]:
-                            try:
-                                await member.add_roles(role)
-                                self.logger.info(
-                                    "Added birthday role to %s#%s (%s)",
-                                    member.name,
-                                    member.discriminator,
-                                    member.id,
-                                )
-                                # Update the list.
-                                await self.config.member(member).get_attr(KEY_IS_ASSIGNED).set(
-                                    True
-                                )
-
-                            except discord.Forbidden:
-                                self.logger.error(
-                                    "Could not add role to %s#%s (%s)",
-                                    member.name,
-                                    member.discriminator,
-                                    member.id,
-                                    exc_info=True,
-                                )
-                            if not channel:
+                added = []
+                try:
+                    for memberId, memberDetails in memberData.items():
+                        # If today is the user's birthday, and the role is not assigned,
+                        # assign the role.
+
+                        # Check to see that birthdate day and month have been set.
+                        if (
+                            memberDetails[KEY_BDAY_DAY]
+                            and memberDetails[KEY_BDAY_MONTH]
+                            and memberDetails[KEY_BDAY_MONTH] == int(time.strftime("%m"))
+                            and memberDetails[KEY_BDAY_DAY] == int(time.strftime("%d"))
+                        ):
+                            # Get the necessary Discord objects.
+                            role = discord.utils.get(guild.roles, id=bdayRoleId)
+                            member = discord.utils.get(guild.members, id=memberId)
+                            channel = discord.utils.get(guild.channels, id=bdayChannelId)
+
+                            # Skip if member is no longer in server.
+                            if not member:
                                 continue
-                            try:
-                                msg = self.getBirthdayMessage(member)
-                                await channel.send(msg)
-                            except discord.Forbidden:
-                                self.logger.error(
-                                    "Could not send message!",
-                                    exc_info=True,
-                                )
+
+                            if not memberDetails[KEY_IS_ASSIGNED]:
+                                try:
+                                    await member.add_roles(role)
+                                    self.logger.info(
+                                        "Added birthday role to %s#%s (%s)",
+                                        member.name,
+                                        member.discriminator,
+                                        member.id,
+                                    )
+                                    # Update the list.
+                                    added.append(memberId)
+
+                                except discord.Forbidden:
+                                    self.logger.error(
+                                        "Could not add role to %s#%s (%s)",
+                                        member.name,
+                                        member.discriminator,
+                                        member.id,
+                                        exc_info=True,
+                                    )
+                                if not channel:
+                                    continue
+                                try:
+                                    msg = self.getBirthdayMessage(member)
+                                    await channel.send(msg)
+                                except discord.Forbidden:
+                                    self.logger.error(
+                                        "Could not send message!",
+                                        exc_info=True,
+                                    )
+                finally:
+                    await self._saveAssigned(guild, added, True)
+
+    async def _saveAssigned(self, guild: discord.Guild, memberIds: List[int], assigned: bool):
+        """Save whether the birthday role is assigned to the given members.
+
+        This is done after the roles are changed, rather than while holding a batch
+        across the Discord requests, so that a failed request doesn't drop the state of
+        members which were already handled.
+
+        Parameters:
+        -----------
+        guild: discord.Guild
+            The guild of the members.
+        memberIds: [int]
+            The IDs of the members.
+        assigned: bool
+            Whether the role is assigned.
+        """
+        if not memberIds:
+            return
+        async with self.config.batch():
+            for memberId in memberIds:
+                await self.config.member_from_ids(guild.id, memberId).get_attr(
+                    KEY_IS_ASSIGNED
+                ).set(assigned)
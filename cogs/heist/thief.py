@@ -125,12 +125,10 @@ class Thief:
         return await self.config.member(member).TotalJails()
 
     async def member_caught(self, member):
-        cur = await self.config.member(member).TotalJails()
-        await self.config.member(member).TotalJails.set(cur + 1)
+        await self.config.member(member).TotalJails.inc()
 
     async def member_died(self, member):
-        cur = await self.config.member(member).TotalDeaths()
-        await self.config.member(member).TotalDeaths.set(cur + 1)
+        await self.config.member(member).TotalDeaths.inc()
 
     async def set_member_free(self, member):
         return await self.config.member(member).Status.set("Free")
@@ -3,12 +3,14 @@
 Credit: This idea was first implemented by Danny (https://github.com/Rapptz/) but at
 the time, that bot was closed source.
 """
+from collections import deque
 from datetime import datetime, timedelta, timezone
 import os
 import logging
 import re
+import time
 from threading import Lock
-from typing import List
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 import asyncio
 import aiohttp
 import discord
@@ -23,6 +25,21 @@ DEFAULT_TIMEOUT = 20
 DELETE_TIME = 5
 MAX_WORDS_HIGHLIGHT = 20
 MAX_WORDS_IGNORE = 20
+# Recent messages kept in memory per channel, and for how long (in seconds).
+ACTIVITY_MAX_MESSAGES = 50
+ACTIVITY_TTL = 600
+# Number of messages shown around a highlighted message.
+CONTEXT_SIZE = 6
+# Highlights triggered within this many seconds are sent to a user in a single DM.
+NOTIFY_COALESCE_TIME = 5
+NOTIFY_MAX_CONCURRENCY = 5
+NOTIFY_MAX_RETRIES = 3
+# Base delay (in seconds) between retries, doubled after every attempt.
+NOTIFY_BACKOFF = 2
+# Discord's limits for a single message.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_CONTENT_CHARS = 2000
 KEY_BLACKLIST = "blacklist"
 KEY_TIMEOUT = "timeout"
 KEY_WORDS = "words"
@@ -57,6 +74,9 @@ class Highlight(commands.Cog):
         self.lastTriggered = {}
         self.triggeredLock = Lock()
         self.wordFilter = None
+        # Guild ID -> KeywordIndex, built on the first message seen in each guild.
+        self.keywordIndexes: Dict[int, KeywordIndex] = {}
+        self.activity = ActivityTracker()
 
         # Initialize logger and save to cog folder.
         saveFolder = data_manager.cog_data_path(cog_instance=self)
@@ -69,11 +89,16 @@ class Highlight(commands.Cog):
             )
             self.logger.addHandler(handler)
 
+        self.dispatcher = NotificationDispatcher(self._notifyUser, self.logger)
+
         self.guildDenyListCleanup.start()
+        self.activityCleanup.start()
 
     def cog_unload(self):
-        self.logger.info("Cancelling background task")
+        self.logger.info("Cancelling background tasks")
         self.guildDenyListCleanup.cancel()
+        self.activityCleanup.cancel()
+        self.dispatcher.cancel()
 
     @commands.group(name="highlight", aliases=["hl"])
     @commands.guild_only()
@@ -175,6 +200,7 @@ class Highlight(commands.Cog):
             if len(userWords) < MAX_WORDS_HIGHLIGHT and word not in userWords:
                 # user can only have MAX_WORDS_HIGHLIGHT words
                 userWords.append(word)
+                self._updateKeywordIndex(ctx.guild, ctx.author.id, word, KEY_WORDS, add=True)
                 await ctx.send(
                     "Highlight word added, {}".format(userName), delete_after=DELETE_TIME
                 )
@@ -195,6 +221,7 @@ class Highlight(commands.Cog):
         async with self.config.member(ctx.author).get_attr(KEY_WORDS)() as userWords:
             if word in userWords:
                 userWords.remove(word)
+                self._updateKeywordIndex(ctx.guild, ctx.author.id, word, KEY_WORDS, add=False)
                 await ctx.send(
                     "Highlight word removed, {}".format(userName), delete_after=DELETE_TIME
                 )
@@ -382,6 +409,9 @@ class Highlight(commands.Cog):
         async with self.config.member(ctx.author).get_attr(KEY_WORDS_IGNORE)() as ignoreWords:
             if len(ignoreWords) < MAX_WORDS_IGNORE and word not in ignoreWords:
                 ignoreWords.append(word)
+                self._updateKeywordIndex(
+                    ctx.guild, ctx.author.id, word, KEY_WORDS_IGNORE, add=True
+                )
                 await ctx.send(
                     "{} added to the ignore list, {}".format(word, userName),
                     delete_after=DELETE_TIME,
@@ -403,6 +433,9 @@ class Highlight(commands.Cog):
         async with self.config.member(ctx.author).get_attr(KEY_WORDS_IGNORE)() as ignoreWords:
             if word in ignoreWords:
                 ignoreWords.remove(word)
+                self._updateKeywordIndex(
+                    ctx.guild, ctx.author.id, word, KEY_WORDS_IGNORE, add=False
+                )
                 await ctx.send(
                     "{} removed from the ignore list, {}".format(word, userName),
                     delete_after=DELETE_TIME,
@@ -472,6 +505,17 @@ class Highlight(commands.Cog):
         await ctx.send("Timeout set to {} seconds.".format(seconds), delete_after=DELETE_TIME)
         await ctx.message.delete()
 
+    @highlight.command(name="stats", hidden=True)
+    @checks.is_owner()
+    async def notificationStats(self, ctx: Context):
+        """Show the state of the notification queue."""
+        stats = self.dispatcher.stats()
+        await ctx.send(
+            "Queued notifications: {queued} (for {users} users, {sending} being sent)\n"
+            "Delivered: {delivered}, failed: {failed}, retries: {retries}\n"
+            "Delivery latency: {avgLatency:.1f}s on average, {maxLatency:.1f}s max".format(**stats)
+        )
+
     @highlight.group(name="channelDeny", aliases=["cd"])
     @commands.guild_only()
     async def channelDeny(self, ctx: Context):
@@ -642,6 +686,48 @@ class Highlight(commands.Cog):
                 self.lastTriggered[sid][cid] = {}
             self.lastTriggered[sid][cid][uid] = timestamp
 
+    async def getKeywordIndex(self, guild: discord.Guild) -> "KeywordIndex":
+        """Get the keyword index of a guild, building it if needed.
+
+        Parameters:
+        -----------
+        guild: discord.Guild
+            The guild whose index we want.
+
+        Returns:
+        --------
+        KeywordIndex
+            The index of every highlighted and ignored word on the guild.
+        """
+        keywordIndex = self.keywordIndexes.get(guild.id)
+        if keywordIndex is None:
+            guildData = await self.config.all_members(guild, readonly=True)
+            keywordIndex = KeywordIndex()
+            for memberId, data in guildData.items():
+                for word in data.get(KEY_WORDS, []):
+                    keywordIndex.add(memberId, word)
+                for word in data.get(KEY_WORDS_IGNORE, []):
+                    keywordIndex.add(memberId, word, ignore=True)
+            # Another message may have built the index while we were waiting.
+            keywordIndex = self.keywordIndexes.setdefault(guild.id, keywordIndex)
+        return keywordIndex
+
+    def _updateKeywordIndex(
+        self, guild: discord.Guild, memberId: int, word: str, key: str, add: bool
+    ):
+        """Keep a guild's keyword index in sync with a change to a member's words.
+
+        Indexes which haven't been built yet are left alone, they will pick up the
+        change from Config when they are.
+        """
+        keywordIndex = self.keywordIndexes.get(guild.id)
+        if keywordIndex is None:
+            return
+        if add:
+            keywordIndex.add(memberId, word, ignore=key == KEY_WORDS_IGNORE)
+        else:
+            keywordIndex.remove(memberId, word, ignore=key == KEY_WORDS_IGNORE)
+
     async def checkHighlights(self, msg: discord.Message):
         """Background listener to check if a highlight has been triggered."""
         if not isinstance(msg.channel, discord.TextChannel):
@@ -660,25 +746,41 @@ class Highlight(commands.Cog):
             return
 
         # Don't send notification for filtered messages
+        # (the scan is shared with WordFilter's own listener, so it's only done once)
         if not self.wordFilter:
             self.wordFilter = self.bot.get_cog("WordFilter")
-        elif await self.wordFilter.containsFilterableWords(msg):
+        if self.wordFilter and await self.wordFilter.containsFilterableWords(msg):
             return
 
-        tasks = []
+        # Scan the message once for every word indexed on the guild, and only look at the
+        # members who are listening for one of the words found.
+        keywordIndex = await self.getKeywordIndex(msg.guild)
+        matchedWords = keywordIndex.match(msg.content)
+        candidates = keywordIndex.members(matchedWords)
+        if not candidates:
+            return
 
-        activeMessages = []
-        try:
-            async for message in msg.channel.history(limit=50, before=msg):
-                activeMessages.append(message)
-        except (aiohttp.ClientResponseError, aiohttp.ServerDisconnectedError):
-            self.logger.error("Error within discord.py!", exc_info=True)
-
-        # Iterate through every user's words on the guild, and notify all highlights
-        guildData = await self.config.all_members(msg.guild)
-        for currentUserId, data in guildData.items():
+        # Activity is served from memory, unless the cog was (re)loaded too recently to
+        # have seen all of the messages that matter.
+        activeMessages = None
+        if not self.activity.covers(msg.created_at, DEFAULT_TIMEOUT):
+            activeMessages = []
+            try:
+                async for message in msg.channel.history(limit=ACTIVITY_MAX_MESSAGES, before=msg):
+                    activeMessages.append(message)
+            except (aiohttp.ClientResponseError, aiohttp.ServerDisconnectedError):
+                self.logger.error("Error within discord.py!", exc_info=True)
+
+        # Handle case where message contains words being ignored by the user.
+        ignoringUsers = keywordIndex.members(matchedWords, ignore=True)
+
+        for currentUserId in candidates:
             self.logger.debug("User ID: %s", currentUserId)
 
+            if currentUserId in ignoringUsers:
+                self.logger.debug("User %s is ignoring a word in the message.", currentUserId)
+                continue
+
             # Handle case where user is no longer in the guild of interest.
             hiliteUser = msg.guild.get_member(currentUserId)
             if not hiliteUser:
@@ -689,6 +791,8 @@ class Highlight(commands.Cog):
             if not perms.read_messages:
                 continue
 
+            data = await self.config.member(hiliteUser).all()
+
             # Handle case where message was sent in a user denied channel
             if msg.channel.id in data[KEY_CHANNEL_IGNORE]:
                 continue
@@ -701,45 +805,43 @@ class Highlight(commands.Cog):
             if KEY_BLACKLIST in data.keys() and msg.author.id in data[KEY_BLACKLIST]:
                 continue
 
-            # Handle case where message contains words being ignored by the user.
-            isWordIgnored = False
-            if KEY_WORDS_IGNORE in data.keys():
-                self.logger.debug("Checking for ignored words")
-                for word in data[KEY_WORDS_IGNORE]:
-                    if self._isWordMatch(word, msg.content):
-                        self.logger.debug("%s is being ignored, skipping user.", word)
-                        isWordIgnored = True
-                        break
-
-            if isWordIgnored:
-                continue
-
             # If we reach this point, then the message is not from a user that has been
             # blacklisted, nor does the message contain any ignored words, so now we can
             # check to see if there is anything that needs to be highlighted.
             for word in data[KEY_WORDS]:
-                active = _isActive(currentUserId, msg, activeMessages)
-                match = self._isWordMatch(word, msg.content)
+                if activeMessages is None:
+                    active = self.activity.isActive(currentUserId, msg)
+                else:
+                    active = _isActive(currentUserId, msg, activeMessages)
+                match = word.lower() in matchedWords
                 timeout = data[KEY_TIMEOUT] if KEY_TIMEOUT in data.keys() else DEFAULT_TIMEOUT
                 triggeredRecently = self._triggeredRecently(msg, currentUserId, timeout)
                 if match and not active and not triggeredRecently and user.id != currentUserId:
                     self._triggeredUpdate(msg.channel, hiliteUser, msg.created_at)
-                    tasks.append(self._notifyUser(hiliteUser, msg, word))
+                    self.dispatcher.enqueue(hiliteUser, msg, word)
 
-        await asyncio.gather(*tasks)  # pylint: disable=no-member
+    async def _buildNotification(
+        self, user: discord.Member, message: discord.Message, word: str
+    ) -> Optional[Tuple[str, discord.Embed]]:
+        """Build the notification of a triggered highlight word.
 
-    async def _notifyUser(self, user: discord.Member, message: discord.Message, word: str):
-        """Notify the user of the triggered highlight word."""
-        msgs = []
-        try:
-            async for msg in message.channel.history(limit=6, around=message):
-                msgs.append(msg)
-        except aiohttp.ClientResponseError as error:
-            self.logger.error("Client response error within discord.py!", exc_info=True)
-            self.logger.error(error)
-        except aiohttp.ServerDisconnectedError as error:
-            self.logger.error("Server disconnect error within discord.py!", exc_info=True)
-            self.logger.error(error)
+        Returns:
+        --------
+        Optional[Tuple[str, discord.Embed]]
+            The text and embed of the notification, or None if the message is gone.
+        """
+        msgs = self.activity.context(message, CONTEXT_SIZE)
+        if msgs is None:
+            msgs = []
+            try:
+                async for msg in message.channel.history(limit=CONTEXT_SIZE, around=message):
+                    msgs.append(msg)
+            except aiohttp.ClientResponseError as error:
+                self.logger.error("Client response error within discord.py!", exc_info=True)
+                self.logger.error(error)
+            except aiohttp.ServerDisconnectedError as error:
+                self.logger.error("Server disconnect error within discord.py!", exc_info=True)
+                self.logger.error(error)
         msgContext = sorted(msgs, key=lambda r: r.created_at)
         msgUrl = message.jump_url
         notifyMsg = (
@@ -760,7 +862,7 @@ class Highlight(commands.Cog):
             if self._isWordMatch(word, msg.content):
                 msgStillThere = True
         if not msgStillThere:
-            return
+            return None
         # Embed Description has a max length of 2048
         # If description is longer truncate to 2045 and append ... to it
         if len(embedMsg) > 2048:
@@ -770,18 +872,47 @@ class Highlight(commands.Cog):
         time = message.created_at.replace(tzinfo=timezone.utc).astimezone(tz=None)
         footer = "Triggered at | {}".format(time.strftime("%a, %d %b %Y %I:%M%p %Z"))
         embed.set_footer(text=footer)
-        try:
-            await user.send(content=notifyMsg, embed=embed)
+        return notifyMsg, embed
+
+    async def _notifyUser(
+        self, user: discord.Member, notifications: List[Tuple[discord.Message, str]]
+    ):
+        """Notify the user of their triggered highlight words, in as few DMs as possible.
+
+        Notifications are removed from the list once they are sent, so that if sending
+        fails part way through, a retry resumes with the first unsent one.
+
+        Parameters:
+        -----------
+        user: discord.Member
+            The user to notify.
+        notifications: [ (discord.Message, str) ]
+            The messages which triggered a highlight, and the words they triggered.
+
+        Raises:
+        -------
+        discord.HTTPException
+            A DM could not be sent, e.g. because the user has DMs disabled.
+        """
+        # (index in notifications, notifyMsg, embed)
+        built = []
+        for index, (message, word) in enumerate(notifications):
+            notification = await self._buildNotification(user, message, word)
+            if notification:
+                built.append((index, *notification))
+
+        sent = 0
+        for chunk in _chunkNotifications(built):
+            await user.send(
+                content="\n".join(notifyMsg for _, notifyMsg, _ in chunk),
+                embeds=[embed for _, _, embed in chunk],
+            )
+            done = chunk[-1][0] + 1
+            del notifications[: done - sent]
+            sent = done
             self.logger.info(
                 "%s#%s (%s) was successfully triggered.", user.name, user.discriminator, user.id
             )
-        except discord.errors.Forbidden as error:
-            self.logger.error(
-                "Could not notify %s#%s (%s)!  They probably has DMs disabled!",
-                user.name,
-                user.discriminator,
-                user.id,
-            )
 
     @tasks.loop(minutes=60)
     async def guildDenyListCleanup(self):
@@ -802,6 +933,10 @@ class Highlight(commands.Cog):
         self.logger.debug("Waiting for bot to be ready...")
         await self.bot.wait_until_ready()
 
+    @tasks.loop(seconds=ACTIVITY_TTL)
+    async def activityCleanup(self):
+        self.activity.evict(discord.utils.utcnow())
+
     # Event listeners
     @commands.Cog.listener("on_typing")
     async def onTyping(self, channel: discord.abc.Messageable, user: discord.User, when: datetime):
@@ -815,13 +950,24 @@ class Highlight(commands.Cog):
             channel.name,
             channel.id,
         )
+        self.activity.addTyping(channel.id, user.id, when)
         self._triggeredUpdate(channel, user, when)
 
     @commands.Cog.listener("on_message")
     async def onMessage(self, msg):
         """Background listener to check messages for highlight DMs."""
+        if isinstance(msg.channel, discord.TextChannel):
+            self.activity.addMessage(msg)
         await self.checkHighlights(msg)
 
+    @commands.Cog.listener("on_raw_message_delete")
+    async def onRawMessageDelete(self, payload: discord.RawMessageDeleteEvent):
+        self.activity.removeMessages(payload.channel_id, {payload.message_id})
+
+    @commands.Cog.listener("on_raw_bulk_message_delete")
+    async def onRawBulkMessageDelete(self, payload: discord.RawBulkMessageDeleteEvent):
+        self.activity.removeMessages(payload.channel_id, payload.message_ids)
+
     def _isWordMatch(self, word, string):
         """See if the word/regex matches anything in string.
 
@@ -846,6 +992,401 @@ class Highlight(commands.Cog):
             return False
 
 
+class KeywordIndex:
+    """Inverted index of a guild's highlighted and ignored words.
+
+    Maps each word (lowercased) to the IDs of the members listening for or ignoring
+    it. All of the indexed words are compiled into a single regex, so a message is
+    scanned once no matter how many members have highlights set up, and the regex
+    is only recompiled after the words change.
+    """
+
+    def __init__(self):
+        # Word -> member IDs
+        self.words: Dict[str, Set[int]] = {}
+        self.ignoreWords: Dict[str, Set[int]] = {}
+        self._pattern: Optional[re.Pattern] = None
+        # Word -> other indexed words which it starts with
+        self._prefixes: Dict[str, List[str]] = {}
+        self._stale = True
+
+    def add(self, memberId: int, word: str, ignore: bool = False):
+        """Index a member's word."""
+        word = word.lower()
+        if not word:
+            return
+        index = self.ignoreWords if ignore else self.words
+        if word not in self.words and word not in self.ignoreWords:
+            self._stale = True
+        index.setdefault(word, set()).add(memberId)
+
+    def remove(self, memberId: int, word: str, ignore: bool = False):
+        """Remove a member's word from the index."""
+        word = word.lower()
+        index = self.ignoreWords if ignore else self.words
+        members = index.get(word)
+        if members is None:
+            return
+        members.discard(memberId)
+        if not members:
+            del index[word]
+            if word not in self.words and word not in self.ignoreWords:
+                self._stale = True
+
+    def _compile(self):
+        words = set(self.words) | set(self.ignoreWords)
+        self._stale = False
+        if not words:
+            self._pattern = None
+            self._prefixes = {}
+            return
+        # Longest words first, so that at any position the regex finds the longest
+        # word; any shorter word found at the same position is one of its prefixes.
+        ordered = sorted(words, key=len, reverse=True)
+        lengths = sorted({len(word) for word in words})
+        self._prefixes = {
+            word: [
+                word[:length]
+                for length in lengths
+                if length < len(word) and word[:length] in words
+            ]
+            for word in ordered
+        }
+        # The lookahead allows overlapping matches, e.g. "ice" and "cream" in "ice cream".
+        self._pattern = re.compile(
+            r"(?=\b(" + "|".join(re.escape(word) for word in ordered) + r")\b)"
+        )
+
+    def match(self, string: str) -> Set[str]:
+        """Find the indexed words in a string, in a single pass.
+
+        Parameters:
+        -----------
+        string: str
+            The string to scan.
+
+        Returns:
+        --------
+        Set[str]
+            The (lowercased) indexed words which are in string, with the same word
+            boundary semantics as ``Highlight._isWordMatch``.
+        """
+        if self._stale:
+            self._compile()
+        if self._pattern is None:
+            return set()
+        string = string.lower()
+        matches = set()
+        for matchObj in self._pattern.finditer(string):
+            word = matchObj.group(1)
+            matches.add(word)
+            start = matchObj.start()
+            for prefix in self._prefixes[word]:
+                if _isWordBoundary(string, start + len(prefix)):
+                    matches.add(prefix)
+        return matches
+
+    def members(self, words: Set[str], ignore: bool = False) -> Set[int]:
+        """Get the IDs of the members listening for (or ignoring) any of the words."""
+        index = self.ignoreWords if ignore else self.words
+        members = set()
+        for word in words:
+            members.update(index.get(word, ()))
+        return members
+
+
+def _chunkNotifications(
+    built: List[Tuple[int, str, discord.Embed]]
+) -> List[List[Tuple[int, str, discord.Embed]]]:
+    """Split built notifications into groups which each fit in a single message.
+
+    Parameters:
+    -----------
+    built: [ (int, str, discord.Embed) ]
+        The notifications, as (index, notifyMsg, embed).
+
+    Returns:
+    --------
+    [ [ (int, str, discord.Embed) ] ]
+        The notifications, in order, grouped so that no group exceeds Discord's limits
+        on the number of embeds, their total length, or the length of the content.
+    """
+    chunks = []
+    chunk = []
+    embedChars = 0
+    contentChars = 0
+    for notification in built:
+        _, notifyMsg, embed = notification
+        # Joined by newlines.
+        msgChars = len(notifyMsg) + (1 if chunk else 0)
+        if chunk and (
+            len(chunk) == MAX_EMBEDS_PER_MESSAGE
+            or embedChars + len(embed) > MAX_EMBED_CHARS_PER_MESSAGE
+            or contentChars + msgChars > MAX_CONTENT_CHARS
+        ):
+            chunks.append(chunk)
+            chunk = []
+            embedChars = 0
+            contentChars = 0
+            msgChars = len(notifyMsg)
+        chunk.append(notification)
+        embedChars += len(embed)
+        contentChars += msgChars
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+class NotificationDispatcher:
+    """Queue of highlight notifications, delivered in the background.
+
+    Notifications for the same user are coalesced for ``coalesceTime`` seconds and
+    delivered together. At most ``maxConcurrency`` deliveries run at the same time,
+    and deliveries which hit a server error are retried with an exponential backoff.
+    Rate limits are already waited out by discord.py, so those aren't retried here.
+
+    ``deliver`` removes notifications from the list it is given as they are sent, so
+    that a retry only sends the rest, and raises if any of them couldn't be sent.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[discord.Member, List[Tuple[discord.Message, str]]], Awaitable[None]],
+        logger: logging.Logger,
+        coalesceTime: float = NOTIFY_COALESCE_TIME,
+        maxConcurrency: int = NOTIFY_MAX_CONCURRENCY,
+    ):
+        self.deliver = deliver
+        self.logger = logger
+        self.coalesceTime = coalesceTime
+        self.semaphore = asyncio.Semaphore(maxConcurrency)
+        # User ID -> (message, word, time queued)
+        self.pending: Dict[int, List[Tuple[discord.Message, str, float]]] = {}
+        self.sending = 0
+        self.tasks: Set[asyncio.Task] = set()
+
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.totalLatency = 0.0
+        self.maxLatency = 0.0
+
+    def enqueue(self, user: discord.Member, message: discord.Message, word: str):
+        """Queue a notification for a user."""
+        entry = (message, word, time.monotonic())
+        entries = self.pending.get(user.id)
+        if entries is not None:
+            entries.append(entry)
+            return
+        self.pending[user.id] = [entry]
+        task = asyncio.create_task(self._flush(user))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _flush(self, user: discord.Member):
+        await asyncio.sleep(self.coalesceTime)
+        async with self.semaphore:
+            # Anything queued while waiting for a slot goes out with this delivery.
+            entries = self.pending.pop(user.id)
+            notifications = [(message, word) for message, word, _ in entries]
+            self.sending += len(entries)
+            try:
+                for attempt in range(NOTIFY_MAX_RETRIES + 1):
+                    try:
+                        await self.deliver(user, notifications)
+                        break
+                    except discord.Forbidden:
+                        self.logger.error(
+                            "Could not notify %s#%s (%s)!  They probably has DMs disabled!",
+                            user.name,
+                            user.discriminator,
+                            user.id,
+                        )
+                        self._recordFailure(entries, notifications)
+                        return
+                    except discord.HTTPException as error:
+                        if error.status < 500 or attempt == NOTIFY_MAX_RETRIES:
+                            self.logger.error("Could not notify user %s", user.id, exc_info=True)
+                            self._recordFailure(entries, notifications)
+                            return
+                        self.retries += 1
+                        await asyncio.sleep(NOTIFY_BACKOFF * 2**attempt)
+                    except Exception:  # pylint: disable=broad-except
+                        self.logger.error("Could not notify user %s", user.id, exc_info=True)
+                        self._recordFailure(entries, notifications)
+                        return
+            finally:
+                self.sending -= len(entries)
+
+        now = time.monotonic()
+        self.delivered += len(entries)
+        for _, _, queuedAt in entries:
+            latency = now - queuedAt
+            self.totalLatency += latency
+            self.maxLatency = max(self.maxLatency, latency)
+
+    def _recordFailure(
+        self,
+        entries: List[Tuple[discord.Message, str, float]],
+        notifications: List[Tuple[discord.Message, str]],
+    ):
+        # Notifications left in the list are the ones which weren't sent.
+        self.failed += len(notifications)
+        self.delivered += len(entries) - len(notifications)
+
+    def stats(self) -> Dict[str, float]:
+        """Get the queue depth and delivery metrics.
+
+        Returns:
+        --------
+        dict
+            ``queued`` and ``users`` are the notifications waiting to be sent and how
+            many users they are for, ``sending`` are the ones being delivered, and
+            the rest are counters since the cog was loaded.
+        """
+        return {
+            "queued": sum(len(entries) for entries in self.pending.values()),
+            "users": len(self.pending),
+            "sending": self.sending,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "avgLatency": self.totalLatency / self.delivered if self.delivered else 0.0,
+            "maxLatency": self.maxLatency,
+        }
+
+    def cancel(self):
+        """Drop all queued notifications."""
+        for task in self.tasks:
+            task.cancel()
+        self.pending.clear()
+
+
+class ActivityTracker:
+    """Recent messages and typing activity per channel, kept in memory.
+
+    At most ``maxMessages`` messages are kept per channel, and nothing older than
+    ``ttl`` seconds. Messages are only seen from the moment the tracker is created,
+    so callers should check `covers` and fall back to the channel's history when
+    it returns False (e.g. right after the bot restarted).
+    """
+
+    def __init__(self, maxMessages: int = ACTIVITY_MAX_MESSAGES, ttl: int = ACTIVITY_TTL):
+        self.maxMessages = maxMessages
+        self.ttl = timedelta(seconds=ttl)
+        self.startedAt = discord.utils.utcnow()
+        # Channel ID -> recent messages, oldest first
+        self.messages: Dict[int, Deque[discord.Message]] = {}
+        # Channel ID -> user ID -> last time they started typing
+        self.typing: Dict[int, Dict[int, datetime]] = {}
+
+    def covers(self, timestamp: datetime, seconds: float) -> bool:
+        """Whether the tracker saw everything in the given seconds up to timestamp."""
+        return timestamp - timedelta(seconds=seconds) >= self.startedAt
+
+    def addMessage(self, message: discord.Message):
+        """Record a message sent in a channel."""
+        messages = self.messages.get(message.channel.id)
+        if messages is None:
+            messages = self.messages[message.channel.id] = deque(maxlen=self.maxMessages)
+        messages.append(message)
+        cutoff = message.created_at - self.ttl
+        while messages[0].created_at < cutoff:
+            messages.popleft()
+
+    def addTyping(self, channelId: int, userId: int, when: datetime):
+        """Record a user starting to type in a channel."""
+        self.typing.setdefault(channelId, {})[userId] = when
+
+    def removeMessages(self, channelId: int, messageIds: Set[int]):
+        """Forget deleted messages."""
+        messages = self.messages.get(channelId)
+        if messages:
+            self.messages[channelId] = deque(
+                (msg for msg in messages if msg.id not in messageIds), maxlen=self.maxMessages
+            )
+
+    def isActive(
+        self, userId: int, originalMessage: discord.Message, timeout: int = DEFAULT_TIMEOUT
+    ) -> bool:
+        """Same as `_isActive`, over the messages and typing seen in the channel.
+
+        Parameters:
+        -----------
+        userId: int
+            The user ID we wish to check.
+        originalMessage: discord.Message
+            The original message whose base timestamp we wish to check against.
+        timeout: int
+            The amount of time to ignore, in seconds.
+
+        Returns:
+        --------
+        bool
+            True, if the user has spoken or typed timeout seconds before originalMessage.
+            False, otherwise.
+        """
+        channelId = originalMessage.channel.id
+        window = timedelta(seconds=timeout)
+        typedAt = self.typing.get(channelId, {}).get(userId)
+        if typedAt and timedelta(0) <= originalMessage.created_at - typedAt <= window:
+            return True
+        previous = [
+            msg
+            for msg in self.messages.get(channelId, ())
+            if msg.created_at < originalMessage.created_at
+        ]
+        return _isActive(userId, originalMessage, previous, timeout)
+
+    def context(
+        self, message: discord.Message, limit: int = CONTEXT_SIZE
+    ) -> Optional[List[discord.Message]]:
+        """Get up to limit messages around a message, if they can be served from memory.
+
+        Returns:
+        --------
+        Optional[List[discord.Message]]
+            The messages, oldest first, or None if the channel's history is needed.
+        """
+        messages = sorted(self.messages.get(message.channel.id, ()), key=lambda r: r.created_at)
+        index = next((i for i, msg in enumerate(messages) if msg.id == message.id), None)
+        if index is None:
+            # If the tracker should have seen the message, it has been deleted since.
+            return [] if self.covers(message.created_at, 0) else None
+        if index < limit // 2 and not self.covers(message.created_at, self.ttl.total_seconds()):
+            # Older messages may have been sent before the tracker started.
+            return None
+        start = max(0, index - limit // 2)
+        return messages[start : start + limit]
+
+    def evict(self, now: datetime):
+        """Drop everything older than the TTL, and channels without recent activity."""
+        cutoff = now - self.ttl
+        for channelId in list(self.messages):
+            messages = self.messages[channelId]
+            while messages and messages[0].created_at < cutoff:
+                messages.popleft()
+            if not messages:
+                del self.messages[channelId]
+        for channelId in list(self.typing):
+            users = self.typing[channelId]
+            for userId in [uid for uid, when in users.items() if when < cutoff]:
+                del users[userId]
+            if not users:
+                del self.typing[channelId]
+
+
+def _isWordChar(char: str) -> bool:
+    # Same as the \w class of str regexes.
+    return char.isalnum() or char == "_"
+
+
+def _isWordBoundary(string: str, index: int) -> bool:
+    before = index > 0 and _isWordChar(string[index - 1])
+    after = index < len(string) and _isWordChar(string[index])
+    return before != after
+
+
 def _isActive(userId, originalMessage, messages, timeout=DEFAULT_TIMEOUT):
     """Checks to see if the user has been active on a channel, given a message.
 
@@ -37,3 +37,9 @@ class CommandHandlers(CommandsCore):
             The maximum number of pixels in an image to check.
         """
         await self.cmdQrCheckerMaxPixels(ctx=ctx, pixels=pixels)
+
+    @_grpQrChecker.command(name="stats", hidden=True)
+    @commands.is_owner()
+    async def _cmdQrCheckerStats(self, ctx: Context):
+        """Show image decoding statistics"""
+        await self.cmdQrCheckerStats(ctx=ctx)
@@ -67,3 +67,22 @@ class CommandsCore(Core):
             await ctx.send(success(f"Max image pixels set to: **{pixels} pixels**."))
 
         await self.setMaxImagePixels(value=pixels)
+
+    async def cmdQrCheckerStats(self, ctx: Context):
+        """Show image decoding statistics"""
+        stats = self.stats
+        averageTime = stats.decodeTime / stats.decoded if stats.decoded else 0
+        msg = "\n".join(
+            (
+                "**__Decoding statistics__**",
+                f"Images decoded: **{stats.decoded}**",
+                f"Cache hits: **{stats.cacheHits}**",
+                f"Timed out: **{stats.timeouts}**",
+                f"Skipped: **{stats.skipped}**",
+                f"Decode time: **{averageTime:.3f}s** average, "
+                f"**{stats.maxDecodeTime:.3f}s** max",
+                f"Queue depth: **{stats.queueDepth}** now, **{stats.maxQueueDepth}** max",
+            )
+        )
+
+        await ctx.send(msg)
@@ -3,3 +3,14 @@ KEY_MAX_IMAGE_PIXELS = "maxImagePixels"
 
 BASE_GLOBAL = {KEY_MAX_IMAGE_PIXELS: 80000000}
 BASE_GUILD = {KEY_ENABLED: False}
+
+# Number of processes decoding images.
+DECODE_WORKERS = 2
+# Seconds an image may take to decode.
+DECODE_TIMEOUT = 10
+# Images wider or taller than this are scaled down before decoding.
+DECODE_MAX_SIZE = 2048
+# Number of decoded images remembered by content.
+DECODE_CACHE_SIZE = 256
+# Maximum number of images waiting for or being decoded, further images are skipped.
+MAX_PENDING_DECODES = 20
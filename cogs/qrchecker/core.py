@@ -1,27 +1,103 @@
-from asyncio import Lock
+import asyncio
+from asyncio import QueueFull, Semaphore
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+import hashlib
 from logging import getLogger
-from typing import Optional
+import time
+from typing import List, Optional, Tuple
 
 from PIL import Image
 from redbot.core import Config
 from redbot.core.bot import Red
 
-from .constants import BASE_GLOBAL, BASE_GUILD, KEY_MAX_IMAGE_PIXELS
+from .constants import (
+    BASE_GLOBAL,
+    BASE_GUILD,
+    DECODE_CACHE_SIZE,
+    DECODE_MAX_SIZE,
+    DECODE_TIMEOUT,
+    DECODE_WORKERS,
+    KEY_MAX_IMAGE_PIXELS,
+    MAX_PENDING_DECODES,
+)
+from .decoder import decodeImage
+
+
+@dataclass
+class DecodeStats:
+    """Counters for image decoding.
+
+    Attributes
+    ----------
+    decoded: int
+        Number of images decoded by the workers.
+    cacheHits: int
+        Number of images whose QR codes were already known.
+    timeouts: int
+        Number of images which took too long to decode.
+    skipped: int
+        Number of images not checked because too many were pending.
+    decodeTime: float
+        Total seconds spent decoding.
+    maxDecodeTime: float
+        Longest seconds spent decoding one image.
+    queueDepth: int
+        Number of images waiting for or being decoded.
+    maxQueueDepth: int
+        Highest queueDepth seen.
+    """
+
+    decoded: int = 0
+    cacheHits: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    decodeTime: float = 0.0
+    maxDecodeTime: float = 0.0
+    queueDepth: int = 0
+    maxQueueDepth: int = 0
 
 
 class Core:
     def __init__(self, bot: Red):
         self.bot = bot
-        self.lock = Lock()
         self.logger = getLogger("red.luicogs.QRChecker")
         self.config = Config.get_conf(self, identifier=5842647, force_registration=True)
         self.config.register_global(**BASE_GLOBAL)
         self.config.register_guild(**BASE_GUILD)
+        # Created on first use.
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # Only as many jobs as there are workers are submitted at a time, so that the
+        # timeout of a job doesn't include time spent waiting for a worker.
+        self.decodeSlots = Semaphore(DECODE_WORKERS)
+        # SHA-256 of image -> data of its QR codes, least recently used first
+        self.decodeCache: "OrderedDict[str, Tuple[bytes, ...]]" = OrderedDict()
+        self.stats = DecodeStats()
         self.initialized: bool = False
         self.bgTask = self.bot.loop.create_task(self.init())
 
     def cog_unload(self):
         self.bgTask.cancel()
+        self._closeExecutor()
+
+    def _closeExecutor(self, kill: bool = False):
+        """Shut down the worker pool, if there is one.
+
+        Parameters
+        ----------
+        kill: bool
+            Whether to also terminate the workers, stopping any jobs they are running.
+        """
+        executor, self.executor = self.executor, None
+        if not executor:
+            return
+        # ProcessPoolExecutor has no public way to stop a running job.
+        processes = list(executor._processes.values()) if kill else []
+        for process in processes:
+            process.terminate()
+        executor.shutdown(wait=False)
 
     async def init(self):
         await self.setMaxImagePixels()
@@ -44,3 +120,82 @@ class Core:
         # `DecompressionBombError` is triggered at twice this value, hence we divide by 2.
         Image.MAX_IMAGE_PIXELS = value // 2
         self.logger.debug("Set max pixels to %s.", value)
+
+    async def decode(self, data: bytes) -> List[bytes]:
+        """Find the QR codes in an image, in a worker process.
+
+        Parameters
+        ----------
+        data: bytes
+            The image file.
+
+        Returns
+        -------
+        List[bytes]
+            The data of each QR code found.
+
+        Raises
+        ------
+        QueueFull
+            Too many images are already waiting to be decoded.
+        asyncio.TimeoutError
+            The image took too long to decode.
+        Image.DecompressionBombError
+            The image has more pixels than allowed.
+        """
+        key = hashlib.sha256(data).hexdigest()
+        codes = self.decodeCache.get(key)
+        if codes is not None:
+            self.decodeCache.move_to_end(key)
+            self.stats.cacheHits += 1
+            return list(codes)
+
+        if self.stats.queueDepth >= MAX_PENDING_DECODES:
+            self.stats.skipped += 1
+            raise QueueFull
+        self.stats.queueDepth += 1
+        self.stats.maxQueueDepth = max(self.stats.maxQueueDepth, self.stats.queueDepth)
+        try:
+            async with self.decodeSlots:
+                maxPixels = await self.config.get_attr(KEY_MAX_IMAGE_PIXELS)()
+                codes = await self._runDecode(data, maxPixels)
+        finally:
+            self.stats.queueDepth -= 1
+
+        self.stats.decoded += 1
+        self.decodeCache[key] = tuple(codes)
+        if len(self.decodeCache) > DECODE_CACHE_SIZE:
+            self.decodeCache.popitem(last=False)
+        return codes
+
+    async def _runDecode(self, data: bytes, maxPixels: Optional[int]) -> List[bytes]:
+        # Must be called with a decode slot held.
+        for attempt in range(2):
+            if not self.executor:
+                self.executor = ProcessPoolExecutor(max_workers=DECODE_WORKERS)
+            executor = self.executor
+            future = asyncio.get_running_loop().run_in_executor(
+                executor, decodeImage, data, maxPixels, DECODE_MAX_SIZE
+            )
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(future, DECODE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.stats.timeouts += 1
+                # The worker is killed, as the job would otherwise keep running, and
+                # keep using the worker and its memory, for however long it takes.
+                if executor is self.executor:
+                    self._closeExecutor(kill=True)
+                raise
+            except BrokenProcessPool:
+                if executor is self.executor:
+                    self._closeExecutor()
+                    raise
+                # The pool was killed because another job timed out, so run this one
+                # again in the new pool.
+                if attempt:
+                    raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stats.decodeTime += elapsed
+                self.stats.maxDecodeTime = max(self.stats.maxDecodeTime, elapsed)
@@ -0,0 +1,44 @@
+"""QR code decoding.
+
+Kept free of discord and Red imports, since it runs in worker processes.
+"""
+
+from io import BytesIO
+from typing import List, Optional
+
+from PIL import Image
+from pyzbar.pyzbar import decode, ZBarSymbol
+
+
+def decodeImage(data: bytes, maxPixels: Optional[int], maxSize: int) -> List[bytes]:
+    """Find the QR codes in an image.
+
+    Parameters
+    ----------
+    data: bytes
+        The image file.
+    maxPixels: Optional[int]
+        The maximum number of pixels in an image to check, or None for no limit.
+    maxSize: int
+        Images wider or taller than this are scaled down to fit before decoding.
+
+    Returns
+    -------
+    List[bytes]
+        The data of each QR code found.
+
+    Raises
+    ------
+    Image.DecompressionBombError
+        The image has more than maxPixels pixels.
+    """
+    # Set here rather than inherited, as the setting may have changed since the worker
+    # started. See `Core.setMaxImagePixels`.
+    Image.MAX_IMAGE_PIXELS = maxPixels // 2 if maxPixels else None
+    with Image.open(BytesIO(data)) as image:
+        if max(image.size) > maxSize:
+            # JPEGs can be decoded at a reduced size straight away.
+            image.draft("L", (maxSize, maxSize))
+            image = image.convert("L")
+            image.thumbnail((maxSize, maxSize))
+        return [code.data for code in decode(image, symbols=[ZBarSymbol.QRCODE])]
@@ -1,9 +1,8 @@
-from io import BytesIO
+from asyncio import QueueFull, TimeoutError as AsyncTimeoutError
 from typing import List
 
 from discord import AllowedMentions, Message
 from PIL import Image
-from pyzbar.pyzbar import Decoded, decode, ZBarSymbol
 
 from redbot.core.commands import Context
 from redbot.core.utils.chat_formatting import box, pagify
@@ -42,18 +41,21 @@ class EventsCore(Core):
                 continue
 
             # At this point we decern that it's an image.
-            async with self.lock:
-                try:
-                    fp: BytesIO = BytesIO(await attachment.read())
-                    image: Image = Image.open(fp)
-                    codes: List[Decoded] = decode(image, symbols=[ZBarSymbol.QRCODE])
-                    self.logger.debug("Found %s codes", len(codes))
-                except Image.DecompressionBombError as error:
-                    self.logger.error("Couldn't check file, image too large: %s", error)
-                    return
-                except Exception:
-                    self.logger.error("Couldn't check file.", exc_info=True)
-                    return
+            try:
+                codes: List[bytes] = await self.decode(await attachment.read())
+                self.logger.debug("Found %s codes", len(codes))
+            except QueueFull:
+                self.logger.warning("Couldn't check file, too many images are pending.")
+                return
+            except AsyncTimeoutError:
+                self.logger.error("Couldn't check file, took too long to decode.")
+                return
+            except Image.DecompressionBombError as error:
+                self.logger.error("Couldn't check file, image too large: %s", error)
+                return
+            except Exception:
+                self.logger.error("Couldn't check file.", exc_info=True)
+                return
 
             if not codes:
                 self.logger.debug("No QR codes found.")
@@ -71,7 +73,7 @@ class EventsCore(Core):
             numQrCodes = len(codes)
             if numQrCodes == 1:
                 code = codes[0]
-                data: str = code.data.decode()
+                data: str = code.decode()
                 if len(data) == 0:
                     self.logger.debug("No data in QR code.")
                     return
@@ -93,7 +95,7 @@ class EventsCore(Core):
                     f"Found several QR codes from {message.author.mention}, their contents are:"
                 )
                 for code in codes:
-                    data: str = code.data.decode()
+                    data: str = code.decode()
                     if len(data) == 0:
                         self.logger.debug("No data in QR code.")
                         continue
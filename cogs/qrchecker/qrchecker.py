@@ -8,8 +8,13 @@ Requires:
 from redbot.core import commands
 
 from .commandHandlers import CommandHandlers
+from .core import Core
 from .eventHandlers import EventHandlers
 
 
 class QRChecker(commands.Cog, CommandHandlers, EventHandlers):
     """A QR code checker for attachments"""
+
+    def cog_unload(self):
+        # commands.Cog precedes Core in the MRO, so its hook has to be called explicitly.
+        Core.cog_unload(self)
@@ -5,6 +5,11 @@ KEY_MYSQL_HOST = "mysqlHost"
 KEY_MYSQL_PASS = "mysqlPassword"
 KEY_MYSQL_USER = "mysqlUsername"
 
+# Seconds between writes of the buffered XP to the database.
+XP_FLUSH_INTERVAL = 30
+# Number of database connections kept open.
+XP_POOL_SIZE = 2
+
 DEFAULT_GUILD = {
     KEY_COOLDOWN: 0,
     KEY_MAX_POINTS: 25,
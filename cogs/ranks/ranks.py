@@ -2,17 +2,22 @@
 Keep track of active members on the server.
 """
 
+import asyncio
+from functools import partial
 import logging
 import os
 import random
+from typing import Optional
 import MySQLdb  # The use of MySQL is debatable, but will use it to incorporate CMPT 354 stuff.
 import discord
+from discord.ext import tasks
 
 from redbot.core import Config, checks, commands, data_manager
 from redbot.core.bot import Red
 from redbot.core.commands.context import Context
 
 from .constants import *
+from .store import XPStore
 
 
 class Ranks(commands.Cog):
@@ -41,6 +46,19 @@ class Ranks(commands.Cog):
             )
             self.logger.addHandler(handler)
 
+        # Created when first needed, once the database settings are configured.
+        self.store: Optional[XPStore] = None
+        self.flushXP.start()
+
+    async def cog_unload(self):
+        self.flushXP.cancel()
+        if self.store:
+            try:
+                await self.store.flush()
+            except Exception:  # pylint: disable=broad-except
+                self.logger.error("Could not save the buffered XP", exc_info=True)
+            self.store.close()
+
     ############
     # COMMANDS #
     ############
@@ -54,18 +72,11 @@ class Ranks(commands.Cog):
 
         msg = ":information_source: **Ranks - Leaderboard**\n```"
         rank = 1
-        # TODO: Handle case when MySQL settings are not configured.
-        database = MySQLdb.connect(
-            host=await self.config.get_attr(KEY_MYSQL_HOST)(),
-            user=await self.config.get_attr(KEY_MYSQL_USER)(),
-            passwd=await self.config.get_attr(KEY_MYSQL_PASS)(),
-        )
-        cursor = database.cursor()
-        cursor.execute(
-            "SELECT userid, xp FROM renbot.xp WHERE guildid = "
-            f"{ctx.guild.id} order by xp desc limit 20"
-        )
-        for row in cursor.fetchall():
+        store = await self.getStore()
+        if not store:
+            await ctx.send("The ranks database is not set up. Please notify the admin!")
+            return
+        for row in await store.leaderboard(ctx.guild.id, 20):
             # row[0]: userID
             # row[1]: xp
             userID = row[0]
@@ -84,8 +95,6 @@ class Ranks(commands.Cog):
             if rank == 11:
                 break
 
-        database.close()
-
         msg += "```\n Full rankings at https://ren.injabie3.moe/ranks/"
         await ctx.send(msg)
 
@@ -100,21 +109,15 @@ class Ranks(commands.Cog):
             ofUser = ctx.author
 
         # Execute a MySQL query to order and check.
-        # TODO: Handle case when MySQL settings are not configured.
-        database = MySQLdb.connect(
-            host=await self.config.get_attr(KEY_MYSQL_HOST)(),
-            user=await self.config.get_attr(KEY_MYSQL_USER)(),
-            passwd=await self.config.get_attr(KEY_MYSQL_PASS)(),
-        )
-        embed = discord.Embed()
+        store = await self.getStore()
+        if not store:
+            await ctx.send("The ranks database is not set up. Please notify the admin!")
+            return
         # Using query code from:
         # https://stackoverflow.com/questions/13566695/select-increment-counter-in-mysql
         # This code is now included in the stored procedure in the database.
-        cursor = database.cursor()
-        cursor.execute("CALL renbot.getUserInfo({},{})".format(str(ctx.guild.id), str(ofUser.id)))
         embed = discord.Embed()
-        data = cursor.fetchone()  # Data from the database.
-        database.close()
+        data = await store.userInfo(ctx.guild.id, ofUser.id)  # Data from the database.
 
         try:
             self.logger.info(data)
@@ -125,7 +128,7 @@ class Ranks(commands.Cog):
             currentXP = data[4]
             totalXP = data[5]
             currentLevelXP = currentXP - totalXP
-        except IndexError as error:
+        except (IndexError, TypeError) as error:
             await ctx.send(
                 "Something went wrong when checking your level. " "Please notify the admin!"
             )
@@ -267,6 +270,15 @@ class Ranks(commands.Cog):
         await self.config.get_attr(KEY_MYSQL_USER).set(username.content)
         await self.config.get_attr(KEY_MYSQL_PASS).set(password.content)
 
+        # Reconnect with the new settings, keeping the XP gained so far.
+        if self.store:
+            pending = self.store.pending
+            self.store.close()
+            self.store = None
+            store = await self.getStore()
+            for (guildId, userId), xp in pending.items():
+                store.addXP(guildId, userId, xp)
+
         await ctx.send("Settings saved.")
         self.logger.info(
             "Database connection changed by %s#%s (%s)",
@@ -279,45 +291,44 @@ class Ranks(commands.Cog):
     # HELPER FUNCTIONS #
     ####################
 
+    async def getStore(self) -> Optional[XPStore]:
+        """Get the XP store, or None if the database connection is not configured."""
+        if self.store:
+            return self.store
+        host = await self.config.get_attr(KEY_MYSQL_HOST)()
+        user = await self.config.get_attr(KEY_MYSQL_USER)()
+        password = await self.config.get_attr(KEY_MYSQL_PASS)()
+        if not host or not user or not password:
+            return None
+        self.store = XPStore(
+            partial(MySQLdb.connect, host=host, user=user, passwd=password), logger=self.logger
+        )
+        return self.store
+
     async def addPoints(self, guild, userID):
-        """Add rank points between 0 and MAX_POINTS to the user"""
-        maxPoints = await self.config.guild(guild).get_attr(KEY_MAX_POINTS)()
-        pointsToAdd = random.randint(0, maxPoints)
-        if (
-            not await self.config.get_attr(KEY_MYSQL_HOST)()
-            or not await self.config.get_attr(KEY_MYSQL_USER)()
-            or not await self.config.get_attr(KEY_MYSQL_PASS)()
-        ):
+        """Add rank points between 0 and MAX_POINTS to the user.
+
+        The points are buffered, and written to the database by `flushXP`.
+        """
+        store = await self.getStore()
+        if not store:
             self.logger.debug("DB connection is not configured")
             return
 
-        database = MySQLdb.connect(
-            host=await self.config.get_attr(KEY_MYSQL_HOST)(),
-            user=await self.config.get_attr(KEY_MYSQL_USER)(),
-            passwd=await self.config.get_attr(KEY_MYSQL_PASS)(),
-        )
-        cursor = database.cursor()
-        fetch = cursor.execute(
-            "SELECT xp from renbot.xp WHERE userid = {0} and "
-            "guildid = {1}".format(userID, guild.id)
-        )
-
-        currentXP = 0
-
-        if fetch != 0:  # This user has past XP that we can add to.
-            result = cursor.fetchall()
-            currentXP = result[0][0] + pointsToAdd
-            self.logger.debug("%s - old EXP: %s, new EXP: %s", userID, result[0][0], currentXP)
-        else:  # New user
-            currentXP = pointsToAdd
-            self.logger.debug("%s - no EXP, new EXP: %s", userID, currentXP)
+        maxPoints = await self.config.guild(guild).get_attr(KEY_MAX_POINTS)()
+        pointsToAdd = random.randint(0, maxPoints)
+        store.addXP(guild.id, userID, pointsToAdd)
+        self.logger.debug("%s - buffered %s EXP", userID, pointsToAdd)
 
-        cursor.execute(
-            "REPLACE INTO renbot.xp (userid, guildid, xp) VALUES "
-            f"({userID}, {guild.id}, {currentXP})"
-        )
-        database.commit()
-        database.close()
+    @tasks.loop(seconds=XP_FLUSH_INTERVAL)
+    async def flushXP(self):
+        """Write the buffered XP to the database."""
+        if not self.store:
+            return
+        try:
+            await self.store.flush()
+        except Exception:  # pylint: disable=broad-except
+            self.logger.error("Could not save the buffered XP, will retry", exc_info=True)
 
     @commands.Cog.listener("on_message")
     async def checkFlood(self, message):
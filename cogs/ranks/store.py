@@ -0,0 +1,146 @@
+"""XP storage for the Ranks cog."""
+
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import queue
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import MySQLdb
+
+from .constants import XP_POOL_SIZE
+
+
+def _upsertXP(connection, rows: List[Tuple[int, int, int]]):
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(
+            "INSERT INTO renbot.xp (userid, guildid, xp) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE xp = xp + VALUES(xp)",
+            rows,
+        )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _leaderboard(connection, guildId: int, limit: int):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT userid, xp FROM renbot.xp WHERE guildid = %s ORDER BY xp DESC LIMIT %s",
+            (guildId, limit),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _userInfo(connection, guildId: int, userId: int):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("CALL renbot.getUserInfo(%s, %s)", (guildId, userId))
+        data = cursor.fetchone()
+        # Consume the procedure's status result, so the connection can be reused.
+        while cursor.nextset():
+            pass
+        return data
+    finally:
+        cursor.close()
+
+
+class XPStore:
+    """Non-blocking access to the XP table.
+
+    Queries run on a small pool of worker threads, each reusing an open connection
+    rather than connecting for every query. XP is buffered in memory per
+    (guild, user) and written with a single batched upsert on `flush`.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        poolSize: int = XP_POOL_SIZE,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.connect = connect
+        self.logger = logger or logging.getLogger("red.Ranks")
+        self.executor = ThreadPoolExecutor(max_workers=poolSize, thread_name_prefix="ranks-db")
+        self.connections: "queue.SimpleQueue" = queue.SimpleQueue()
+        # (guild ID, user ID) -> XP not yet written
+        self.pending: Dict[Tuple[int, int], int] = defaultdict(int)
+        self.flushLock = asyncio.Lock()
+
+    def _run(self, func, *args):
+        """Run a query on an idle connection. Called from the worker threads."""
+        try:
+            connection = self.connections.get_nowait()
+            pooled = True
+        except queue.Empty:
+            connection = self.connect()
+            pooled = False
+        try:
+            result = func(connection, *args)
+        except MySQLdb.OperationalError:
+            connection.close()
+            if not pooled:
+                raise
+            # The idle connection may have timed out, try once more with a new one.
+            connection = self.connect()
+            try:
+                result = func(connection, *args)
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+        self.connections.put(connection)
+        return result
+
+    async def _execute(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._run, func, *args)
+
+    def addXP(self, guildId: int, userId: int, xp: int):
+        """Buffer XP for a user, to be written on the next flush."""
+        self.pending[(guildId, userId)] += xp
+
+    async def flush(self):
+        """Write all of the buffered XP in a single batch."""
+        async with self.flushLock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, defaultdict(int)
+            rows = [(userId, guildId, xp) for (guildId, userId), xp in pending.items()]
+            try:
+                await self._execute(_upsertXP, rows)
+            except Exception:
+                # Keep the XP for the next flush.
+                for key, xp in pending.items():
+                    self.pending[key] += xp
+                raise
+            self.logger.debug("Flushed XP for %s users", len(rows))
+
+    async def leaderboard(self, guildId: int, limit: int) -> List[Tuple[int, int]]:
+        """Get the (user ID, XP) rows of a guild's top users."""
+        await self.flush()
+        return await self._execute(_leaderboard, guildId, limit)
+
+    async def userInfo(self, guildId: int, userId: int):
+        """Get the rank, level and XP of a user."""
+        await self.flush()
+        return await self._execute(_userInfo, guildId, userId)
+
+    def close(self):
+        """Close the pooled connections. Unflushed XP is discarded."""
+        self.executor.shutdown(wait=False)
+        while True:
+            try:
+                self.connections.get_nowait().close()
+            except queue.Empty:
+                break
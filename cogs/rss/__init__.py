@@ -13,6 +13,4 @@ with open(Path(__file__).parent / "info.json") as fp:
 
 async def setup(bot: Red):
     """Add the cog to the bot."""
-    rssCog = RSSFeed(bot)
-    await bot.add_cog(rssCog)
-    bot.loop.create_task(rssCog.rss())
+    await bot.add_cog(RSSFeed(bot))
@@ -5,9 +5,14 @@ Requirements:
     - sudo pip install feedparser
 """
 import asyncio
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
+import heapq
 import logging
 import os
+import time
+from typing import Dict, List, Optional, Tuple
 import aiohttp
 import feedparser
 from bs4 import BeautifulSoup
@@ -23,6 +28,20 @@ RSS_IMAGE_URL = (
     "https://upload.wikimedia.org/wikipedia/en/thumb/4/43/Feed-icon.svg/"
     "1200px-Feed-icon.svg.png"
 )
+# Maximum number of HTTP requests in flight at once.
+MAX_CONCURRENT_FETCHES = 5
+FETCH_TIMEOUT = 30  # seconds
+# Number of item pages whose og:image URL is remembered.
+IMAGE_CACHE_SIZE = 512
+# Bounds of a feed's check interval, as multiples of the configured interval. A feed
+# is checked more often while it has new items, and less often while it doesn't or
+# can't be fetched.
+MIN_INTERVAL_FACTOR = 0.25
+MAX_INTERVAL_FACTOR = 8
+MIN_INTERVAL = 60  # seconds
+INTERVAL_BACKOFF = 1.5
+# Maximum seconds between checks for feeds being added or removed.
+SUBSCRIPTION_REFRESH = 300
 
 
 def date2epoch(date):
@@ -55,6 +74,19 @@ def _isNewItem(latestPostTime, itemPostTime):
     return latestPostTime < itemPostTime
 
 
+@dataclass
+class FeedState:
+    """What was last fetched from a feed, used for conditional requests."""
+
+    etag: Optional[str] = None
+    lastModified: Optional[str] = None
+    entries: List[feedparser.FeedParserDict] = field(default_factory=list)
+    # Seconds until the next check, None for the configured interval.
+    interval: Optional[float] = None
+    latestPostTime: Optional[float] = None
+    failures: int = 0
+
+
 class RSSFeed(commands.Cog):
     """RSS cog"""
 
@@ -81,6 +113,27 @@ class RSSFeed(commands.Cog):
             )
             self.logger.addHandler(handler)
 
+        # Shared by every request, created once the checker starts.
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.fetchSemaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        # Feed URL -> state of the last fetch
+        self.feedStates: Dict[str, FeedState] = {}
+        # Item URL -> og:image URL, least recently used first
+        self.imageCache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        # (monotonic time the feed is due, feed URL), soonest first
+        self.schedule: List[Tuple[float, str]] = []
+        self.scheduleChanged = asyncio.Event()
+        # Feed URL -> task checking it
+        self.checkTasks: Dict[str, asyncio.Task] = {}
+        self.bgTask = self.bot.loop.create_task(self.rss())
+
+    async def cog_unload(self):
+        self.bgTask.cancel()
+        for task in self.checkTasks.values():
+            task.cancel()
+        if self.session:
+            await self.session.close()
+
     @checks.mod_or_permissions(manage_messages=True)
     @commands.group(name="rss", pass_context=True, no_pm=True)
     async def _rss(self, ctx):
@@ -90,6 +143,9 @@ class RSSFeed(commands.Cog):
     async def setInterval(self, ctx, minutes: int):
         """Set the interval for RSS to scan for updates.
 
+        Each feed is checked more often while it has new items, and less often while it
+        doesn't, starting from this interval.
+
         Parameters:
         -----------
         minutes: int
@@ -103,6 +159,9 @@ class RSSFeed(commands.Cog):
             return
 
         await self.config.interval.set(minutes * 60)
+        # Start every feed over from the new interval.
+        for state in self.feedStates.values():
+            state.interval = None
 
         await ctx.send(
             ":white_check_mark: **RSS - Check Interval:** Interval set to "
@@ -155,125 +214,273 @@ class RSSFeed(commands.Cog):
 
         await ctx.send(msg)
 
-    async def getFeed(self, rssUrl, guild):
-        """Gets news items from a given RSS URL
+    async def fetchFeed(self, rssUrl):
+        """Gets news items from a given RSS URL.
+
+        The feed is only downloaded again if the server says it changed since the last
+        fetch, otherwise the items from the last fetch are returned.
 
         Parameters:
         -----------
         rssUrl: str
             The URL of the RSS feed.
-        guild: discord.Guild
-            The server where this rss URL comes from
+
         Returns:
         --------
         news: [feedparser.FeedParserDict]
-            A list of news items obtained using the feedparser library.
+            All of the news items in the feed, obtained using the feedparser library.
+        """
+        state = self.feedStates.setdefault(rssUrl, FeedState())
+        headers = {}
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.lastModified:
+            headers["If-Modified-Since"] = state.lastModified
+
+        async with self.fetchSemaphore:
+            async with self.session.get(rssUrl, headers=headers) as resp:
+                if resp.status == 304:
+                    self.logger.debug("%s has not changed", rssUrl)
+                    return state.entries
+                resp.raise_for_status()
+                page = await resp.text()
+                etag = resp.headers.get("ETag")
+                lastModified = resp.headers.get("Last-Modified")
+
+        # Parsing large feeds takes a while, so keep it off the event loop.
+        feed = await asyncio.get_running_loop().run_in_executor(None, feedparser.parse, page)
+        for item in feed.entries:
+            item.title_detail.base = rssUrl
+        state.etag = etag
+        state.lastModified = lastModified
+        state.entries = feed.entries
+        return feed.entries
+
+    async def getImageUrl(self, itemUrl):
+        """Gets the og:image URL of a news item's page, if it has one.
 
-        Also updates the latest post time for the URL given within the settings
-        dict if there is at least one news item.
+        Parameters:
+        -----------
+        itemUrl: str
+            The URL of the news item.
+
+        Returns:
+        --------
+        Optional[str]
+            The URL of the item's image.
         """
+        if itemUrl in self.imageCache:
+            self.imageCache.move_to_end(itemUrl)
+            return self.imageCache[itemUrl]
 
         try:
-            rssDict = await self.config.guild(guild).rssFeedUrls()
-            latestPostTime = rssDict[rssUrl][KEY_LAST_POST_TIME]
-        except KeyError:
-            rssDict[rssUrl][KEY_LAST_POST_TIME] = 0
-            latestPostTime = 0
-
-        news = []
-        async with aiohttp.ClientSession() as session:
-            async with session.get(rssUrl) as resp:
-                page = await resp.text()
-        feed = feedparser.parse(page)
+            async with self.fetchSemaphore:
+                async with self.session.get(itemUrl) as resp:
+                    page = await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            # Not cached, so that it's tried again next time.
+            self.logger.error("Could not fetch %s: %s", itemUrl, error)
+            return None
+
+        soup = BeautifulSoup(page, "html.parser")
+        try:
+            imageUrl = soup.find("meta", property="og:image")["content"]
+        except (KeyError, TypeError) as error:
+            self.logger.error("Image URL error: %s", error)
+            imageUrl = None
 
-        for item in feed.entries:
-            itemPostTime = date2epoch(item["published"])
-            if _isNewItem(latestPostTime, itemPostTime):
-                item.title_detail.base = rssUrl
-                news.append(item)
+        self.imageCache[itemUrl] = imageUrl
+        if len(self.imageCache) > IMAGE_CACHE_SIZE:
+            self.imageCache.popitem(last=False)
+        return imageUrl
+
+    async def makeEmbed(self, item):
+        """Makes the embed to post for a news item.
+
+        Parameters:
+        -----------
+        item: feedparser.FeedParserDict
+            The news item.
 
-        if not news:
-            self.logger.debug("No new items from %s", rssUrl)
+        Returns:
+        --------
+        discord.Embed
+            The embed to post.
+        """
+        embed = discord.Embed()
+        embed.colour = discord.Colour.orange()
+        embed.title = item.title
+        embed.url = item.link.replace(" ", "%20")
+
+        # ugly, but want a nicer "human readable" date
+        embed.add_field(
+            name="Date Published",
+            value=epoch2date(date2epoch(item.published)),
+            inline=False,
+        )
+
+        # Handle empty summary case
+        value = BeautifulSoup(item.summary, "html.parser").get_text()
+        if value:
+            embed.add_field(name="Summary", value=value, inline=False)
         else:
-            self.logger.debug("%s new items from %s", len(news), rssUrl)
+            self.logger.debug("No summary found. Posting without the summary.")
+
+        imageUrl = await self.getImageUrl(embed.url)
+        if imageUrl:
+            embed.set_image(url=imageUrl)
+
+        embed.set_footer(
+            text=f"This update is from {item.title_detail.base}",
+            icon_url=RSS_IMAGE_URL,
+        )
+        return embed
+
+    async def getSubscriptions(self):
+        """Gets the guilds subscribed to each feed.
+
+        Returns:
+        --------
+        Dict[str, List[Tuple[discord.Guild, Optional[discord.TextChannel]]]]
+            The guilds subscribed to each feed URL, with the channel to post to.
+        """
+        subscriptions = defaultdict(list)
+        for guildId, guildData in (await self.config.all_guilds()).items():
+            guild = self.bot.get_guild(guildId)
+            if not guild:
+                continue
+            postChannel = self.bot.get_channel(guildData["channelId"])
+            for feedUrl in guildData["rssFeedUrls"]:
+                subscriptions[feedUrl].append((guild, postChannel))
+        return subscriptions
+
+    async def checkFeed(self, feedUrl):
+        """Checks a feed for new items, and posts them to the guilds subscribed to it.
+
+        The feed is fetched once, no matter how many guilds are subscribed to it. The
+        time until the feed is checked again depends on whether it had new items.
 
-        latestPostTime = _getLatestPostTime(feed.entries)
-        if latestPostTime:
-            rssDict[rssUrl][KEY_LAST_POST_TIME] = latestPostTime
+        Parameters:
+        -----------
+        feedUrl: str
+            The URL of the RSS feed.
+        """
+        state = self.feedStates.setdefault(feedUrl, FeedState())
+        interval = await self.config.interval()
+        minInterval = max(MIN_INTERVAL, interval * MIN_INTERVAL_FACTOR)
+        maxInterval = interval * MAX_INTERVAL_FACTOR
+        try:
+            entries = await self.fetchFeed(feedUrl)
+            latestPostTime = _getLatestPostTime(entries)
+            if state.interval is None or state.failures:
+                # Start over from the configured interval.
+                state.interval = interval
+            elif latestPostTime != state.latestPostTime:
+                state.interval = max(state.interval / INTERVAL_BACKOFF, minInterval)
+            else:
+                state.interval = min(state.interval * INTERVAL_BACKOFF, maxInterval)
+            state.latestPostTime = latestPostTime
+            state.failures = 0
+
+            subscriptions = await self.getSubscriptions()
+            await self.postNews(feedUrl, entries, subscriptions.get(feedUrl, []))
+        except Exception as error:  # pylint: disable=broad-except
+            state.failures += 1
+            state.interval = min(interval * INTERVAL_BACKOFF**state.failures, maxInterval)
+            self.logger.error(
+                "Could not check %s (failed %s times): %s", feedUrl, state.failures, error
+            )
+        finally:
+            self.checkTasks.pop(feedUrl, None)
+            heapq.heappush(self.schedule, (time.monotonic() + state.interval, feedUrl))
+            self.scheduleChanged.set()
+            self.logger.debug("Checking %s again in %s seconds", feedUrl, state.interval)
 
-        await self.config.guild(guild).rssFeedUrls.set(rssDict)
+    async def postNews(self, feedUrl, entries, subscribers):
+        """Posts the new items of a feed to the guilds subscribed to it.
 
-        return news
+        Parameters:
+        -----------
+        feedUrl: str
+            The URL of the RSS feed.
+        entries: [feedparser.FeedParserDict]
+            All of the news items in the feed.
+        subscribers: List[Tuple[discord.Guild, Optional[discord.TextChannel]]]
+            The guilds subscribed to the feed, with the channel to post to.
+        """
+        # Embeds for the new items, made once and posted to every guild.
+        embeds: Dict[str, discord.Embed] = {}
+        for guild, postChannel in subscribers:
+            if not postChannel:
+                self.logger.error("Can't find the RSS channel for %s (%s)", guild.name, guild.id)
+                continue
+
+            rssUrls = self.config.guild(guild).rssFeedUrls
+            latestPostTime = await rssUrls.get_raw(feedUrl, KEY_LAST_POST_TIME, default=0)
+            news = [
+                item
+                for item in entries
+                if _isNewItem(latestPostTime, date2epoch(item["published"]))
+            ]
+            if not news:
+                self.logger.debug("No new items from %s", feedUrl)
+                continue
+            self.logger.debug("%s new items from %s", len(news), feedUrl)
+            await rssUrls.set_raw(feedUrl, KEY_LAST_POST_TIME, value=_getLatestPostTime(entries))
+
+            # Reversed so updates display from latest to earliest, since they are
+            # appended earliest to latest.
+            for item in reversed(news):
+                if item.link not in embeds:
+                    embeds[item.link] = await self.makeEmbed(item)
+                embed = embeds[item.link]
+
+                # Keep this in a try block in case of Discord's explicit filter.
+                try:
+                    await postChannel.send(embed=embed)
+                except discord.errors.HTTPException as error:
+                    self.logger.error("Could not post to RSS channel!")
+                    self.logger.error(error)
+                    self.logger.error("Embed: %s", embed.to_dict())
 
     async def rss(self):
         """RSS background checker.
-        Checks for rss updates periodically and posts any new content to the specific
-        channel.
+        Checks each feed for updates when it's due, and posts any new content to the
+        specific channel.
         """
+        await self.bot.wait_until_red_ready()
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT))
 
         while self == self.bot.get_cog("RSSFeed"):
-            self.logger.debug("Scanning feed(s) for updates...")
-            for guild in self.bot.guilds:
-                chID = await self.config.guild(guild).channelId()
-                postChannel = self.bot.get_channel(chID)
-                updates = []
-
-                if not postChannel:
-                    self.logger.error("Can't find channel: bot is not logged in yet.")
-                else:
-                    rssFeedDict = await self.config.guild(guild).rssFeedUrls()
-                    for feedUrl in rssFeedDict.keys():
-                        feedUpdates = await self.getFeed(feedUrl, guild)
-                        updates += feedUpdates
-
-                # Reversed so updates display from latest to earliest, since they are
-                # appended earliest to latest.
-                for item in reversed(updates):
-                    embed = discord.Embed()
-                    embed.colour = discord.Colour.orange()
-                    embed.title = item.title
-                    embed.url = item.link.replace(" ", "%20")
-
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(item.link.replace(" ", "%20")) as resp:
-                            page = await resp.text()
-
-                    soup = BeautifulSoup(page, "html.parser")
-
-                    # ugly, but want a nicer "human readable" date
-                    embed.add_field(
-                        name="Date Published",
-                        value=epoch2date(date2epoch(item.published)),
-                        inline=False,
-                    )
-
-                    # Handle empty summary case
-                    value = BeautifulSoup(item.summary, "html.parser").get_text()
-                    if value:
-                        embed.add_field(name="Summary", value=value, inline=False)
-                    else:
-                        self.logger.debug("No summary found. Posting without the summary.")
-
-                    try:
-                        embed.set_image(url=soup.find("meta", property="og:image")["content"])
-                    except (KeyError, TypeError) as error:
-                        self.logger.error("Image URL error: %s", error)
-
-                    embed.set_footer(
-                        text=f"This update is from {item.title_detail.base}",
-                        icon_url=RSS_IMAGE_URL,
-                    )
-
-                    # Keep this in a try block in case of Discord's explicit filter.
-                    try:
-                        await postChannel.send(embed=embed)
-                    except discord.errors.HTTPException as error:
-                        self.logger.error("Could not post to RSS channel!")
-                        self.logger.error(error)
-                        self.logger.error("Embed: %s", embed.to_dict())
-
+            now = time.monotonic()
+            try:
+                feedUrls = set(await self.getSubscriptions())
+            except Exception:  # pylint: disable=broad-except
+                self.logger.error("Could not get the RSS subscriptions", exc_info=True)
+                feedUrls = {feedUrl for _, feedUrl in self.schedule} | set(self.checkTasks)
+
+            # Newly added feeds are due straight away.
+            scheduled = {feedUrl for _, feedUrl in self.schedule} | set(self.checkTasks)
+            for feedUrl in feedUrls - scheduled:
+                heapq.heappush(self.schedule, (now, feedUrl))
+
+            while self.schedule and self.schedule[0][0] <= now:
+                _, feedUrl = heapq.heappop(self.schedule)
+                if feedUrl not in feedUrls:
+                    # No guild is subscribed any more.
+                    self.feedStates.pop(feedUrl, None)
+                    continue
+                self.logger.debug("Checking %s for updates...", feedUrl)
+                self.checkTasks[feedUrl] = asyncio.create_task(self.checkFeed(feedUrl))
+
+            timeout = SUBSCRIPTION_REFRESH
+            if self.schedule:
+                timeout = min(timeout, self.schedule[0][0] - now)
+            self.scheduleChanged.clear()
             try:
-                await asyncio.sleep(await self.config.interval())  # pylint: disable=no-member
+                await asyncio.wait_for(self.scheduleChanged.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
             except asyncio.CancelledError as error:
                 self.logger.error("The asyncio sleep was cancelled!")
                 self.logger.error(error)
@@ -6,6 +6,7 @@ import logging
 import os
 import re
 import asyncio
+from typing import Dict, List, Optional, Set
 import discord
 from redbot.core import Config, checks, commands, data_manager
 from redbot.core.bot import Red
@@ -19,6 +20,14 @@ KEY_EMOJIS = "emojis"
 
 BASE_GUILD = {KEY_EMOJIS: {}}
 
+# For matching non-word characters and emojis
+END_SYM = r"([\W:\\<>._]+|$)"
+ST_SYM = r"([\W:\\<>._]+|^)"
+# Characters which can surround a trigger word, as in ST_SYM and END_SYM
+SEPARATOR = re.compile(r"[\W_]")
+# Triggers containing these are matched as regexes of their own.
+REGEX_CHARS = set(".^$*+?{}[]\\|()")
+
 
 class SmartReact(commands.Cog):
     """Create automatic reactions when trigger words are typed in chat"""
@@ -28,6 +37,8 @@ class SmartReact(commands.Cog):
         self.config = Config.get_conf(self, identifier=5842647, force_registration=True)
         self.config.register_guild(**BASE_GUILD)  # Register default (empty) settings.
         self.update_wait = False  # boolean to check if already waiting
+        # Guild ID -> compiled matcher, invalidated when the guild's reactions change.
+        self.matcherCache: Dict[int, ReactMatcher] = {}
 
         # Initialize logger, and save to cog folder.
         saveFolder = data_manager.cog_data_path(cog_instance=self)
@@ -214,6 +225,7 @@ class SmartReact(commands.Cog):
                     continue  # Don't care if doesn't exist
                 if emoji != new_emoji_key:
                     emojiList[new_emoji_key] = emojiList.pop(emoji)
+        self.matcherCache.pop(guild.id, None)
         # self.settings[server.id] = settings
 
         # dataIO.save_json(self.settings_path, self.settings)
@@ -246,6 +258,7 @@ class SmartReact(commands.Cog):
                 emojiDict[str(emoji)].append(word.lower())
             else:
                 emojiDict[str(emoji)] = [word.lower()]
+        self.matcherCache.pop(ctx.guild.id, None)
 
         await ctx.send("Successfully added this reaction.")
 
@@ -279,6 +292,7 @@ class SmartReact(commands.Cog):
                     await ctx.send("That emoji is not used as a reaction " "for that word.")
             else:
                 await ctx.send("There are no smart reactions which use " "this emoji.")
+        self.matcherCache.pop(ctx.guild.id, None)
 
     @commands.Cog.listener("on_guild_emojis_update")
     async def emojis_update_listener(self, guild: discord.Guild, before, after):
@@ -307,19 +321,104 @@ class SmartReact(commands.Cog):
             return
         if not message.guild:
             return
-        react_dict = await self.config.guild(message.guild).get_attr(KEY_EMOJIS)()
-
-        # For matching non-word characters and emojis
-        end_sym = r"([\W:\\<>._]+|$)"
-        st_sym = r"([\W:\\<>._]+|^)"
-        for emoji in react_dict:
-            if any(
-                re.search(st_sym + w + end_sym, message.content, re.IGNORECASE)
-                for w in react_dict[emoji]
-            ):
-                fixed_emoji = self.fix_custom_emoji(emoji)
-                if fixed_emoji:
-                    try:
-                        await message.add_reaction(fixed_emoji)
-                    except discord.Forbidden as e:
-                        pass
+        matcher = await self.getMatcher(message.guild)
+        for emoji in matcher.match(message.content):
+            fixed_emoji = self.fix_custom_emoji(emoji)
+            if fixed_emoji:
+                try:
+                    await message.add_reaction(fixed_emoji)
+                except discord.Forbidden as e:
+                    pass
+
+    async def getMatcher(self, guild: discord.Guild) -> "ReactMatcher":
+        """Get the compiled matcher for a guild's reactions.
+
+        Parameters:
+        -----------
+        guild: discord.Guild
+            The guild to get the matcher for.
+
+        Returns:
+        --------
+        ReactMatcher
+            The matcher, compiled from the guild's current reactions.
+        """
+        try:
+            return self.matcherCache[guild.id]
+        except KeyError:
+            pass
+        reactions = await self.config.guild(guild).get_attr(KEY_EMOJIS)()
+        matcher = ReactMatcher(reactions, logger=self.logger)
+        self.matcherCache[guild.id] = matcher
+        return matcher
+
+
+class ReactMatcher:
+    """All of a guild's trigger words, compiled for matching a message in one pass.
+
+    A trigger word can only start at the start of a message or after a separator,
+    and end before one. Plain trigger words are kept in a set, and only the
+    substrings at those positions, of the lengths of the trigger words, are looked
+    up in it. So the cost of matching a message doesn't grow with the number of
+    triggers. Triggers using regex syntax are compiled on their own, and triggers
+    which aren't valid regexes are skipped.
+    """
+
+    def __init__(self, reactions: Dict[str, List[str]], logger: Optional[logging.Logger] = None):
+        # Emoji -> position in the settings, so reactions are added in that order.
+        self.order: Dict[str, int] = {emoji: idx for idx, emoji in enumerate(reactions)}
+        # Trigger -> emojis reacting to it. Plain triggers are lowercased, as they are
+        # matched case-insensitively.
+        self.emojis: Dict[str, List[str]] = {}
+        for emoji, triggers in reactions.items():
+            for trigger in triggers:
+                if REGEX_CHARS.isdisjoint(trigger):
+                    trigger = trigger.lower()
+                self.emojis.setdefault(trigger, []).append(emoji)
+
+        self.plain: Set[str] = set()
+        self.regexes: Dict[str, re.Pattern] = {}
+        for trigger in self.emojis:
+            if not REGEX_CHARS.isdisjoint(trigger):
+                try:
+                    self.regexes[trigger] = re.compile(ST_SYM + trigger + END_SYM, re.IGNORECASE)
+                except re.error as error:
+                    if logger:
+                        logger.error("Skipping invalid trigger %s: %s", trigger, error)
+            elif trigger:
+                self.plain.add(trigger)
+        self.lengths: List[int] = sorted({len(trigger) for trigger in self.plain})
+
+    def match(self, string: str) -> List[str]:
+        """Find the emojis to react to a string with.
+
+        Parameters:
+        -----------
+        string: str
+            The string to scan.
+
+        Returns:
+        --------
+        List[str]
+            The emojis with a trigger word in string, in the order of the settings.
+        """
+        triggers: Set[str] = set()
+        if self.plain:
+            lowered = string.lower()
+            separators = [matchObj.start() for matchObj in SEPARATOR.finditer(lowered)]
+            starts = [0] + [pos + 1 for pos in separators]
+            ends = set(separators)
+            ends.add(len(lowered))
+            for start in starts:
+                for length in self.lengths:
+                    end = start + length
+                    if end > len(lowered):
+                        break
+                    if end in ends and lowered[start:end] in self.plain:
+                        triggers.add(lowered[start:end])
+        for trigger, regex in self.regexes.items():
+            if regex.search(string):
+                triggers.add(trigger)
+
+        emojis = {emoji for trigger in triggers for emoji in self.emojis[trigger]}
+        return sorted(emojis, key=self.order.__getitem__)
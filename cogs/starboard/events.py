@@ -1,7 +1,10 @@
 import asyncio
 import logging
+import re
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Literal, Optional, Tuple, Union, cast
+from typing import Dict, Literal, Optional, Set, Tuple, Union, cast
 
 import discord
 from discord.utils import snowflake_time
@@ -12,11 +15,33 @@ from redbot.core.i18n import Translator, cog_i18n
 from redbot.core.utils import AsyncIter
 from redbot.core.utils.chat_formatting import humanize_timedelta
 
-from .starboard_entry import FakePayload, StarboardEntry, StarboardMessage
+from .starboard_entry import (
+    ARCHIVE_GROUP,
+    MESSAGE_GROUP,
+    FakePayload,
+    StarboardEntry,
+    StarboardMessage,
+)
 
 _ = Translator("Starboard", __file__)
 log = logging.getLogger("red.trusty-cogs.Starboard")
 
+# How long (in seconds) a fetched source message is reused, and how many are kept.
+MESSAGE_CACHE_TTL = 60
+MESSAGE_CACHE_SIZE = 256
+# Star count edits to a board post are delayed by this many seconds, so that a burst of
+# reactions results in a single edit.
+EDIT_DELAY = 5
+
+CUSTOM_EMOJI_RE = re.compile(r"<a?:\w+:(\d+)>")
+
+
+def _emoji_key(emoji: str) -> Union[int, str]:
+    """The ID of a custom emoji, or a unicode emoji itself"""
+    if match := CUSTOM_EMOJI_RE.fullmatch(emoji):
+        return int(match.group(1))
+    return emoji
+
 
 @cog_i18n(_)
 class StarboardEvents:
@@ -24,6 +49,10 @@ class StarboardEvents:
     config: Config
     starboards: Dict[int, StarboardEntry]
     ready: asyncio.Event
+    message_cache: "OrderedDict[str, Tuple[float, discord.Message]]"
+    pending_edits: Dict[str, asyncio.Task]
+    emoji_index: Dict[int, Dict[str, StarboardEntry]]
+    watched_emojis: Set[Union[int, str]]
 
     async def _build_embed(
         self, guild: discord.Guild, message: discord.Message, starboard: StarboardEntry
@@ -99,18 +128,150 @@ class StarboardEvents:
         em.set_footer(text=f"{channel.guild.name} | {channel.name}")
         return em
 
+    def _build_emoji_index(self) -> None:
+        """
+        Rebuild the index of starboards by emoji, and the set of emojis
+        any starboard is watching. This has to be done whenever a starboard
+        is added, removed, or has its emoji changed.
+        """
+        emoji_index = {}
+        watched_emojis = set()
+        for guild_id, starboards in self.starboards.items():
+            guild_index = emoji_index[guild_id] = {}
+            for starboard in starboards.values():
+                if not starboard.emoji:
+                    continue
+                guild_index[starboard.emoji] = starboard
+                watched_emojis.add(_emoji_key(starboard.emoji))
+        self.emoji_index = emoji_index
+        self.watched_emojis = watched_emojis
+
+    def _is_watched(self, payload: discord.RawReactionActionEvent) -> bool:
+        emoji = payload.emoji
+        return (emoji.id or emoji.name) in self.watched_emojis
+
     async def _save_starboards(self, guild: discord.Guild) -> None:
-        async with self.config.guild(guild).starboards() as starboards:
-            for name, starboard in self.starboards[guild.id].items():
-                starboards[name] = await starboard.to_json()
+        """Save the settings of all of the guild's starboards."""
+        self._build_emoji_index()
+        await self.config.guild(guild).starboards.set(
+            {
+                name: await starboard.to_json()
+                for name, starboard in self.starboards.get(guild.id, {}).items()
+            }
+        )
+
+    async def _save_starboard(self, guild: discord.Guild, starboard: StarboardEntry) -> None:
+        """Save the settings of a single starboard."""
+        await self.config.guild(guild).starboards.set_raw(
+            starboard.name, value=await starboard.to_json()
+        )
+
+    async def _save_message(
+        self, guild_id: int, starboard: StarboardEntry, key: str, message: StarboardMessage
+    ) -> None:
+        await self.config.custom(MESSAGE_GROUP, guild_id, starboard.name, key).set(
+            message.to_json()
+        )
+
+    async def _delete_messages(self, guild_id: int, name: str) -> None:
+        """Delete the stored messages of a starboard which no longer exists."""
+        await self.config.custom(MESSAGE_GROUP, guild_id, name).clear()
+        await self.config.custom(ARCHIVE_GROUP, guild_id, name).clear()
+
+    async def _restore_archived(
+        self, guild: discord.Guild, starboard: StarboardEntry, key: str
+    ) -> bool:
+        """
+        Move a message back from the archive if it has been archived
+
+        Returns
+        -------
+            bool
+                Whether or not the message was in the archive.
+        """
+        archived = self.config.custom(ARCHIVE_GROUP, guild.id, starboard.name, key)
+        data = await archived.all()
+        if not data:
+            return False
+        message = StarboardMessage.from_json(data, guild.id)
+        starboard.messages[key] = message
+        if message.new_message:
+            index_key = f"{message.new_channel}-{message.new_message}"
+            starboard.starboarded_messages[index_key] = key
+        async with self.config.batch():
+            await self._save_message(guild.id, starboard, key, message)
+            await archived.clear()
+        return True
+
+    async def _fetch_message(
+        self, channel: discord.TextChannel, message_id: int
+    ) -> Optional[discord.Message]:
+        """
+        Fetch a message, reusing the result for `MESSAGE_CACHE_TTL` seconds
+
+        Returns
+        -------
+            Optional[discord.Message]
+                The message, or None if it can't be fetched.
+        """
+        key = f"{channel.id}-{message_id}"
+        now = time.monotonic()
+        cached = self.message_cache.get(key)
+        if cached and now - cached[0] < MESSAGE_CACHE_TTL:
+            return cached[1]
+        try:
+            msg = await channel.fetch_message(message_id)
+        except (discord.errors.NotFound, discord.Forbidden):
+            return None
+        self.message_cache[key] = (now, msg)
+        self.message_cache.move_to_end(key)
+        while len(self.message_cache) > MESSAGE_CACHE_SIZE:
+            self.message_cache.popitem(last=False)
+        return msg
+
+    def _queue_edit(
+        self,
+        starboard: StarboardEntry,
+        star_channel: discord.TextChannel,
+        starboard_msg: StarboardMessage,
+    ) -> None:
+        """
+        Update the star count of a board post after `EDIT_DELAY` seconds,
+        unless an update is already queued
+        """
+        key = f"{starboard_msg.new_channel}-{starboard_msg.new_message}"
+        if key in self.pending_edits:
+            return
+        self.pending_edits[key] = asyncio.create_task(
+            self._edit_later(key, starboard, star_channel, starboard_msg)
+        )
+
+    async def _edit_later(
+        self,
+        key: str,
+        starboard: StarboardEntry,
+        star_channel: discord.TextChannel,
+        starboard_msg: StarboardMessage,
+    ) -> None:
+        try:
+            await asyncio.sleep(EDIT_DELAY)
+        finally:
+            # Reactions from now on queue another edit.
+            self.pending_edits.pop(key, None)
+        count_message = f"{starboard.emoji} **#{len(starboard_msg.reactions)}**"
+        await starboard_msg.edit(star_channel, count_message)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        if self.ready.is_set() and not self._is_watched(payload):
+            return
         await self.ready.wait()
         await self._update_stars(payload)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
+        if self.ready.is_set() and not self._is_watched(payload):
+            return
         await self.ready.wait()
         await self._update_stars(payload)
 
@@ -150,13 +311,17 @@ class StarboardEvents:
         based on the reactions added.
         This covers all reaction event types
         """
+        guild_index = self.emoji_index.get(payload.guild_id)
+        if not guild_index:
+            return
+        starboard = guild_index.get(str(payload.emoji))
+        if not starboard or not starboard.enabled:
+            return
         guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             return
         channel = guild.get_channel(payload.channel_id)
 
-        if guild.id not in self.starboards:
-            return
         if version_info >= VersionInfo.from_str("3.4.0"):
             if await self.bot.cog_disabled_in_guild(self, guild):
                 return
@@ -164,14 +329,6 @@ class StarboardEvents:
         member = guild.get_member(payload.user_id)
         if member and member.bot:
             return
-        starboard = None
-        for name, s_board in self.starboards[guild.id].items():
-            if s_board.emoji == str(payload.emoji):
-                starboard = s_board
-        if not starboard:
-            return
-        if not starboard.enabled:
-            return
         allowed_roles = starboard.check_roles(member)
         allowed_channel = starboard.check_channel(self.bot, channel)
         if any((not allowed_roles, not allowed_channel)):
@@ -189,6 +346,9 @@ class StarboardEvents:
 
         async with starboard.lock:
             star_message = await self._loop_messages(payload, starboard, star_channel)
+            key = f"{payload.channel_id}-{payload.message_id}"
+            if star_message is False and await self._restore_archived(guild, starboard, key):
+                star_message = await self._loop_messages(payload, starboard, star_channel)
             if star_message is True:
                 return
 
@@ -198,14 +358,13 @@ class StarboardEvents:
                     # when the first time we're seeing the message is on a
                     # reaction remove event
                     return
-                try:
-                    msg = await channel.fetch_message(payload.message_id)
-                except (discord.errors.NotFound, discord.Forbidden):
+                msg = await self._fetch_message(channel, payload.message_id)
+                if msg is None:
                     return
-                reactions = [payload.user_id]
+                reactions = {payload.user_id}
                 if payload.user_id == msg.author.id:
                     if not starboard.selfstar:
-                        reactions.remove(payload.user_id)
+                        reactions.discard(payload.user_id)
                 star_message = StarboardMessage(
                     guild=guild.id,
                     original_message=payload.message_id,
@@ -216,18 +375,18 @@ class StarboardEvents:
                     reactions=reactions,
                 )
             starboard.stars_added += 1
-            key = f"{payload.channel_id}-{payload.message_id}"
             # await star_message.update_count(self.bot, starboard, remove)
             count = len(star_message.reactions)
             log.debug(f"First time {count=} {starboard.threshold=}")
             if count < starboard.threshold:
                 if key not in starboard.messages:
                     self.starboards[guild.id][starboard.name].messages[key] = star_message
-                await self._save_starboards(guild)
+                async with self.config.batch():
+                    await self._save_message(guild.id, starboard, key, star_message)
+                    await self._save_starboard(guild, starboard)
                 return
-            try:
-                msg = await channel.fetch_message(payload.message_id)
-            except (discord.errors.NotFound, discord.Forbidden):
+            msg = await self._fetch_message(channel, payload.message_id)
+            if msg is None:
                 return
             if not starboard.selfstar and msg.author.id == payload.user_id:
                 log.debug("Is a selfstar so let's return")
@@ -249,7 +408,9 @@ class StarboardEvents:
             index_key = f"{star_channel.id}-{post_msg.id}"
             self.starboards[guild.id][starboard.name].messages[key] = star_message
             self.starboards[guild.id][starboard.name].starboarded_messages[index_key] = key
-            await self._save_starboards(guild)
+            async with self.config.batch():
+                await self._save_message(guild.id, starboard, key, star_message)
+                await self._save_starboard(guild, starboard)
 
     async def red_delete_data_for_user(
         self,
@@ -260,21 +421,23 @@ class StarboardEvents:
         """
         Method for finding users data inside the cog and deleting it.
         """
-        for guild_id, starboards in self.starboards.items():
-            for starboard, entry in starboards.items():
-                for message_ids, message in entry.messages.items():
-                    if message.author == user_id:
+        async with self.config.batch():
+            for guild_id, starboards in self.starboards.items():
+                for name, entry in starboards.items():
+                    to_rem = [
+                        key for key, message in entry.messages.items() if message.author == user_id
+                    ]
+                    for key in to_rem:
+                        message = entry.messages.pop(key)
                         index_key = f"{message.new_channel}-{message.new_message}"
-                        try:
-                            del self.starboards[guild_id][starboard].messages[message_ids]
-                            del self.starboards[guild_id][starboard].starboarded_messages[
-                                index_key
-                            ]
-                        except Exception:
-                            pass
-            async with self.config.guild_from_id(guild_id).starboards() as starboards:
-                for name, starboard in self.starboards[guild_id].items():
-                    starboards[name] = await starboard.to_json()
+                        entry.starboarded_messages.pop(index_key, None)
+                        await self.config.custom(MESSAGE_GROUP, guild_id, name, key).clear()
+            archive = await self.config.custom(ARCHIVE_GROUP).all()
+            for guild_id, starboards in archive.items():
+                for name, messages in starboards.items():
+                    for key, data in messages.items():
+                        if data.get("author") == user_id:
+                            await self.config.custom(ARCHIVE_GROUP, guild_id, name, key).clear()
 
     async def cleanup_old_messages(self) -> None:
         """This will periodically iterate through old messages
@@ -313,24 +476,32 @@ class StarboardEvents:
                                 else:
                                     if snowflake_time(message.original_message) < to_purge:
                                         to_rem.append(message_ids)
-                            for m in to_rem:
-                                log.debug(f"Removing {m}")
-                                del starboard.messages[m]
-                                total_pruned += 1
+                            # Move the old messages to the archive, so that they're no
+                            # longer loaded but still count if they get starred again.
+                            async with self.config.batch():
+                                for m in to_rem:
+                                    log.debug(f"Archiving {m}")
+                                    message = starboard.messages.pop(m)
+                                    await self.config.custom(ARCHIVE_GROUP, guild.id, name, m).set(
+                                        message.to_json()
+                                    )
+                                    await self.config.custom(
+                                        MESSAGE_GROUP, guild.id, name, m
+                                    ).clear()
+                                    total_pruned += 1
                             for m in to_rem_index:
-                                del starboard.starboarded_messages[m]
+                                starboard.starboarded_messages.pop(m, None)
                             if len(to_rem) > 0:
                                 log.info(
-                                    f"Starboard pruned {len(to_rem)} messages that are "
+                                    f"Starboard archived {len(to_rem)} messages that are "
                                     f"{humanize_timedelta(timedelta=purge)} old from "
                                     f"{guild.name} ({guild.id})"
                                 )
                         except Exception:
                             log.exception("Error trying to clenaup old starboard messages.")
-                await self._save_starboards(guild)
             if total_pruned:
                 log.info(
-                    f"Starboard has pruned {total_pruned} messages and ignored {guilds_ignored} guilds."
+                    f"Starboard has archived {total_pruned} messages and ignored {guilds_ignored} guilds."
                 )
             # Sleep 1 day but also run on cog reload
             await asyncio.sleep(60 * 60 * 24)
@@ -390,12 +561,12 @@ class StarboardEvents:
 
         if getattr(payload, "event_type", None) == "REACTION_ADD":
             if (user_id := getattr(payload, "user_id", 0)) not in starboard_msg.reactions:
-                starboard_msg.reactions.append(user_id)
+                starboard_msg.reactions.add(user_id)
                 log.debug("Adding user in _loop_messages")
                 starboard.stars_added += 1
         else:
             if (user_id := getattr(payload, "user_id", 0)) in starboard_msg.reactions:
-                starboard_msg.reactions.remove(user_id)
+                starboard_msg.reactions.discard(user_id)
                 log.debug("Removing user in _loop_messages")
                 starboard.stars_added -= 1
 
@@ -412,11 +583,13 @@ class StarboardEvents:
                 pass
             await starboard_msg.delete(star_channel)
             starboard.starred_messages -= 1
-            await self._save_starboards(guild)
+            async with self.config.batch():
+                await self._save_message(guild.id, starboard, key, starboard_msg)
+                await self._save_starboard(guild, starboard)
             return True
+        await self._save_message(guild.id, starboard, key, starboard_msg)
         log.debug("Editing starboard")
-        count_message = f"{starboard.emoji} **#{count}**"
-        self.bot.loop.create_task(starboard_msg.edit(star_channel, count_message))
-        # create a task because otherwise we could wait up to an hour to open the lock.
+        # Edit in a task because otherwise we could wait up to an hour to open the lock.
         # This is thanks to announcement channels and published messages.
+        self._queue_edit(starboard, star_channel, starboard_msg)
         return True
@@ -1,6 +1,7 @@
 import logging
 import asyncio
-from typing import Union, Dict, Optional
+from typing import Union, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
 from datetime import timedelta
 
 import discord
@@ -10,7 +11,7 @@ from redbot.core.utils.chat_formatting import humanize_timedelta, pagify
 
 from .converters import StarboardExists, RealEmoji
 from .events import StarboardEvents
-from .starboard_entry import StarboardEntry, FakePayload
+from .starboard_entry import ARCHIVE_GROUP, MESSAGE_GROUP, StarboardEntry, FakePayload
 from .menus import BaseMenu, StarboardPages
 
 _ = Translator("Starboard", __file__)
@@ -35,32 +36,66 @@ class Starboard(StarboardEvents, commands.Cog):
         self.config = Config.get_conf(self, 356488795)
         self.config.register_global(purge_time=None)
         self.config.register_guild(starboards={})
+        # guild ID, starboard name, "channel ID-message ID"
+        self.config.init_custom(MESSAGE_GROUP, 3)
+        self.config.init_custom(ARCHIVE_GROUP, 3)
         self.starboards: Dict[int, Dict[str, StarboardEntry]] = {}
         self.init_task: asyncio.Task = self.bot.loop.create_task(self.initialize())
         self.ready = asyncio.Event()
         self.cleanup_loop: Optional[asyncio.Task] = None
+        self.message_cache: "OrderedDict[str, Tuple[float, discord.Message]]" = OrderedDict()
+        self.pending_edits: Dict[str, asyncio.Task] = {}
+        # guild ID -> emoji -> starboard, and the emojis watched in any guild
+        self.emoji_index: Dict[int, Dict[str, StarboardEntry]] = {}
+        self.watched_emojis: Set[Union[int, str]] = set()
 
     async def initialize(self) -> None:
         log.debug("Started building starboards cache from config.")
         for guild_id in await self.config.all_guilds():
             self.starboards[guild_id] = {}
             all_data = await self.config.guild_from_id(guild_id).starboards()
+            stored_messages = await self.config.custom(MESSAGE_GROUP, guild_id).all()
+            to_migrate = []
             for name, data in all_data.items():
+                if "messages" in data:
+                    # Messages used to be saved along with the starboard's settings.
+                    to_migrate.append(name)
+                else:
+                    data["messages"] = stored_messages.get(name, {})
                 try:
                     starboard = await StarboardEntry.from_json(data, guild_id)
                 except Exception:
                     log.exception("error converting starboard")
                 self.starboards[guild_id][name] = starboard
+            if to_migrate:
+                await self._migrate_messages(guild_id, to_migrate)
 
+        self._build_emoji_index()
         self.cleanup_loop = asyncio.create_task(self.cleanup_old_messages())
         self.ready.set()
         log.debug("Done building starboards cache from config.")
 
+    async def _migrate_messages(self, guild_id: int, names: List[str]) -> None:
+        log.info(f"Moving the messages of starboards {names} in {guild_id} to their own keys.")
+        async with self.config.batch():
+            for name in names:
+                starboard = self.starboards[guild_id][name]
+                for key, message in starboard.messages.items():
+                    await self._save_message(guild_id, starboard, key, message)
+            await self.config.guild_from_id(guild_id).starboards.set(
+                {
+                    name: await starboard.to_json()
+                    for name, starboard in self.starboards[guild_id].items()
+                }
+            )
+
     def cog_unload(self) -> None:
         self.ready.clear()
         self.init_task.cancel()
         if self.cleanup_loop:
             self.cleanup_loop.cancel()
+        for task in self.pending_edits.values():
+            task.cancel()
 
     async def cog_check(self, ctx: commands.Context) -> bool:
         return self.ready.is_set()
@@ -180,6 +215,7 @@ class Starboard(StarboardEvents, commands.Cog):
             channel = guild.get_channel(starboard.channel)
             if channel is None:
                 del self.starboards[guild.id][name]
+                await self._delete_messages(guild.id, name)
                 boards += 1
                 continue
             if starboard.blacklist:
@@ -227,6 +263,7 @@ class Starboard(StarboardEvents, commands.Cog):
             starboard = list(self.starboards[guild.id].values())[0]
         del self.starboards[ctx.guild.id][starboard.name]
         await self._save_starboards(ctx.guild)
+        await self._delete_messages(ctx.guild.id, starboard.name)
         await ctx.send(_("Deleted starboard {name}").format(name=starboard.name))
 
     @commands.command()
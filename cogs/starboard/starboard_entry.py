@@ -3,7 +3,7 @@ from __future__ import annotations
 import asyncio
 import logging
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Set, Union
 
 import discord
 from redbot import VersionInfo, version_info
@@ -12,6 +12,12 @@ from redbot.core.utils import AsyncIter
 
 log = logging.getLogger("red.trusty-cogs.starboard")
 
+# Custom config groups holding a StarboardMessage per (guild, starboard, channel-message)
+# key. Messages older than the purge time are moved to the archive, which is not
+# loaded into memory.
+MESSAGE_GROUP = "STARBOARD_MESSAGE"
+ARCHIVE_GROUP = "STARBOARD_ARCHIVE"
+
 
 @dataclass
 class FakePayload:
@@ -140,6 +146,10 @@ class StarboardEntry:
         return True
 
     async def to_json(self) -> dict:
+        """
+        The settings of this starboard. Messages are stored separately under
+        `MESSAGE_GROUP`, so that a reaction only writes the message it was added to.
+        """
         return {
             "name": self.name,
             "guild": self.guild,
@@ -150,10 +160,6 @@ class StarboardEntry:
             "selfstar": self.selfstar,
             "blacklist": self.blacklist,
             "whitelist": self.whitelist,
-            "messages": {
-                k: m.to_json() async for k, m in AsyncIter(self.messages.items(), steps=500)
-            },
-            "starboarded_messages": self.starboarded_messages,
             "threshold": self.threshold,
             "autostar": self.autostar,
             "starred_messages": self.starred_messages,
@@ -184,6 +190,8 @@ class StarboardEntry:
             messages = new_messages
         if not starboarded_messages:
             async for message_ids, obj in AsyncIter(messages.items()):
+                if not obj.new_message:
+                    continue
                 key = f"{obj.new_channel}-{obj.new_message}"
                 starboarded_messages[key] = f"{obj.original_channel}-{obj.original_message}"
         starred_messages = data.get("starred_messages", len(starboarded_messages))
@@ -235,7 +243,8 @@ class StarboardMessage:
         self.new_message: Optional[int] = kwargs.get("new_message")
         self.new_channel: Optional[int] = kwargs.get("new_channel")
         self.author: int = kwargs.get("author", 0)
-        self.reactions: List[int] = kwargs.get("reactions", [])
+        # IDs of the users who starred the message
+        self.reactions: Set[int] = set(kwargs.get("reactions", ()))
 
     def __repr__(self) -> str:
         return (
@@ -322,11 +331,10 @@ class StarboardMessage:
                     continue
                 if not starboard.selfstar and user.id == orig_msg.author.id:
                     continue
-                if user.id not in self.reactions and not user.bot:
-                    self.reactions.append(user.id)
-        if remove and remove in self.reactions:
-            self.reactions.remove(remove)
-        self.reactions = list(set(self.reactions))
+                if not user.bot:
+                    self.reactions.add(user.id)
+        if remove:
+            self.reactions.discard(remove)
         return self
 
     def to_json(self) -> Dict[str, Union[List[int], int, None]]:
@@ -337,7 +345,7 @@ class StarboardMessage:
             "new_message": self.new_message,
             "new_channel": self.new_channel,
             "author": self.author,
-            "reactions": self.reactions,
+            "reactions": list(self.reactions),
         }
 
     @classmethod
@@ -11,11 +11,17 @@ all credit goes to the author of RoboDanny: https://github.com/Rapptz/RoboDanny/
 
 
 class Config:
-    """The "database" object. Internally based on ``json``."""
+    """The "database" object. Internally based on ``json``.
+
+    Each top level key is stored in a file of its own, in a directory named after
+    the database, so that saving one key does not rewrite the others. A database
+    which was saved as a single file is split up the first time it's loaded.
+    """
 
     def __init__(self, directory, name, **options):
         self.name = name
         self.directory = pathlib.Path(directory)
+        self.partitionDirectory = self.directory / pathlib.Path(name).stem
         self.object_hook = options.pop("object_hook", None)
         self.encoder = options.pop("encoder", None)
         self.loop = options.pop("loop", asyncio.get_event_loop())
@@ -25,30 +31,61 @@ class Config:
         else:
             self.load_from_file()
 
+    def _partitionPath(self, key):
+        return self.partitionDirectory / f"{key}.json"
+
     def load_from_file(self):
+        self._db = {}
+        if self.partitionDirectory.is_dir():
+            for path in self.partitionDirectory.glob("*.json"):
+                with open(path, "r") as f:
+                    self._db[path.stem] = json.load(f, object_hook=self.object_hook)
+            return
+
         try:
             with open(os.path.join(self.directory, self.name), "r") as f:
                 self._db = json.load(f, object_hook=self.object_hook)
         except FileNotFoundError:
-            self._db = {}
+            pass
+        # The old single file is left as it is, as a backup.
+        self.partitionDirectory.mkdir(parents=True, exist_ok=True)
+        for key in self._db:
+            self._dump(key)
 
     async def load(self):
         async with self.lock:
             await self.loop.run_in_executor(None, self.load_from_file)
 
-    def _dump(self):
-        temp = self.directory / f"{uuid.uuid4()}-{self.name}.tmp"
+    def _dump(self, key):
+        path = self._partitionPath(key)
+        if key not in self._db:
+            path.unlink(missing_ok=True)
+            return
+
+        temp = self.partitionDirectory / f"{uuid.uuid4()}-{key}.tmp"
         with open(temp, "w", encoding="utf-8") as tmp:
             json.dump(
-                self._db.copy(), tmp, ensure_ascii=True, cls=self.encoder, separators=(",", ":")
+                self._db[key].copy(),
+                tmp,
+                ensure_ascii=True,
+                cls=self.encoder,
+                separators=(",", ":"),
             )
 
         # atomically move the file
-        os.replace(temp, os.path.join(self.directory, self.name))
+        os.replace(temp, path)
+
+    def _dumpAll(self):
+        for key in self._db:
+            self._dump(key)
 
-    async def save(self):
+    async def save(self, key=None):
+        """Saves a config entry, or all of them if no key is given."""
         async with self.lock:
-            await self.loop.run_in_executor(None, self._dump)
+            if key is None:
+                await self.loop.run_in_executor(None, self._dumpAll)
+            else:
+                await self.loop.run_in_executor(None, self._dump, key)
 
     def get(self, key, *args):
         """Retrieves a config entry."""
@@ -57,12 +94,12 @@ class Config:
     async def put(self, key, value, *args):
         """Edits a config entry."""
         self._db[key] = value
-        await self.save()
+        await self.save(key)
 
     async def remove(self, key):
         """Removes a config entry."""
         del self._db[key]
-        await self.save()
+        await self.save(key)
 
     def __contains__(self, item):
         return item in self._db
@@ -8,5 +8,8 @@ BASE_GUILD = {KEY_DM: False, KEY_TIERS: {}, KEY_USE_ALIAS: False}
 DUMP_IN = "data/tags/tags.json"
 DUMP_OUT = "data/tags/export.csv"
 
+# How often (in seconds) tag use counts are saved.
+USES_FLUSH_INTERVAL = 300
+
 NO_LIMIT = float("inf")
 MAX_MSG_LEN = 2000
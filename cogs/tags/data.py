@@ -4,6 +4,19 @@ import json
 import discord
 
 
+async def _resolveOwner(ctx, ownerId):
+    """Get the owner of a tag from the current guild or the cache, fetching them otherwise."""
+    ownerId = int(ownerId)
+    owner = None
+    if ctx.guild:
+        owner = ctx.guild.get_member(ownerId)
+    if owner is None:
+        owner = ctx.bot.get_user(ownerId)
+    if owner is None:
+        owner = await ctx.bot.fetch_user(ownerId)
+    return owner
+
+
 class TagInfo:
     __slots__ = ("name", "content", "owner_id", "uses", "location", "created_at")
 
@@ -36,9 +49,7 @@ class TagInfo:
         if self.created_at:
             e.timestamp = datetime.datetime.fromtimestamp(self.created_at)
 
-        owner = discord.utils.find(lambda m: m.id == self.owner_id, ctx.bot.get_all_members())
-        if owner is None:
-            owner = await ctx.bot.fetch_user(self.owner_id)
+        owner = await _resolveOwner(ctx, self.owner_id)
 
         e.set_author(name=str(owner), icon_url=owner.display_avatar.url)
         e.set_footer(text="Generic" if self.is_generic else "Server-specific")
@@ -70,9 +81,7 @@ class TagAlias:
         if self.created_at:
             e.timestamp = datetime.datetime.fromtimestamp(self.created_at)
 
-        owner = discord.utils.find(lambda m: m.id == self.owner_id, ctx.bot.get_all_members())
-        if owner is None:
-            owner = await ctx.bot.get_user(self.owner_id)
+        owner = await _resolveOwner(ctx, self.owner_id)
 
         e.set_author(name=str(owner), icon_url=owner.display_avatar.url)
         return e
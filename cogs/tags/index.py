@@ -0,0 +1,160 @@
+from collections import Counter, defaultdict
+import difflib
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+# Number of candidates, ranked by shared trigrams, that "did you mean" suggestions are
+# picked from.
+MAX_SUGGESTION_CANDIDATES = 50
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _paddedTrigrams(name: str) -> Set[str]:
+    # Padding gives short names trigrams too, and marks the start and end of names.
+    return _trigrams(f"  {name} ")
+
+
+class TagIndex:
+    """Index over the tags of one location (a guild, or generic).
+
+    A trigram index over the tag names answers substring searches and "did you
+    mean" suggestions without scanning every tag name, and an ownership index maps
+    owner IDs to the names of their tags.
+    """
+
+    def __init__(self, tags: Optional[Mapping[str, Any]] = None):
+        self.names: Set[str] = set()
+        # Trigram -> names containing it
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+        # Owner ID -> names of their tags, and the other way around
+        self.owners: Dict[str, Set[str]] = defaultdict(set)
+        self.ownerOf: Dict[str, str] = {}
+        # Bumped on every change, so that views built from the index can be invalidated.
+        self.version = 0
+        if tags:
+            self.sync(tags)
+
+    def add(self, name: str, ownerId: str):
+        """Index a tag, or update the owner of an indexed tag."""
+        if name not in self.names:
+            self.names.add(name)
+            for trigram in _paddedTrigrams(name):
+                self.trigrams[trigram].add(name)
+        previousOwner = self.ownerOf.get(name)
+        if previousOwner != ownerId:
+            if previousOwner is not None:
+                self._discardOwner(name, previousOwner)
+            self.ownerOf[name] = ownerId
+            self.owners[ownerId].add(name)
+        self.version += 1
+
+    def remove(self, name: str):
+        if name not in self.names:
+            return
+        self.names.discard(name)
+        for trigram in _paddedTrigrams(name):
+            names = self.trigrams.get(trigram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.trigrams[trigram]
+        self._discardOwner(name, self.ownerOf.pop(name))
+        self.version += 1
+
+    def _discardOwner(self, name: str, ownerId: str):
+        names = self.owners.get(ownerId)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.owners[ownerId]
+
+    def sync(self, tags: Mapping[str, Any], names: Optional[Iterable[str]] = None):
+        """Bring the index up to date with the tags of its location.
+
+        Parameters:
+        -----------
+        tags: Mapping[str, Any]
+            All of the location's tags, by name.
+        names: Optional[Iterable[str]]
+            The names of the tags which were added, removed or changed. If not given,
+            every name is checked.
+        """
+        if names is None:
+            names = self.names | set(tags)
+        for name in names:
+            tag = tags.get(name)
+            if tag is None:
+                self.remove(name)
+            else:
+                self.add(name, tag.owner_id)
+        # Tags may also have been replaced by others of the same name and owner.
+        self.version += 1
+
+    def owned(self, ownerId: str) -> Set[str]:
+        """Get the names of the tags owned by someone."""
+        return set(self.owners.get(ownerId, ()))
+
+    def search(self, query: str) -> Set[str]:
+        """Get the names which contain query.
+
+        Parameters:
+        -----------
+        query: str
+            The (lowercase) text to look for.
+
+        Returns:
+        --------
+        Set[str]
+            The names containing query.
+        """
+        if len(query) >= 3:
+            postings = sorted(
+                (self.trigrams.get(trigram, set()) for trigram in _trigrams(query)), key=len
+            )
+            candidates = set.intersection(*postings) if postings else set()
+        elif len(query) == 2:
+            # Every occurrence of a two-character query is followed by another character,
+            # or by the padding at the end of the name.
+            candidates = set()
+            for trigram, names in self.trigrams.items():
+                if trigram.startswith(query):
+                    candidates.update(names)
+        else:
+            candidates = self.names
+        return {name for name in candidates if query in name}
+
+    def candidates(self, name: str) -> Counter:
+        """Count the trigrams each indexed name shares with name."""
+        counts = Counter()
+        for trigram in _paddedTrigrams(name):
+            counts.update(self.trigrams.get(trigram, ()))
+        return counts
+
+
+def suggest(name: str, indexes: Iterable[TagIndex], n: int = 3) -> List[str]:
+    """Suggest names close to name, as `difflib.get_close_matches` would.
+
+    Only the names sharing the most trigrams with name are compared, rather than
+    every name in the indexes.
+
+    Parameters:
+    -----------
+    name: str
+        The name that wasn't found.
+    indexes: Iterable[TagIndex]
+        The indexes of the names to suggest from.
+    n: int
+        The maximum number of suggestions.
+
+    Returns:
+    --------
+    List[str]
+        The suggestions, best first.
+    """
+    counts = Counter()
+    for index in indexes:
+        counts.update(index.candidates(name))
+    candidates = [candidate for candidate, _ in counts.most_common(MAX_SUGGESTION_CANDIDATES)]
+    return difflib.get_close_matches(name, candidates, n=n)
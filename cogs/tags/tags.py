@@ -8,19 +8,20 @@ from .constants import *
 from .data import TagAlias, TagEncoder, TagInfo
 from .exceptions import *
 from .helpers import checkLengthInRaw, createSimplePages, tagDecoder
+from .index import TagIndex, suggest
 from .rolecheck import roles_or_mod_or_permissions
 
 from collections import defaultdict
 from copy import deepcopy
 import csv
 import datetime
-import difflib
 import json
 import logging
 from threading import Lock
 
 import asyncio
 import discord
+from discord.ext import tasks
 from os.path import isfile, join as pathJoin
 
 from redbot.core import Config as ConfigV3, checks, commands, data_manager
@@ -76,6 +77,29 @@ class Tags(commands.Cog):
         if self.bot.guilds:
             self.bot.loop.create_task(self.syncAllowedRoles())
 
+        # Location -> (the tags it was built from, index of their names)
+        self.tagIndexes = {}
+        # Guild ID -> (key of the indexes it was merged from, generic and guild tags)
+        self.mergedTags = {}
+        # Locations whose tags were used since they were last saved.
+        self.usedLocations = set()
+        self.usesFlush.start()
+
+    async def cog_unload(self):
+        self.usesFlush.cancel()
+        await self.flushUses()
+
+    async def flushUses(self):
+        """Save the use counts of tags used since the last flush."""
+        while self.usedLocations:
+            location = self.usedLocations.pop()
+            if location in self.config:
+                await self.config.save(location)
+
+    @tasks.loop(seconds=USES_FLUSH_INTERVAL)
+    async def usesFlush(self):
+        await self.flushUses()
+
     @commands.Cog.listener("on_ready")
     async def initialSyncLoop(self):
         if not self.syncLoopCreated:
@@ -115,17 +139,58 @@ class Tags(commands.Cog):
     def clean_tag_content(self, content):
         return content.replace("@everyone", "@\u200beveryone").replace("@here", "@\u200bhere")
 
+    def getTagIndex(self, location: str) -> TagIndex:
+        """Get the index of the tags in a location, building it if needed."""
+        db = self.config.get(location)
+        entry = self.tagIndexes.get(location)
+        # Rebuild if the database was (re)loaded since the index was built.
+        if entry is None or entry[0] is not db:
+            entry = self.tagIndexes[location] = (db, TagIndex(db))
+        return entry[1]
+
+    async def saveTags(self, location: str, db: dict, *names: str):
+        """Save the tags of a location, and update its index.
+
+        Parameters:
+        -----------
+        location: str
+            The guild ID, or 'generic'.
+        db: dict
+            All of the location's tags.
+        names: str
+            The names of the tags which were added, removed or changed. If none are
+            given, the whole index is checked.
+        """
+        await self.config.put(location, db)
+        self.getTagIndex(location).sync(db, names or None)
+
     def get_possible_tags(self, server):
         """Returns a dict of possible tags that the server can execute.
         If this is a private message then only the generic tags are possible.
         Server specific tags will override the generic tags.
+
+        The returned dict is shared, and must not be modified.
         """
-        generic = self.config.get("generic", {}).copy()
+        genericIndex = self.getTagIndex("generic")
         if server is None:
-            return generic
-
-        generic.update(self.config.get(str(server.id), {}))
-        return generic
+            return self.config.get("generic", {})
+
+        location = str(server.id)
+        guildIndex = self.getTagIndex(location)
+        key = (genericIndex, genericIndex.version, guildIndex, guildIndex.version)
+        cached = self.mergedTags.get(location)
+        if cached is None or cached[0] != key:
+            merged = dict(self.config.get("generic", {}))
+            merged.update(self.config.get(location, {}))
+            cached = self.mergedTags[location] = (key, merged)
+        return cached[1]
+
+    def getTagIndexes(self, server):
+        """Returns the indexes of the tags that the server can execute."""
+        indexes = [self.getTagIndex("generic")]
+        if server is not None:
+            indexes.append(self.getTagIndex(str(server.id)))
+        return indexes
 
     def get_tag(self, server, name, *, redirect=True):
         # Basically, if we're in a PM then we will use the generic tag database
@@ -142,7 +207,7 @@ class Tags(commands.Cog):
             else:
                 return tag
         except KeyError:
-            possible_matches = difflib.get_close_matches(name, tuple(all_tags.keys()))
+            possible_matches = suggest(name, self.getTagIndexes(server))
             if not possible_matches:
                 raise RuntimeError("Tag not found.")
             raise RuntimeError("Tag not found. Did you mean...\n" + "\n".join(possible_matches))
@@ -180,17 +245,7 @@ class Tags(commands.Cog):
             if list(set(admin_roles) & set(roles)) or list(set(mod_roles) & set(roles)):
                 return (False, NO_LIMIT)
 
-        tags = [
-            tag.name
-            for tag in self.config.get("generic", {}).values()
-            if tag.owner_id == str(user.id)
-        ]
-        if server:
-            tags.extend(
-                tag.name
-                for tag in self.config.get(str(server.id), {}).values()
-                if tag.owner_id == str(user.id)
-            )
+        numTags = sum(len(index.owned(str(user.id))) for index in self.getTagIndexes(server))
         tiers = await self.configV3.guild(server).get_attr(KEY_TIERS)()
         # Convert role IDs to string since keys are stored as strings.
         roleIds = [str(r.id) for r in user.roles]
@@ -198,7 +253,7 @@ class Tags(commands.Cog):
         if not relevantTiers:
             return (True, 0)
         limit = max([tiers[key] for key in relevantTiers])
-        if len(tags) >= limit:
+        if numTags >= limit:
             return (True, limit)
         return (False, limit)
 
@@ -277,9 +332,8 @@ class Tags(commands.Cog):
         tag.uses += 1
         await ctx.send(tag)
 
-        # update the database with the new tag reference
-        db = self.config.get(tag.location)
-        await self.config.put(tag.location, db)
+        # Use counts are saved periodically, rather than on every use.
+        self.usedLocations.add(tag.location)
 
     @tag.error
     async def tag_error(self, ctx: Context, error):
@@ -446,7 +500,7 @@ class Tags(commands.Cog):
             created_at=datetime.datetime.utcnow().timestamp(),
         )
 
-        await self.config.put(location, db)
+        await self.saveTags(location, db, lookup)
         await ctx.send('Tag "{}" successfully created.'.format(name))
 
         if await self.configV3.guild(ctx.guild).get_attr(KEY_USE_ALIAS)():
@@ -500,7 +554,7 @@ class Tags(commands.Cog):
             location="generic",
             created_at=datetime.datetime.utcnow().timestamp(),
         )
-        await self.config.put("generic", db)
+        await self.saveTags("generic", db, lookup)
         await ctx.send('Tag "{}" successfully created.'.format(name))
 
         # aliasCog = self.bot.get_cog('Alias')
@@ -566,7 +620,7 @@ class Tags(commands.Cog):
             created_at=datetime.datetime.utcnow().timestamp(),
         )
 
-        await self.config.put(str(server.id), db)
+        await self.saveTags(str(server.id), db, lookup)
         await ctx.send(
             'Tag alias "{}" that points to "{.name}" successfully '
             "created.".format(new_name, original)
@@ -669,7 +723,7 @@ class Tags(commands.Cog):
             location=location,
             created_at=datetime.datetime.utcnow().timestamp(),
         )
-        await self.config.put(location, db)
+        await self.saveTags(location, db, lookup)
         await ctx.send("Cool. I've made your {0.content} tag.".format(name))
 
         if await self.configV3.guild(ctx.guild).get_attr(KEY_USE_ALIAS)():
@@ -762,7 +816,7 @@ class Tags(commands.Cog):
 
         db = self.config.get(tag.location)
         tag.content = content
-        await self.config.put(tag.location, db)
+        await self.saveTags(tag.location, db, lookup)
         await ctx.send("Tag successfully edited.")
 
     @tag.command(name="transfer")
@@ -840,7 +894,7 @@ class Tags(commands.Cog):
             # The user has answered yes; transfering tag
             db = self.config.get(tag.location)
             tag.owner_id = str(user.id)
-            await self.config.put(tag.location, db)
+            await self.saveTags(tag.location, db, lookup)
             await ctx.send(
                 "Tag successfully transferred from the current owner "
                 "to {}.".format(user.mention)
@@ -901,7 +955,7 @@ class Tags(commands.Cog):
         db[newName].name = newName
         del db[oldName]
 
-        await self.config.put(location, db)
+        await self.saveTags(location, db, oldName, newName)
         if await self.configV3.guild(ctx.guild).get_attr(KEY_USE_ALIAS)():
             # Alias is already loaded.
             await aliasCog.add_alias(ctx, newName, "tag {}".format(newName))
@@ -964,10 +1018,12 @@ class Tags(commands.Cog):
                 ]
                 for alias in aliases:
                     alias_db.pop(alias, None)
+                if aliases and alias_db is not db:
+                    await self.saveTags(str(server.id), alias_db, *aliases)
 
             del db[lookup]
 
-        await self.config.put(location, db)
+        await self.saveTags(location, db, lookup)
         await ctx.send(msg)
 
         if await self.configV3.guild(ctx.guild).get_attr(KEY_USE_ALIAS)():
@@ -1025,17 +1081,11 @@ class Tags(commands.Cog):
         """
         owner = ctx.message.author if member is None else member
         server = ctx.message.guild
-        tags = [
-            tag.name
-            for tag in self.config.get("generic", {}).values()
-            if tag.owner_id == str(owner.id)
-        ]
-        if server is not None:
-            tags.extend(
-                tag.name
-                for tag in self.config.get(str(server.id), {}).values()
-                if tag.owner_id == str(owner.id)
-            )
+        tags = []
+        locations = ["generic"] if server is None else ["generic", str(server.id)]
+        for location in locations:
+            db = self.config.get(location, {})
+            tags.extend(db[key].name for key in self.getTagIndex(location).owned(str(owner.id)))
 
         tags.sort()
 
@@ -1069,8 +1119,9 @@ class Tags(commands.Cog):
         """Removes all server-specific tags by a user.
         You must have Manage Messages permissions to use this.
         """
-        db = self.config.get(str(ctx.message.guild.id), {})
-        tags = [key for key, tag in db.items() if tag.owner_id == str(member.id)]
+        location = str(ctx.message.guild.id)
+        db = self.config.get(location, {})
+        tags = sorted(self.getTagIndex(location).owned(str(member.id)))
 
         # TODO I'm pretty sure there's a decorator for the following.
         if not ctx.message.channel.permissions_for(ctx.message.guild.me).add_reactions:
@@ -1124,7 +1175,7 @@ class Tags(commands.Cog):
         for key in tags:
             db.pop(key)
 
-        await self.config.put(str(ctx.message.guild.id), db)
+        await self.saveTags(str(ctx.message.guild.id), db, *tags)
         await msg.delete()
         await ctx.send(
             "Successfully removed all {} tags that belong to {}".format(
@@ -1146,7 +1197,10 @@ class Tags(commands.Cog):
             return
 
         tags = self.get_possible_tags(server)
-        results = [tag.name for key, tag in tags.items() if query in key]
+        matches = set()
+        for index in self.getTagIndexes(server):
+            matches.update(index.search(query))
+        results = [tags[key].name for key in sorted(matches)]
 
         if results:
             try:
@@ -1,9 +1,11 @@
+import difflib
+import json
 import random
 import typing
 
 import pytest
 
-from . import constants, helpers
+from . import config, constants, data, helpers, index
 
 
 class Utils:
@@ -196,3 +198,93 @@ class TestCheckLengthInRaw:
     )
     def testBadCases(self, content: str):
         assert not helpers.checkLengthInRaw(content)
+
+
+class TestConfig:
+    """Tests to ensure the tag database is saved per location."""
+
+    async def testPutOnlySavesOneLocation(self, tmp_path):
+        db = config.Config(tmp_path, "tags.json")
+        await db.put("1", {"a": "tag a"})
+        await db.put("2", {"b": "tag b"})
+        (tmp_path / "tags" / "2.json").write_text(json.dumps({"b": "changed on disk"}))
+
+        db.get("1")["c"] = "tag c"
+        await db.put("1", db.get("1"))
+        assert json.loads((tmp_path / "tags" / "1.json").read_text()) == {
+            "a": "tag a",
+            "c": "tag c",
+        }
+        assert json.loads((tmp_path / "tags" / "2.json").read_text()) == {"b": "changed on disk"}
+
+        await db.remove("1")
+        assert not (tmp_path / "tags" / "1.json").exists()
+        assert config.Config(tmp_path, "tags.json").all() == {"2": {"b": "changed on disk"}}
+
+    async def testSingleFileIsSplitUp(self, tmp_path):
+        legacy = {"generic": {"a": "tag a"}, "1": {"b": "tag b"}}
+        (tmp_path / "tags.json").write_text(json.dumps(legacy))
+
+        assert config.Config(tmp_path, "tags.json").all() == legacy
+        assert json.loads((tmp_path / "tags" / "generic.json").read_text()) == legacy["generic"]
+        assert json.loads((tmp_path / "tags" / "1.json").read_text()) == legacy["1"]
+
+
+class TestTagIndex:
+    """Tests to ensure the tag name index agrees with scanning every name."""
+
+    NAMES = [Utils.randomNumberString(random.randint(1, 8), "abcde") for _ in range(300)]
+
+    @classmethod
+    def tags(cls, names, ownerId="1"):
+        return {name: data.TagInfo(name, "", ownerId, location="1") for name in names}
+
+    @pytest.mark.parametrize("query", ["ab", "abc", "e", "dcba", "aaaaa", "xy"])
+    def testSearch(self, query: str):
+        tagIndex = index.TagIndex(self.tags(self.NAMES))
+        assert tagIndex.search(query) == {name for name in self.NAMES if query in name}
+
+    def testSync(self):
+        tags = self.tags(["abc", "abd"])
+        tagIndex = index.TagIndex(tags)
+        del tags["abc"]
+        tags.update(self.tags(["bcd"], "2"))
+        tagIndex.sync(tags, ["abc", "bcd"])
+        assert tagIndex.search("ab") == {"abd"}
+        assert tagIndex.search("bc") == {"bcd"}
+        assert "abc" not in tagIndex.names
+        assert tagIndex.owned("1") == {"abd"}
+        assert tagIndex.owned("2") == {"bcd"}
+
+        tags["abd"].owner_id = "2"
+        tagIndex.sync(tags)
+        assert tagIndex.owned("1") == set()
+        assert tagIndex.owned("2") == {"abd", "bcd"}
+
+    TAG_NAMES = [
+        "rules",
+        "roles",
+        "faq",
+        "welcome",
+        "welcomemsg",
+        "announcements",
+        "botcommands",
+        "commands",
+        "help",
+        "helpme",
+        "nsfw",
+        "memes",
+        "music",
+        "musicbot",
+        "events",
+        "eventinfo",
+        "giveaway",
+        "ping",
+        "pong",
+        "links",
+    ]
+
+    @pytest.mark.parametrize("name", ["rule", "welcom", "comands", "musik", "fq", "xyz"])
+    def testSuggest(self, name: str):
+        tagIndex = index.TagIndex(self.tags(self.TAG_NAMES))
+        assert index.suggest(name, [tagIndex]) == difflib.get_close_matches(name, self.TAG_NAMES)
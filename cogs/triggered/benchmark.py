@@ -0,0 +1,49 @@
+"""Measures triggered GIF generation throughput for each mode.
+
+Usage: python -m cogs.triggered.benchmark [avatar] [--iterations N]
+
+If no avatar is given, a generated 512x512 image is used.
+"""
+
+import argparse
+import io
+import time
+
+from PIL import Image
+
+from .generator import Modes, generateTrigger
+
+
+def _sampleAvatar() -> bytes:
+    gradient = Image.linear_gradient("L").resize((512, 512))
+    avatar = Image.merge("RGBA", (gradient, gradient.rotate(90), gradient.rotate(180), gradient))
+    data = io.BytesIO()
+    avatar.save(data, format="PNG")
+    return data.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("avatar", nargs="?", help="path to an avatar image")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.avatar:
+        with open(args.avatar, "rb") as avatarFile:
+            avatarData = avatarFile.read()
+    else:
+        avatarData = _sampleAvatar()
+
+    for mode in Modes:
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            gif = generateTrigger(avatarData, mode)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode.name:<18}{args.iterations / elapsed:8.2f} GIFs/s"
+            f"{elapsed / args.iterations * 1000:10.1f} ms/GIF{len(gif) / 1024:10.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,24 @@
-import enum
-from enum import Enum
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import io
 import logging
+from typing import Optional, Tuple
 
 import discord
-from PIL import Image, ImageChops, ImageOps, ImageEnhance
 
 from redbot.core import data_manager
 from redbot.core.bot import Red
 
-AVATAR_FILE_NAME = "{0.id}-triggered.gif"
-
+from .generator import Modes, generateTrigger
 
-class Modes(Enum):
-    TRIGGERED = enum.auto()
-    REALLY_TRIGGERED = enum.auto()
-    HYPER_TRIGGERED = enum.auto()
+AVATAR_FILE_NAME = "{0.id}-triggered.gif"
+# Number of processes generating GIFs.
+GENERATOR_WORKERS = 2
+# Limits of the generated GIF cache.
+CACHE_MAX_ENTRIES = 128
+CACHE_MAX_BYTES = 32 * 1024 * 1024
 
 
 class Core:
@@ -26,10 +29,41 @@ class Core:
         self.saveFolder = data_manager.cog_data_path(cog_instance=self)
         # We need a custom header or else we get a HTTP 403 Unauthorized
         self.headers = {"User-agent": "Mozilla/5.0"}
+        # Created on first use.
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # (avatar hash, mode) -> GIF data, least recently used first
+        self.cache: "OrderedDict[Tuple[str, Modes], bytes]" = OrderedDict()
+        self.cacheSize = 0
+
+    def _closeExecutor(self):
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def _cacheGet(self, key: Tuple[str, Modes]) -> Optional[bytes]:
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache.move_to_end(key)
+        return data
+
+    def _cachePut(self, key: Tuple[str, Modes], data: bytes):
+        if len(data) > CACHE_MAX_BYTES:
+            return
+        old = self.cache.pop(key, None)
+        if old is not None:
+            self.cacheSize -= len(old)
+        self.cache[key] = data
+        self.cacheSize += len(data)
+        while len(self.cache) > CACHE_MAX_ENTRIES or self.cacheSize > CACHE_MAX_BYTES:
+            _, evicted = self.cache.popitem(last=False)
+            self.cacheSize -= len(evicted)
 
     async def _createTrigger(self, user: discord.User, mode=Modes.TRIGGERED):
         """Fetches the user's avatar, and creates a triggered GIF, applies additional PIL image transformations based on specified mode
 
+        The GIF is generated in a worker process, and kept in a cache keyed by the
+        avatar's hash and the mode.
+
         Parameters:
         -----------
         user: discord.User
@@ -39,48 +73,33 @@ class Core:
         --------
         An io.BytesIO object containing the data for the generated trigger image
         """
-        avatarData: bytes
-
         avatar = user.display_avatar.with_size(512)
-        avatarData = await avatar.read()
+        key = (avatar.key, mode)
+        data = self._cacheGet(key)
+        if data is not None:
+            return io.BytesIO(data)
+
+        avatarData: bytes = await avatar.read()
 
         if not avatarData:
             self.logger.error("No avatar data received!")
             return
 
-        with Image.open(io.BytesIO(avatarData)) as avatar:
-            if not avatar:
-                return
-
-            offsets = [(15, 15), (5, 10), (-15, -15), (10, -10), (10, 0), (-15, 10), (10, -5)]
-            images = []
-
-            # if hyper mode is set
-            if mode == Modes.REALLY_TRIGGERED:
-                red_overlay = Image.new(mode="RGBA", size=avatar.size, color=(255, 0, 0, 255))
-                mask = Image.new(mode="RGBA", size=avatar.size, color=(255, 255, 255, 127))
-                avatar = Image.composite(avatar, red_overlay, mask)
-
-            elif mode == Modes.HYPER_TRIGGERED:
-                if avatar.mode == "P":
-                    # for Discord default avatars
-                    avatar = avatar.convert(mode="RGBA")
-                avatar = ImageEnhance.Color(avatar).enhance(5)
-                avatar = ImageEnhance.Sharpness(avatar).enhance(24)
-                avatar = ImageEnhance.Contrast(avatar).enhance(4)
-
-            for xcoord, ycoord in offsets:
-                image = ImageChops.offset(avatar, xcoord, ycoord)
-                image = ImageOps.crop(image, 15)
-                images.append(image)
-            avatar = ImageOps.crop(avatar, 15)
-
-            result = io.BytesIO()
-            avatar.save(
-                result, format="GIF", append_images=images, save_all=True, duration=25, loop=0
-            )
-
-            # IMPORTANT: rewind to beginning of the stream before returning
-            result.seek(0)
-
-            return result
+        if not self.executor:
+            self.executor = ProcessPoolExecutor(max_workers=GENERATOR_WORKERS)
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(self.executor, generateTrigger, avatarData, mode)
+        except BrokenProcessPool:
+            self.logger.error("The GIF generator stopped unexpectedly!", exc_info=True)
+            self._closeExecutor()
+            return
+        if not data:
+            return
+
+        # The same GIF may have been generated and cached in the meantime.
+        cached = self._cacheGet(key)
+        if cached is not None:
+            return io.BytesIO(cached)
+        self._cachePut(key, data)
+        return io.BytesIO(data)
@@ -0,0 +1,64 @@
+"""Triggered GIF generation.
+
+Kept free of discord and Red imports, since it runs in worker processes.
+"""
+
+import enum
+from enum import Enum
+import io
+from typing import Optional
+
+from PIL import Image, ImageChops, ImageOps, ImageEnhance
+
+OFFSETS = [(15, 15), (5, 10), (-15, -15), (10, -10), (10, 0), (-15, 10), (10, -5)]
+
+
+class Modes(Enum):
+    TRIGGERED = enum.auto()
+    REALLY_TRIGGERED = enum.auto()
+    HYPER_TRIGGERED = enum.auto()
+
+
+def generateTrigger(avatarData: bytes, mode: Modes = Modes.TRIGGERED) -> Optional[bytes]:
+    """Creates a triggered GIF from an avatar, applying additional PIL image
+    transformations based on the specified mode.
+
+    Parameters:
+    -----------
+    avatarData: bytes
+        The avatar image.
+    mode: Modes
+
+    Returns:
+    --------
+    The GIF data, or None if the avatar could not be opened.
+    """
+    with Image.open(io.BytesIO(avatarData)) as avatar:
+        if not avatar:
+            return None
+
+        images = []
+
+        # if hyper mode is set
+        if mode == Modes.REALLY_TRIGGERED:
+            red_overlay = Image.new(mode="RGBA", size=avatar.size, color=(255, 0, 0, 255))
+            mask = Image.new(mode="RGBA", size=avatar.size, color=(255, 255, 255, 127))
+            avatar = Image.composite(avatar, red_overlay, mask)
+
+        elif mode == Modes.HYPER_TRIGGERED:
+            if avatar.mode == "P":
+                # for Discord default avatars
+                avatar = avatar.convert(mode="RGBA")
+            avatar = ImageEnhance.Color(avatar).enhance(5)
+            avatar = ImageEnhance.Sharpness(avatar).enhance(24)
+            avatar = ImageEnhance.Contrast(avatar).enhance(4)
+
+        for xcoord, ycoord in OFFSETS:
+            image = ImageChops.offset(avatar, xcoord, ycoord)
+            image = ImageOps.crop(image, 15)
+            images.append(image)
+        avatar = ImageOps.crop(avatar, 15)
+
+        result = io.BytesIO()
+        avatar.save(result, format="GIF", append_images=images, save_all=True, duration=25, loop=0)
+        return result.getvalue()
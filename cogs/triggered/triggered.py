@@ -9,3 +9,6 @@ from .commandHandlers import CommandHandlers
 
 class Triggered(commands.Cog, CommandHandlers):
     """We triggered, fam."""
+
+    def cog_unload(self):
+        self._closeExecutor()
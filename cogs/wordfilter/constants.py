@@ -8,6 +8,8 @@ KEY_FILTERS = "filters"
 KEY_CMD_DENIED = "commandDenied"
 KEY_TOGGLE_MOD = "toggleMod"
 KEY_USAGE_STATS = "usageStats"
+# How often, in seconds, buffered usage stats are written to config.
+USAGE_STATS_FLUSH_INTERVAL = 300
 BASE = {
     KEY_CHANNEL_IDS: [],
     KEY_FILTERS: [],
@@ -3,6 +3,7 @@ import re
 import pytest
 
 from .wordfilter import (
+    FilterMatcher,
     _filterWord,
     _isAllFiltered,
     _isOneWord,
@@ -35,6 +36,23 @@ class TestHelperFunctions:
         filteredPhrase = _filterWord([], inputPhrase)
         assert filteredPhrase == inputPhrase
 
+    def testFilterWordMultiple(self):
+        filters = [r"(fo+)", "bar", "b(a)z"]
+        filteredPhrase = _filterWord(filters, "Foo bar baz qux barbaz")
+        assert filteredPhrase == "`***` `***` `***` qux barbaz"
+
+    def testMatcherScan(self):
+        matcher = FilterMatcher([r"(fo+)", "bar", "b(a)z", "(invalid"])
+        result = matcher.scan("foo bar FOOO baz barbaz")
+        assert result.counts == {r"(fo+)": 2, "bar": 1, "b(a)z": 1}
+        assert result.censored == "`***` `***` `****` `***` barbaz"
+        assert result.filtered
+
+        result = matcher.scan("nothing here")
+        assert result.counts == {}
+        assert result.censored == "nothing here"
+        assert not result.filtered
+
     @pytest.mark.parametrize(
         ["inputStr", "result"],
         [
@@ -3,13 +3,16 @@ To filter words in a more smart/useful way than simply detecting and
 deleting a message.
 """
 import re
+from collections import OrderedDict
+from dataclasses import dataclass
 from threading import Lock
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import logging
 import os
 import asyncio
 import random
 import discord
+from discord.ext import tasks
 from redbot.core import Config, checks, commands, data_manager
 from redbot.core.utils import AsyncIter, chat_formatting
 from redbot.core.utils.menus import DEFAULT_CONTROLS, menu
@@ -22,8 +25,31 @@ from .constants import (
     KEY_CMD_DENIED,
     KEY_TOGGLE_MOD,
     KEY_USAGE_STATS,
+    USAGE_STATS_FLUSH_INTERVAL,
 )
 
+# The number of messages to keep scan results for.
+SCAN_CACHE_SIZE = 256
+
+
+@dataclass
+class FilterResult:
+    """The result of scanning a message with the filters.
+
+    Attributes
+    ----------
+    counts: Dict[str, int]
+        How many times each filter matched.
+    censored: str
+        The message content, with the matches censored.
+    filtered: bool
+        Whether the message should be filtered.
+    """
+
+    counts: Dict[str, int]
+    censored: str
+    filtered: bool
+
 
 class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
     """Word Filter cog, for all your word filtering needs."""
@@ -33,6 +59,12 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         self.bot = bot
         self.config = Config.get_conf(self, identifier=5842647, force_registration=True)
         self.config.register_guild(**BASE)  # Register default (empty) settings.
+        # Guild ID -> compiled matcher, invalidated when the guild's filters change.
+        self.matcherCache: Dict[int, FilterMatcher] = {}
+        # Message ID -> (scanned content, scan task), shared with other cogs.
+        self.scanCache: "OrderedDict[int, Tuple[str, asyncio.Task]]" = OrderedDict()
+        # Guild ID -> filter -> uses not yet written to config.
+        self.usageDeltas: Dict[int, Dict[str, int]] = {}
 
         # Initialize logger, and save to cog folder.
         saveFolder = data_manager.cog_data_path(cog_instance=self)
@@ -50,6 +82,13 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         # self.whitelist = dataIO.load_json(PATH_WHITELIST)
         # self.settings = dataIO.load_json(PATH_SETTINGS)
 
+        self.usageStatsFlush.start()
+
+    async def cog_unload(self):
+        self.logger.info("Cancelling background task")
+        self.usageStatsFlush.cancel()
+        await self.flushUsageStats()
+
     @commands.group(name="wordfilter", aliases=["wf"])
     @commands.guild_only()
     @checks.mod_or_permissions(manage_messages=True)
@@ -87,6 +126,7 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         if word not in filters:
             filters.append(word)
             await self.config.guild(ctx.guild).get_attr(KEY_FILTERS).set(filters)
+            self.invalidateCache(ctx.guild)
             await ctx.send(
                 "`Word Filter:` `{0}` was added to the filter in the "
                 "guild **{1}**".format(word, guildName)
@@ -120,6 +160,8 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         else:
             filters.remove(word)
             await self.config.guild(ctx.guild).get_attr(KEY_FILTERS).set(filters)
+            self.invalidateCache(ctx.guild)
+            self.usageDeltas.get(ctx.guild.id, {}).pop(word, None)
             filterStats = await self.config.guild(ctx.guild).get_attr(KEY_USAGE_STATS)()
             if word in filterStats:
                 del filterStats[word]
@@ -428,6 +470,74 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
 
         return True
 
+    def invalidateCache(self, guild: discord.Guild):
+        """Drop the compiled matcher and the scan results of a guild.
+
+        This should be called whenever the guild's filters change.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild whose filters changed.
+        """
+        self.matcherCache.pop(guild.id, None)
+        self.scanCache.clear()
+
+    async def getMatcher(self, guild: discord.Guild) -> "FilterMatcher":
+        """Get the compiled matcher for a guild's filters.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild to get the matcher for.
+
+        Returns
+        -------
+        FilterMatcher
+            The matcher, compiled from the guild's current filters.
+        """
+        try:
+            return self.matcherCache[guild.id]
+        except KeyError:
+            pass
+        filters = await self.config.guild(guild).get_attr(KEY_FILTERS)()
+        matcher = FilterMatcher(filters, logger=self.logger)
+        self.matcherCache[guild.id] = matcher
+        return matcher
+
+    async def scanMessage(self, msg: discord.Message) -> Optional[FilterResult]:
+        """Scan a message with its guild's filters.
+
+        The result is cached per message, so that other cogs checking the same
+        message (e.g. Highlight) don't scan it again.
+
+        Parameters
+        ----------
+        msg: discord.Message
+            The message to scan.
+
+        Returns
+        -------
+        Optional[FilterResult]
+            The scan result, or None if the message isn't eligible for filtering.
+        """
+        cached = self.scanCache.get(msg.id)
+        if cached is None or cached[0] != msg.content:
+            task = asyncio.ensure_future(self._scanMessage(msg))
+            self.scanCache[msg.id] = (msg.content, task)
+            while len(self.scanCache) > SCAN_CACHE_SIZE:
+                self.scanCache.popitem(last=False)
+        else:
+            task = cached[1]
+        # Shielded, as the task may be awaited by more than one listener.
+        return await asyncio.shield(task)
+
+    async def _scanMessage(self, msg: discord.Message) -> Optional[FilterResult]:
+        if not await self.checkMessageServerAndChannel(msg):
+            return None
+        matcher = await self.getMatcher(msg.guild)
+        return matcher.scan(msg.content)
+
     async def containsFilterableWords(self, msg):
         """Checks to see if the message contains words that we need to filter out.
         If the message is in a server/channel that does not exist or is whitelisted,
@@ -443,17 +553,8 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         Boolean
             True if message contains words that can be filtered, else False.
         """
-        if not await self.checkMessageServerAndChannel(msg):
-            return False
-
-        filteredMsg = msg.content
-        filters = await self.config.guild(msg.guild).get_attr(KEY_FILTERS)()
-
-        filteredMsg = _filterWord(filters, filteredMsg)
-
-        if msg.content == filteredMsg:
-            return False
-        return True
+        result = await self.scanMessage(msg)
+        return result is not None and result.filtered
 
     async def checkWords(
         self, msg, newMsg=None
@@ -473,15 +574,17 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         --------
         Nothing.
         """
-        if newMsg and not await self.checkMessageServerAndChannel(newMsg):
+        if newMsg and not await self.checkMessageServerAndChannel(msg):
             return
 
-        if not await self.checkMessageServerAndChannel(msg):
+        # This also checks that the (new) message is eligible for filtering.
+        result = await self.scanMessage(newMsg or msg)
+        if result is None:
             return
+        filteredMsg = result.censored
 
         blacklistedCmd = False
 
-        filteredWords = await self.config.guild(msg.guild).get_attr(KEY_FILTERS)()
         commandDenied = await self.config.guild(msg.guild).get_attr(KEY_CMD_DENIED)()
 
         if newMsg:
@@ -489,7 +592,6 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         else:
             checkMsg = msg.content
         originalMsg = checkMsg
-        filteredMsg = originalMsg
         oneWord = _isOneWord(checkMsg)
 
         for prefix in await self.bot.get_prefix(msg):
@@ -497,28 +599,12 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
                 if checkMsg.startswith(prefix + cmd):
                     blacklistedCmd = True
 
-        try:
-            # records which words were used and how often
-            filterStats = await self.config.guild(msg.guild).get_attr(KEY_USAGE_STATS)()
-
-            for word in filteredWords:
-                timesMatched = len(
-                    re.findall(r"\b" + word + r"\b", originalMsg, flags=re.IGNORECASE)
-                )
-                filterStats.update({word: filterStats.get(word, 0) + timesMatched})
-
-            await self.config.guild(msg.guild).get_attr(KEY_USAGE_STATS).set(filterStats)
-
-            filteredMsg = _filterWord(filteredWords, filteredMsg)
-
-        except re.error as error:  # pylint: disable=broad-except
-            self.logger.error("Exception!")
-            self.logger.error(error)
-            self.logger.info("Filtered message: %s", filteredMsg)
+        # records which words were used and how often
+        self.recordUsage(msg.guild, result.counts)
 
         allFiltered = _isAllFiltered(filteredMsg)
 
-        if filteredMsg == originalMsg:
+        if not result.filtered:
             return  # no bad words, don't need to do anything else
 
         await msg.delete()
@@ -562,6 +648,65 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         )
         self.logger.info("Message: %s", originalMsg)
 
+    def recordUsage(self, guild: discord.Guild, counts: Dict[str, int]):
+        """Buffer filter usage counts, to be written to config later.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild the filters were used in.
+        counts: Dict[str, int]
+            How many times each filter was used.
+        """
+        if not counts:
+            return
+        deltas = self.usageDeltas.setdefault(guild.id, {})
+        for word, timesMatched in counts.items():
+            deltas[word] = deltas.get(word, 0) + timesMatched
+
+    async def getUsageStats(self, guild: discord.Guild) -> Dict[str, int]:
+        """Get the usage stats of a guild's filters, including buffered counts.
+
+        Parameters
+        ----------
+        guild: discord.Guild
+            The guild to get the usage stats of.
+
+        Returns
+        -------
+        Dict[str, int]
+            How many times each filter was used.
+        """
+        filters = await self.config.guild(guild).get_attr(KEY_FILTERS)()
+        stats = {word: 0 for word in filters}
+        stats.update(await self.config.guild(guild).get_attr(KEY_USAGE_STATS)())
+        for word, timesMatched in self.usageDeltas.get(guild.id, {}).items():
+            stats[word] = stats.get(word, 0) + timesMatched
+        return stats
+
+    async def flushUsageStats(self):
+        """Write the buffered usage counts to config."""
+        usageDeltas, self.usageDeltas = self.usageDeltas, {}
+        if not usageDeltas:
+            return
+        try:
+            async with self.config.batch():
+                for guildId, deltas in usageDeltas.items():
+                    statsConfig = self.config.guild_from_id(guildId).get_attr(KEY_USAGE_STATS)
+                    async with statsConfig() as filterStats:
+                        for word, timesMatched in deltas.items():
+                            filterStats[word] = filterStats.get(word, 0) + timesMatched
+        except Exception:  # pylint: disable=broad-except
+            self.logger.error("Could not save usage stats, will retry later", exc_info=True)
+            for guildId, deltas in usageDeltas.items():
+                merged = self.usageDeltas.setdefault(guildId, {})
+                for word, timesMatched in deltas.items():
+                    merged[word] = merged.get(word, 0) + timesMatched
+
+    @tasks.loop(seconds=USAGE_STATS_FLUSH_INTERVAL)
+    async def usageStatsFlush(self):
+        await self.flushUsageStats()
+
     # Event listeners
     @commands.Cog.listener()
     async def on_message(self, msg):
@@ -592,7 +737,7 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
         """
         Displays the usage stats for all triggered filter words. If sorting is false, shows them unordered, otherwise in descending order of usage
         """
-        rawUsageStats = await self.config.guild(ctx.guild).get_attr(KEY_USAGE_STATS)()
+        rawUsageStats = await self.getUsageStats(ctx.guild)
 
         if rawUsageStats:
             display = []
@@ -621,22 +766,74 @@ class WordFilter(commands.Cog):  # pylint: disable=too-many-instance-attributes
             await ctx.send("Sorry you have no filtered words in **{}**".format(ctx.guild.name))
 
 
-def _filterWord(words: List[str], string: str):
-    def _censorMatch(matchobj: re.Match):
-        matchLength = len(matchobj.group(0))
-        return f"`{'*' * matchLength}`"
-
-    numWords = len(words)
-    if not words:
-        # if no filters added yet, do nothing
-        return string
-    else:
-        # Combine all filter words into one regex
-        numFilters = numWords - 1
-        reFormat = r"\b(?:" + (r"{}|") * numFilters + r"{})\b"
-        regex = reFormat.format(*words)
+class FilterMatcher:
+    """All of a guild's filters, compiled into a single regex.
+
+    Each filter is wrapped in a capturing group of its own, so that a single
+    pass over a message finds which filters matched, how often, and the
+    censored message. Filters which aren't valid regexes are skipped.
+    """
+
+    def __init__(self, words: List[str], logger: Optional[logging.Logger] = None):
+        self.pattern: Optional[re.Pattern] = None
+        # Capturing group index -> filter
+        self.groups: Dict[int, str] = {}
+
+        parts = []
+        groupIndex = 1
+        for word in words:
+            try:
+                numGroups = re.compile(word).groups
+            except re.error as error:
+                if logger:
+                    logger.error("Skipping invalid filter %s: %s", word, error)
+                continue
+            parts.append(f"({word})")
+            self.groups[groupIndex] = word
+            groupIndex += numGroups + 1
+
+        if parts:
+            try:
+                self.pattern = re.compile(r"\b(?:" + "|".join(parts) + r")\b", re.IGNORECASE)
+            except re.error as error:
+                # e.g. the same named group in more than one filter
+                if logger:
+                    logger.error("Could not combine filters: %s", error)
+                self.groups = {}
+
+    def scan(self, string: str) -> FilterResult:
+        """Scan a string in a single pass.
+
+        Parameters
+        ----------
+        string: str
+            The string to scan.
+
+        Returns
+        -------
+        FilterResult
+            The matches per filter and the censored string.
+        """
+        if self.pattern is None:
+            # if no filters added yet, do nothing
+            return FilterResult({}, string, False)
+
+        counts: Dict[str, int] = {}
+
+        def _censorMatch(matchobj: re.Match):
+            # The wrapping group of the matching filter is always the last one to close.
+            word = self.groups[matchobj.lastindex]
+            counts[word] = counts.get(word, 0) + 1
+            matchLength = len(matchobj.group(0))
+            return f"`{'*' * matchLength}`"
+
         # Replace the offending string with the correct number of stars.
-        return re.sub(regex, _censorMatch, string, flags=re.IGNORECASE)
+        censored = self.pattern.sub(_censorMatch, string)
+        return FilterResult(counts, censored, censored != string)
+
+
+def _filterWord(words: List[str], string: str):
+    return FilterMatcher(words).scan(string).censored
 
 
 def _isOneWord(string: str):
@@ -0,0 +1,220 @@
+"""Optional instrumentation of Config accesses.
+
+The profiler is disabled by default, in which case the instrumented code paths in
+`redbot.core.config` only pay for a single attribute lookup. When enabled, it records
+per-cog and per-path call counts, the approximate number of bytes copied, the time spent
+waiting for value locks and histograms of driver latency.
+
+Primary keys (guild IDs, member IDs et cetera) and numeric identifiers below them, such as
+raw IDs used as keys, are left out of the recorded paths, so that the number of tracked paths
+is mostly bounded by the cogs' schemas rather than by their data. As cogs may still key data
+by arbitrary strings, at most `MAX_PATHS` paths are tracked; accesses to any further paths
+are counted under their cog's ``<other>`` path.
+"""
+import bisect
+import pickle
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from ._drivers import IdentifierData
+
+__all__ = ("ConfigProfiler", "profiler")
+
+#: Maximum number of distinct paths tracked.
+MAX_PATHS = 1000
+
+#: Upper bounds (in seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+def _bucket_name(index: int) -> str:
+    if index == len(LATENCY_BUCKETS):
+        return f">{LATENCY_BUCKETS[-1] * 1000:g}ms"
+    return f"<={LATENCY_BUCKETS[index] * 1000:g}ms"
+
+
+def _sizeof(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, -1))
+    except Exception:
+        return 0
+
+
+class _Stats:
+    __slots__ = ("calls", "bytes", "lock_waits", "lock_wait_time", "latency", "max_latency")
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.bytes = 0
+        self.lock_waits = 0
+        self.lock_wait_time = 0.0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "total_calls": sum(self.calls.values()),
+            "bytes": self.bytes,
+            "lock_waits": self.lock_waits,
+            "lock_wait_time": self.lock_wait_time,
+            "latency": self.latency,
+            "max_latency": self.max_latency,
+        }
+
+
+class ConfigProfiler:
+    """Collects statistics on how cogs use Config.
+
+    There's a single instance of this class, `profiler`, which is what
+    `redbot.core.config` reports to.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop all of the statistics collected so far."""
+        self._cogs: Dict[str, _Stats] = defaultdict(_Stats)
+        self._paths: Dict[Tuple[str, ...], _Stats] = defaultdict(_Stats)
+        self._histograms: Dict[str, List[int]] = defaultdict(
+            lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+        )
+        self.started_at = time.time()
+
+    @staticmethod
+    def _path(identifier_data: IdentifierData) -> Tuple[str, ...]:
+        return (
+            identifier_data.cog_name,
+            identifier_data.category or "*",
+            *("*" for _ in identifier_data.primary_key),
+            *("*" if i.isdigit() else i for i in identifier_data.identifiers),
+        )
+
+    def _path_stats(self, identifier_data: IdentifierData) -> _Stats:
+        path = self._path(identifier_data)
+        stats = self._paths.get(path)
+        if stats is None:
+            if len(self._paths) >= MAX_PATHS:
+                path = (identifier_data.cog_name, "<other>")
+            stats = self._paths[path]
+        return stats
+
+    def record(
+        self, identifier_data: IdentifierData, operation: str, latency: float, value: Any = ...
+    ) -> None:
+        """Record a call to the driver.
+
+        Parameters
+        ----------
+        identifier_data : IdentifierData
+            The data which was accessed.
+        operation : str
+            The name of the operation, e.g. ``"get"``.
+        latency : float
+            How long the driver took, in seconds.
+        value
+            The value which was copied to or from the driver, if any.
+
+        """
+        size = 0 if value is ... else _sizeof(value)
+        for stats in (
+            self._cogs[identifier_data.cog_name],
+            self._path_stats(identifier_data),
+        ):
+            stats.calls[operation] += 1
+            stats.bytes += size
+            stats.latency += latency
+            if latency > stats.max_latency:
+                stats.max_latency = latency
+        histogram = self._histograms[identifier_data.cog_name]
+        histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def record_lock_wait(self, identifier_data: IdentifierData, wait: float) -> None:
+        """Record the time spent waiting to acquire a value's lock."""
+        for stats in (
+            self._cogs[identifier_data.cog_name],
+            self._path_stats(identifier_data),
+        ):
+            stats.lock_waits += 1
+            stats.lock_wait_time += wait
+
+    def report(self, limit: int = 10) -> Dict[str, Any]:
+        """Get the collected statistics.
+
+        The returned dict is JSON serializable.
+
+        Parameters
+        ----------
+        limit : int
+            How many of the busiest cogs and paths to include.
+
+        Returns
+        -------
+        dict
+            A dict with ``enabled``, ``duration``, ``cogs`` and ``paths`` keys.
+            Cogs and paths are sorted by the total time spent in the driver.
+
+        """
+
+        def busiest(stats: Dict[Any, _Stats]):
+            return sorted(stats.items(), key=lambda i: i[1].latency, reverse=True)[:limit]
+
+        cogs = []
+        for cog_name, stats in busiest(self._cogs):
+            histogram = self._histograms[cog_name]
+            cogs.append(
+                {
+                    "name": cog_name,
+                    **stats.to_dict(),
+                    "histogram": {_bucket_name(i): n for i, n in enumerate(histogram) if n},
+                }
+            )
+        paths = [
+            {"path": "/".join(path), **stats.to_dict()} for path, stats in busiest(self._paths)
+        ]
+        return {
+            "enabled": self.enabled,
+            "duration": time.time() - self.started_at,
+            "cogs": cogs,
+            "paths": paths,
+        }
+
+    def format_report(self, limit: int = 10) -> str:
+        """Get the collected statistics as human readable text."""
+        report = self.report(limit)
+        lines = [
+            f"Profiling enabled: {report['enabled']}",
+            f"Collected over: {report['duration']:.0f}s",
+            "",
+            "Busiest cogs (calls, copied, lock wait, driver time, max):",
+        ]
+        for cog in report["cogs"]:
+            lines.append(
+                f"  {cog['name']}: {cog['total_calls']}, {cog['bytes']}B,"
+                f" {cog['lock_wait_time'] * 1000:.1f}ms, {cog['latency'] * 1000:.1f}ms,"
+                f" {cog['max_latency'] * 1000:.1f}ms"
+            )
+            lines.append(
+                "    " + ", ".join(f"{bucket}: {n}" for bucket, n in cog["histogram"].items())
+            )
+        lines.append("")
+        lines.append("Busiest paths (calls, copied, lock wait, driver time, max):")
+        for path in report["paths"]:
+            lines.append(
+                f"  {path['path']}: {path['total_calls']}, {path['bytes']}B,"
+                f" {path['lock_wait_time'] * 1000:.1f}ms, {path['latency'] * 1000:.1f}ms,"
+                f" {path['max_latency'] * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+profiler = ConfigProfiler()
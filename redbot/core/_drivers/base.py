@@ -1,10 +1,11 @@
 import abc
 import enum
-from typing import Tuple, Dict, Any, Union, List, AsyncIterator, Type
+from typing import Tuple, Dict, Any, Union, List, AsyncIterator, Type, Iterable
 
 import rich.progress
 
 from redbot.core.utils._internal_utils import RichIndefiniteBarColumn
+from .. import errors
 
 __all__ = ["BaseDriver", "IdentifierData", "ConfigCategory"]
 
@@ -222,6 +223,27 @@ class BaseDriver(abc.ABC):
         """
         raise NotImplementedError
 
+    async def get_readonly(self, identifier_data: IdentifierData) -> Any:
+        """
+        Finds the value indicated by the given identifiers, without copying it.
+
+        The returned value may be shared with the driver's internal state,
+        so it must never be mutated by the caller.
+
+        The BaseDriver provides a generic method which calls `get`, this
+        should be overridden by subclasses which keep their data in memory.
+
+        Parameters
+        ----------
+        identifier_data
+
+        Returns
+        -------
+        Any
+            Stored value.
+        """
+        return await self.get(identifier_data)
+
     @abc.abstractmethod
     async def set(self, identifier_data: IdentifierData, value=None) -> None:
         """
@@ -235,6 +257,140 @@ class BaseDriver(abc.ABC):
         """
         raise NotImplementedError
 
+    async def set_many(self, items: Iterable[Tuple[IdentifierData, Any]]) -> None:
+        """
+        Sets the values of multiple keys at once.
+
+        The BaseDriver provides a generic method which calls `set` for each
+        item, this should be overridden by subclasses which can do it in a
+        single operation.
+
+        Parameters
+        ----------
+        items : Iterable[Tuple[IdentifierData, Any]]
+            Pairs of identifier data and the (JSON serializable) value to
+            set at it.
+        """
+        for identifier_data, value in items:
+            await self.set(identifier_data, value)
+
+    async def apply_batch(self, operations: Iterable[Tuple[str, IdentifierData, Any]]) -> None:
+        """
+        Applies a batch of sets and clears, in order, as a single operation.
+
+        Each operation is a ``("set", identifier_data, value)`` or
+        ``("clear", identifier_data, None)`` tuple.
+
+        The BaseDriver provides a generic method which calls `set` and
+        `clear` for each operation, this should be overridden by subclasses
+        which can commit all of them at once.
+
+        Parameters
+        ----------
+        operations : Iterable[Tuple[str, IdentifierData, Any]]
+            The operations to apply.
+        """
+        for op, identifier_data, value in operations:
+            if op == "set":
+                await self.set(identifier_data, value)
+            else:
+                await self.clear(identifier_data)
+
+    async def inc(
+        self, identifier_data: IdentifierData, value: Union[int, float], default: Union[int, float]
+    ) -> Union[int, float]:
+        """
+        Increments the number indicated by the given identifiers.
+
+        The BaseDriver provides a generic method which gets and then sets
+        the value and is therefore not atomic, subclasses should override it.
+
+        Parameters
+        ----------
+        identifier_data
+        value : Union[int, float]
+            The amount to increment by.
+        default : Union[int, float]
+            The value to start from when there is no stored value.
+
+        Returns
+        -------
+        Union[int, float]
+            The new value.
+
+        Raises
+        ------
+        StoredTypeError
+            If the stored value is not a number.
+        """
+        return await self._generic_update(
+            identifier_data, default, lambda current: _inc(current, value)
+        )
+
+    async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
+        """
+        Toggles the boolean indicated by the given identifiers.
+
+        The BaseDriver provides a generic method which gets and then sets
+        the value and is therefore not atomic, subclasses should override it.
+
+        Parameters
+        ----------
+        identifier_data
+        default : bool
+            The value to toggle when there is no stored value.
+
+        Returns
+        -------
+        bool
+            The new value.
+
+        Raises
+        ------
+        StoredTypeError
+            If the stored value is not a boolean.
+        """
+        return await self._generic_update(identifier_data, default, _toggle)
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        """
+        Appends an item to the list indicated by the given identifiers.
+
+        The BaseDriver provides a generic method which gets and then sets
+        the value and is therefore not atomic, subclasses should override it.
+
+        Parameters
+        ----------
+        identifier_data
+        value
+            Any JSON serializable python object.
+        default : list
+            The list to append to when there is no stored value.
+
+        Returns
+        -------
+        int
+            The new length of the list.
+
+        Raises
+        ------
+        StoredTypeError
+            If the stored value is not a list.
+        """
+        new_list = await self._generic_update(
+            identifier_data, default, lambda current: _append(current, value)
+        )
+        return len(new_list)
+
+    async def _generic_update(self, identifier_data: IdentifierData, default, func):
+        try:
+            current = await self.get(identifier_data)
+        except KeyError:
+            current = default
+        result = func(current)
+        await self.set(identifier_data, result)
+        return result
+
     @abc.abstractmethod
     async def clear(self, identifier_data: IdentifierData) -> None:
         """
@@ -390,3 +546,21 @@ class BaseDriver(abc.ABC):
                     *ConfigCategory.get_pkey_info(category, custom_group_data),
                 )
                 await self.set(ident_data, data)
+
+
+def _inc(current: Any, value: Union[int, float]) -> Union[int, float]:
+    if isinstance(current, bool) or not isinstance(current, (int, float)):
+        raise errors.StoredTypeError(f"Cannot increment non-numeric value {current!r}")
+    return current + value
+
+
+def _toggle(current: Any) -> bool:
+    if not isinstance(current, bool):
+        raise errors.StoredTypeError(f"Cannot toggle non-boolean value {current!r}")
+    return not current
+
+
+def _append(current: Any, value: Any) -> list:
+    if not isinstance(current, list):
+        raise errors.StoredTypeError(f"Cannot append to non-list value {current!r}")
+    return [*current, value]
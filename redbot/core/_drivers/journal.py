@@ -0,0 +1,468 @@
+import asyncio
+import json
+import logging
+import os
+import pickle
+import weakref
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from .. import data_manager, errors
+from .base import BaseDriver, IdentifierData, ConfigCategory, _inc, _toggle
+from .json import _save_json
+
+__all__ = ["JournalDriver"]
+
+
+_shared_datastore = {}
+_journal_lengths = {}
+_driver_counts = {}
+_finalizers = []
+_locks = defaultdict(asyncio.Lock)
+_compaction_tasks: Dict[str, asyncio.Task] = {}
+
+log = logging.getLogger("redbot.journal_driver")
+
+SNAPSHOT_FILE_NAME = "settings.snapshot.json"
+JOURNAL_FILE_NAME = "settings.journal"
+
+
+def finalize_driver(cog_name):
+    if cog_name not in _driver_counts:
+        return
+
+    _driver_counts[cog_name] -= 1
+
+    if _driver_counts[cog_name] == 0:
+        for state in (_shared_datastore, _journal_lengths, _locks):
+            if cog_name in state:
+                del state[cog_name]
+
+    for f in _finalizers:
+        if not f.alive:
+            _finalizers.remove(f)
+
+
+# noinspection PyProtectedMember
+class JournalDriver(BaseDriver):
+    """
+    Subclass of :py:class:`.BaseDriver`.
+
+    Stores each cog's data as a JSON snapshot and an append-only journal
+    of changes made since that snapshot was taken. Each ``set`` and
+    ``clear`` appends a single line to the journal, so the cost of a write
+    depends on the size of the change rather than on the size of the
+    cog's data. Once the journal grows past :py:attr:`compaction_threshold`
+    entries, it is folded into a new snapshot in the background.
+
+    .. py:attribute:: data_path
+
+        The directory in which the snapshot and journal files are stored.
+
+    .. py:attribute:: compaction_threshold
+
+        The number of journal entries after which the journal is compacted.
+        Can be changed with the ``compaction_threshold`` storage detail.
+    """
+
+    compaction_threshold: int = 1000
+
+    def __init__(
+        self, cog_name: str, identifier: str, *, data_path_override: Optional[Path] = None
+    ):
+        super().__init__(cog_name, identifier)
+        if data_path_override is not None:
+            self.data_path = data_path_override
+        elif cog_name == "Core" and identifier == "0":
+            self.data_path = data_manager.core_data_path()
+        else:
+            self.data_path = data_manager.cog_data_path(raw_name=cog_name)
+        self.data_path.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.data_path / SNAPSHOT_FILE_NAME
+        self.journal_path = self.data_path / JOURNAL_FILE_NAME
+        self._load_data()
+
+    @property
+    def _lock(self):
+        return _locks[self.cog_name]
+
+    @property
+    def data(self):
+        return _shared_datastore.get(self.cog_name)
+
+    @data.setter
+    def data(self, value):
+        _shared_datastore[self.cog_name] = value
+
+    @classmethod
+    async def initialize(cls, **storage_details) -> None:
+        threshold = storage_details.get("compaction_threshold")
+        if threshold:
+            cls.compaction_threshold = int(threshold)
+
+    @classmethod
+    async def teardown(cls) -> None:
+        tasks = list(_compaction_tasks.values())
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def get_config_details() -> Dict[str, Any]:
+        # No driver-specific configuration needed
+        return {}
+
+    def _load_data(self):
+        if self.cog_name not in _driver_counts:
+            _driver_counts[self.cog_name] = 0
+        _driver_counts[self.cog_name] += 1
+
+        _finalizers.append(weakref.finalize(self, finalize_driver, self.cog_name))
+
+        if self.data is not None:
+            return
+
+        self.data, _journal_lengths[self.cog_name] = _load(self.snapshot_path, self.journal_path)
+
+    async def get(self, identifier_data: IdentifierData):
+        return pickle.loads(pickle.dumps(await self.get_readonly(identifier_data), -1))
+
+    async def get_readonly(self, identifier_data: IdentifierData):
+        partial = self.data
+        full_identifiers = identifier_data.to_tuple()[1:]
+        for i in full_identifiers:
+            partial = partial[i]
+        return partial
+
+    async def set(self, identifier_data: IdentifierData, value=None):
+        full_identifiers = identifier_data.to_tuple()[1:]
+        # This is both our deepcopy() and our way of making sure this value is actually JSON
+        # serializable.
+        value_copy = json.loads(json.dumps(value))
+
+        async with self._lock:
+            _check_set(self.data, full_identifiers)
+            await self._write_entries(["set", full_identifiers, value_copy])
+            _apply_set(self.data, full_identifiers, value_copy)
+
+    async def set_many(self, items: Iterable[Tuple[IdentifierData, Any]]):
+        entries = [
+            ["set", identifier_data.to_tuple()[1:], json.loads(json.dumps(value))]
+            for identifier_data, value in items
+        ]
+
+        async with self._lock:
+            for _op, full_identifiers, _value_copy in entries:
+                _check_set(self.data, full_identifiers)
+            await self._write_entries(*entries)
+            _apply_entries(self.data, entries)
+
+    async def inc(
+        self, identifier_data: IdentifierData, value: Union[int, float], default: Union[int, float]
+    ) -> Union[int, float]:
+        return await self._update(identifier_data, default, lambda current: _inc(current, value))
+
+    async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
+        return await self._update(identifier_data, default, _toggle)
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        full_identifiers = identifier_data.to_tuple()[1:]
+        value_copy = json.loads(json.dumps(value))
+        default_copy = json.loads(json.dumps(default))
+
+        async with self._lock:
+            try:
+                current = _lookup(self.data, full_identifiers)
+            except KeyError:
+                current = default_copy
+            if not isinstance(current, list):
+                raise errors.StoredTypeError(f"Cannot append to non-list value {current!r}")
+            new_len = len(current) + 1
+            await self._write_entries(
+                ["append", full_identifiers, value_copy, default_copy, new_len]
+            )
+            _apply_append(self.data, full_identifiers, value_copy, default_copy)
+        return new_len
+
+    async def clear(self, identifier_data: IdentifierData):
+        full_identifiers = identifier_data.to_tuple()[1:]
+        async with self._lock:
+            try:
+                _lookup(self.data, full_identifiers)
+            except (KeyError, errors.CannotSetSubfield):
+                return
+            await self._write_entries(["clear", full_identifiers])
+            _apply_clear(self.data, full_identifiers)
+
+    async def apply_batch(self, operations: Iterable[Tuple[str, IdentifierData, Any]]):
+        entries = [
+            ["set", identifier_data.to_tuple()[1:], json.loads(json.dumps(value))]
+            if op == "set"
+            else ["clear", identifier_data.to_tuple()[1:]]
+            for op, identifier_data, value in operations
+        ]
+
+        async with self._lock:
+            for entry in entries:
+                if entry[0] == "set":
+                    _check_set(self.data, entry[1])
+            if entries:
+                await self._write_entries(*entries)
+                _apply_entries(self.data, entries)
+
+    async def _update(self, identifier_data: IdentifierData, default, func):
+        full_identifiers = identifier_data.to_tuple()[1:]
+        async with self._lock:
+            try:
+                current = _lookup(self.data, full_identifiers)
+            except KeyError:
+                current = default
+            result = func(current)
+            # The result is journaled, rather than the operation, so that replaying stays simple.
+            await self._write_entries(["set", full_identifiers, result])
+            _apply_set(self.data, full_identifiers, result)
+        return result
+
+    @classmethod
+    async def aiter_cogs(cls) -> AsyncIterator[Tuple[str, str]]:
+        yield "Core", "0"
+        for _dir in data_manager.cog_data_path().iterdir():
+            snapshot_path = _dir / SNAPSHOT_FILE_NAME
+            journal_path = _dir / JOURNAL_FILE_NAME
+            if not (snapshot_path.exists() or journal_path.exists()):
+                continue
+            cog_name = _dir.stem
+            data = _shared_datastore.get(cog_name)
+            if data is None:
+                try:
+                    data, _ = _load(snapshot_path, journal_path)
+                except json.JSONDecodeError:
+                    continue
+            for cog_id, inner in data.items():
+                if not isinstance(inner, dict):
+                    continue
+                yield cog_name, cog_id
+
+    async def import_data(self, cog_data, custom_group_data):
+        async with self._lock:
+            for category, all_data in cog_data:
+                splitted_pkey = self._split_primary_key(category, custom_group_data, all_data)
+                for pkey, data in splitted_pkey:
+                    ident_data = IdentifierData(
+                        self.cog_name,
+                        self.unique_cog_identifier,
+                        category,
+                        pkey,
+                        (),
+                        *ConfigCategory.get_pkey_info(category, custom_group_data),
+                    )
+                    _apply_set(self.data, ident_data.to_tuple()[1:], data)
+            # A bulk import is better off written as a snapshot than as journal entries.
+            await self._compact()
+
+    async def _write_entries(self, *entries: List[Any]) -> None:
+        # Must be called with the lock held, and before the entries are applied to the
+        # data, so that a failed write doesn't leave changes in memory which aren't on disk.
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _append_journal, self.journal_path, entries)
+        _journal_lengths[self.cog_name] = _journal_lengths.get(self.cog_name, 0) + len(entries)
+        if (
+            _journal_lengths[self.cog_name] >= self.compaction_threshold
+            and self.cog_name not in _compaction_tasks
+        ):
+            task = asyncio.create_task(self._compact_in_background())
+            _compaction_tasks[self.cog_name] = task
+
+    async def _compact_in_background(self) -> None:
+        try:
+            async with self._lock:
+                await self._compact()
+        except Exception:
+            log.exception("Failed to compact the journal of %s.", self.cog_name)
+        finally:
+            _compaction_tasks.pop(self.cog_name, None)
+
+    async def _compact(self) -> None:
+        # Must be called with the lock held.
+        # The snapshot is replaced before the journal is truncated - if we get interrupted
+        # in between, replaying the journal on top of the new snapshot is harmless.
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _save_json, self.snapshot_path, self.data)
+        await loop.run_in_executor(None, _truncate_journal, self.journal_path)
+        _journal_lengths[self.cog_name] = 0
+
+
+def _get_parent(data: Dict[str, Any], full_identifiers: Tuple[str, ...]) -> Dict[str, Any]:
+    partial = data
+    for i in full_identifiers[:-1]:
+        try:
+            partial = partial.setdefault(i, {})
+        except AttributeError:
+            # Tried to set sub-field of non-object
+            raise errors.CannotSetSubfield
+    if not isinstance(partial, dict):
+        raise errors.CannotSetSubfield
+    return partial
+
+
+def _lookup(data: Dict[str, Any], full_identifiers: Tuple[str, ...]) -> Any:
+    """Get the value at full_identifiers, without changing data.
+
+    Raises KeyError if there's no value, or CannotSetSubfield if one of its parents
+    isn't an object.
+    """
+    partial = data
+    for i in full_identifiers:
+        if not isinstance(partial, dict):
+            raise errors.CannotSetSubfield
+        partial = partial[i]
+    return partial
+
+
+def _check_set(data: Dict[str, Any], full_identifiers: Tuple[str, ...]) -> None:
+    """Raise CannotSetSubfield if a value can't be set at full_identifiers."""
+    try:
+        _lookup(data, full_identifiers)
+    except KeyError:
+        pass
+
+
+def _apply_entries(data: Dict[str, Any], entries: Iterable[List[Any]]) -> None:
+    # Entries which can't be applied are skipped, as they are when the journal is
+    # replayed, and the first error is raised once the others have been applied.
+    error = None
+    for op, full_identifiers, *args in entries:
+        try:
+            if op == "set":
+                _apply_set(data, tuple(full_identifiers), args[0])
+            elif op == "clear":
+                _apply_clear(data, tuple(full_identifiers))
+        except errors.StoredTypeError as exc:
+            error = error or exc
+    if error is not None:
+        raise error
+
+
+def _apply_set(data: Dict[str, Any], full_identifiers: Tuple[str, ...], value: Any) -> None:
+    _get_parent(data, full_identifiers)[full_identifiers[-1]] = value
+
+
+def _apply_append(
+    data: Dict[str, Any], full_identifiers: Tuple[str, ...], value: Any, default: list
+) -> int:
+    parent = _get_parent(data, full_identifiers)
+    try:
+        current = parent[full_identifiers[-1]]
+    except KeyError:
+        # Copied, so that appending doesn't change the default of a journal entry.
+        current = parent[full_identifiers[-1]] = list(default)
+    if not isinstance(current, list):
+        raise errors.StoredTypeError(f"Cannot append to non-list value {current!r}")
+    current.append(value)
+    return len(current)
+
+
+def _apply_clear(data: Dict[str, Any], full_identifiers: Tuple[str, ...]) -> bool:
+    partial = data
+    try:
+        for i in full_identifiers[:-1]:
+            partial = partial[i]
+        del partial[full_identifiers[-1]]
+    except (KeyError, TypeError):
+        return False
+    return True
+
+
+def _load(snapshot_path: Path, journal_path: Path) -> Tuple[Dict[str, Any], int]:
+    """Load the snapshot and replay the journal on top of it.
+
+    Returns the loaded data and the number of replayed journal entries.
+    """
+    try:
+        with snapshot_path.open("r", encoding="utf-8") as fs:
+            data = json.load(fs)
+    except FileNotFoundError:
+        data = {}
+
+    _drop_partial_tail(journal_path)
+    count = 0
+    try:
+        with journal_path.open("r", encoding="utf-8") as fs:
+            for line in fs:
+                try:
+                    op, full_identifiers, *args = json.loads(line)
+                except ValueError:
+                    # Most likely a partially written tail left behind by a crash.
+                    log.warning("Skipping a malformed entry in %s.", journal_path)
+                    continue
+                try:
+                    if op == "set":
+                        _apply_set(data, tuple(full_identifiers), args[0])
+                    elif op == "clear":
+                        _apply_clear(data, tuple(full_identifiers))
+                    elif op == "append":
+                        _replay_append(data, tuple(full_identifiers), *args)
+                except errors.StoredTypeError:
+                    continue
+                count += 1
+    except FileNotFoundError:
+        pass
+
+    return data, count
+
+
+def _replay_append(
+    data: Dict[str, Any],
+    full_identifiers: Tuple[str, ...],
+    value: Any,
+    default: list,
+    new_len: int,
+) -> None:
+    # Unlike the other operations, appending twice isn't the same as appending once.
+    # Since the journal may get replayed on top of a snapshot which already includes
+    # this entry, it's only applied if the list has the length it had before the append.
+    partial = data
+    try:
+        for i in full_identifiers:
+            partial = partial[i]
+    except (KeyError, TypeError):
+        expected_len = len(default)
+    else:
+        expected_len = len(partial) if isinstance(partial, list) else None
+    if expected_len == new_len - 1:
+        _apply_append(data, full_identifiers, value, default)
+
+
+def _drop_partial_tail(path: Path) -> None:
+    # A crash while appending may leave a partially written last entry behind, without
+    # a newline. It's truncated away, as otherwise the next entry would be appended to
+    # the same line, and be lost with it.
+    try:
+        with path.open("rb+") as fs:
+            if fs.seek(0, os.SEEK_END) == 0:
+                return
+            fs.seek(-1, os.SEEK_END)
+            if fs.read(1) == b"\n":
+                return
+            fs.seek(0)
+            content = fs.read()
+            log.warning("Dropping a partially written entry from %s.", path)
+            fs.truncate(content.rfind(b"\n") + 1)
+            fs.flush()
+            os.fsync(fs.fileno())
+    except FileNotFoundError:
+        pass
+
+
+def _append_journal(path: Path, entries: Iterable[List[Any]]) -> None:
+    lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+    with path.open(encoding="utf-8", mode="a") as fs:
+        fs.write(lines)
+        fs.flush()
+        os.fsync(fs.fileno())
+
+
+def _truncate_journal(path: Path) -> None:
+    with path.open(encoding="utf-8", mode="w") as fs:
+        fs.flush()
+        os.fsync(fs.fileno())
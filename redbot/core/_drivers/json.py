@@ -1,16 +1,18 @@
 import asyncio
+import contextlib
 import json
 import logging
 import os
 import pickle
+import time
 import weakref
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple, Union
 from uuid import uuid4
 
 from .. import data_manager, errors
-from .base import BaseDriver, IdentifierData, ConfigCategory
+from .base import BaseDriver, IdentifierData, ConfigCategory, _inc, _toggle
 
 __all__ = ["JsonDriver"]
 
@@ -19,6 +21,19 @@ _shared_datastore = {}
 _driver_counts = {}
 _finalizers = []
 _locks = defaultdict(asyncio.Lock)
+# Write-behind state, only used when a flush interval is configured.
+_dirty_paths: Dict[str, Path] = {}
+_flush_task: Optional[asyncio.Task] = None
+_flush_lock: Optional[asyncio.Lock] = None
+_write_stats = {
+    "saves_requested": 0,
+    "writes": 0,
+    "writes_avoided": 0,
+    "flushes": 0,
+    "last_flush_latency": 0.0,
+    "max_flush_latency": 0.0,
+    "total_flush_latency": 0.0,
+}
 
 log = logging.getLogger("redbot.json_driver")
 
@@ -30,6 +45,10 @@ def finalize_driver(cog_name):
     _driver_counts[cog_name] -= 1
 
     if _driver_counts[cog_name] == 0:
+        if cog_name in _dirty_paths:
+            # Last driver for this cog is gone, there won't be another chance to flush it.
+            _save_json(_dirty_paths.pop(cog_name), _shared_datastore[cog_name])
+            _write_stats["writes"] += 1
         if cog_name in _shared_datastore:
             del _shared_datastore[cog_name]
         if cog_name in _locks:
@@ -52,8 +71,16 @@ class JsonDriver(BaseDriver):
     .. py:attribute:: data_path
 
         The path in which to store the file indicated by :py:attr:`file_name`.
+
+    When the ``write_behind_interval`` storage detail is set to a number of
+    seconds, saves are deferred: a cog's file is marked dirty and written
+    at most once per interval, so that many writes made in a short period
+    of time are coalesced into a single one. Pending writes are flushed on
+    :py:meth:`teardown`.
     """
 
+    _write_behind_interval: Optional[float] = None
+
     def __init__(
         self,
         cog_name: str,
@@ -88,13 +115,73 @@ class JsonDriver(BaseDriver):
 
     @classmethod
     async def initialize(cls, **storage_details) -> None:
-        # No initializing to do
-        return
+        interval = storage_details.get("write_behind_interval")
+        cls._write_behind_interval = float(interval) if interval else None
 
     @classmethod
     async def teardown(cls) -> None:
-        # No tearing down to do
-        return
+        global _flush_task
+        if _flush_task is not None:
+            _flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await _flush_task
+            _flush_task = None
+        await cls.flush()
+
+    @classmethod
+    async def flush(cls) -> None:
+        """Write the data of all cogs with pending changes to disk.
+
+        This is a no-op unless write-behind mode is enabled.
+        """
+        global _flush_lock
+        if _flush_lock is None:
+            _flush_lock = asyncio.Lock()
+        async with _flush_lock:
+            if not _dirty_paths:
+                return
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            for cog_name in list(_dirty_paths):
+                async with _locks[cog_name]:
+                    path = _dirty_paths.pop(cog_name, None)
+                    data = _shared_datastore.get(cog_name)
+                    if path is None or data is None:
+                        continue
+                    try:
+                        await loop.run_in_executor(None, _save_json, path, data)
+                    except Exception:
+                        # Keep it dirty so that the next flush retries.
+                        _dirty_paths.setdefault(cog_name, path)
+                        log.exception("Failed to write data of %s to disk.", cog_name)
+                    else:
+                        _write_stats["writes"] += 1
+            latency = time.perf_counter() - start
+            _write_stats["flushes"] += 1
+            _write_stats["last_flush_latency"] = latency
+            _write_stats["total_flush_latency"] += latency
+            _write_stats["max_flush_latency"] = max(_write_stats["max_flush_latency"], latency)
+
+    @staticmethod
+    def get_write_stats() -> Dict[str, Any]:
+        """Get the write counters of this driver.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Number of saves requested, writes actually made to disk, writes
+            avoided through coalescing, flushes made and flush latencies
+            (in seconds).
+        """
+        return {**_write_stats, "dirty_cogs": len(_dirty_paths)}
+
+    @classmethod
+    async def _flush_later(cls, interval: float) -> None:
+        global _flush_task
+        await asyncio.sleep(interval)
+        _flush_task = None
+        # Shielded, so that teardown can't interrupt a write that's already in progress.
+        await asyncio.shield(cls.flush())
 
     @staticmethod
     def get_config_details() -> Dict[str, Any]:
@@ -132,29 +219,105 @@ class JsonDriver(BaseDriver):
                 break
 
     async def get(self, identifier_data: IdentifierData):
+        return pickle.loads(pickle.dumps(await self.get_readonly(identifier_data), -1))
+
+    async def get_readonly(self, identifier_data: IdentifierData):
         partial = self.data
         full_identifiers = identifier_data.to_tuple()[1:]
         for i in full_identifiers:
             partial = partial[i]
-        return pickle.loads(pickle.dumps(partial, -1))
+        return partial
 
     async def set(self, identifier_data: IdentifierData, value=None):
-        partial = self.data
         full_identifiers = identifier_data.to_tuple()[1:]
         # This is both our deepcopy() and our way of making sure this value is actually JSON
         # serializable.
         value_copy = json.loads(json.dumps(value))
 
         async with self._lock:
-            for i in full_identifiers[:-1]:
-                try:
-                    partial = partial.setdefault(i, {})
-                except AttributeError:
-                    # Tried to set sub-field of non-object
-                    raise errors.CannotSetSubfield
+            self._get_parent(full_identifiers)[full_identifiers[-1]] = value_copy
+            await self._save()
+
+    async def set_many(self, items: Iterable[Tuple[IdentifierData, Any]]):
+        to_set = [
+            (identifier_data.to_tuple()[1:], json.loads(json.dumps(value)))
+            for identifier_data, value in items
+        ]
+
+        async with self._lock:
+            for full_identifiers, value_copy in to_set:
+                self._get_parent(full_identifiers)[full_identifiers[-1]] = value_copy
+            await self._save()
+
+    async def inc(
+        self, identifier_data: IdentifierData, value: Union[int, float], default: Union[int, float]
+    ) -> Union[int, float]:
+        return await self._update(identifier_data, default, lambda current: _inc(current, value))
+
+    async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
+        return await self._update(identifier_data, default, _toggle)
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        full_identifiers = identifier_data.to_tuple()[1:]
+        value_copy = json.loads(json.dumps(value))
+
+        async with self._lock:
+            parent = self._get_parent(full_identifiers)
+            try:
+                current = parent[full_identifiers[-1]]
+            except KeyError:
+                current = parent[full_identifiers[-1]] = json.loads(json.dumps(default))
+            if not isinstance(current, list):
+                raise errors.StoredTypeError(f"Cannot append to non-list value {current!r}")
+            # Appending in place spares us from copying the whole list.
+            current.append(value_copy)
+            await self._save()
+            return len(current)
 
-            partial[full_identifiers[-1]] = value_copy
+    async def _update(self, identifier_data: IdentifierData, default, func):
+        full_identifiers = identifier_data.to_tuple()[1:]
+        async with self._lock:
+            parent = self._get_parent(full_identifiers)
+            result = func(parent.get(full_identifiers[-1], default))
+            parent[full_identifiers[-1]] = result
             await self._save()
+        return result
+
+    def _get_parent(self, full_identifiers: Tuple[str, ...]) -> Dict[str, Any]:
+        # Must be called with the lock held.
+        partial = self.data
+        for i in full_identifiers[:-1]:
+            try:
+                partial = partial.setdefault(i, {})
+            except AttributeError:
+                # Tried to set sub-field of non-object
+                raise errors.CannotSetSubfield
+        if not isinstance(partial, dict):
+            raise errors.CannotSetSubfield
+        return partial
+
+    async def apply_batch(self, operations: Iterable[Tuple[str, IdentifierData, Any]]):
+        to_apply = [
+            (op, identifier_data.to_tuple()[1:], json.loads(json.dumps(value)))
+            for op, identifier_data, value in operations
+        ]
+
+        async with self._lock:
+            try:
+                # Nothing here yields to the event loop, so no one can see a partial batch.
+                for op, full_identifiers, value_copy in to_apply:
+                    if op == "set":
+                        self._get_parent(full_identifiers)[full_identifiers[-1]] = value_copy
+                    else:
+                        partial = self.data
+                        try:
+                            for i in full_identifiers[:-1]:
+                                partial = partial[i]
+                            del partial[full_identifiers[-1]]
+                        except (KeyError, TypeError):
+                            pass
+            finally:
+                await self._save()
 
     async def clear(self, identifier_data: IdentifierData):
         partial = self.data
@@ -175,6 +338,8 @@ class JsonDriver(BaseDriver):
 
     @classmethod
     async def aiter_cogs(cls) -> AsyncIterator[Tuple[str, str]]:
+        # Make sure that what's on disk is up-to-date before reading it.
+        await cls.flush()
         yield "Core", "0"
         for _dir in data_manager.cog_data_path().iterdir():
             fpath = _dir / "settings.json"
@@ -217,8 +382,20 @@ class JsonDriver(BaseDriver):
             await self._save()
 
     async def _save(self) -> None:
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, _save_json, self.data_path, self.data)
+        global _flush_task
+        _write_stats["saves_requested"] += 1
+        if self._write_behind_interval is None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _save_json, self.data_path, self.data)
+            _write_stats["writes"] += 1
+            return
+
+        if self.cog_name in _dirty_paths:
+            _write_stats["writes_avoided"] += 1
+        else:
+            _dirty_paths[self.cog_name] = self.data_path
+        if _flush_task is None or _flush_task.done():
+            _flush_task = asyncio.create_task(self._flush_later(self._write_behind_interval))
 
 
 def _save_json(path: Path, data: Dict[str, Any]) -> None:
@@ -535,6 +535,17 @@ $$;
 
 
 CREATE OR REPLACE FUNCTION
+  /*
+   * Extend an array within a document.
+   *
+   * `new_value` and `default_value` are JSON arrays. If the array doesn't
+   * already exist, it is inserted as `default_value` extended by
+   * `new_value`. When `max_length` is given, items are popped from the
+   * other end until the array fits.
+   *
+   * Raises 'wrong_object_type' error when trying to extend a non-array
+   * value.
+   */
   red_config.extend(
     id_data red_config.identifier_data,
     new_value text,
@@ -566,17 +577,18 @@ CREATE OR REPLACE FUNCTION
 
     PERFORM red_config.maybe_create_table(id_data);
 
-    -- Look for the existing document
+    -- Look for the existing document, locking it so that concurrent calls don't
+    -- overwrite each other's items
     EXECUTE format(
-      'SELECT json_data FROM %I.%I WHERE %s',
+      'SELECT json_data FROM %I.%I WHERE %s FOR UPDATE',
       schemaname,
       id_data.category,
       whereclause)
     INTO existing_document USING id_data.pkeys;
 
     IF existing_document IS NULL THEN
-      result := default_value || new_value;
-      new_document := red_utils.jsonb_set2('{}'::jsonb, result, id_data.identifiers);
+      result := default_value::jsonb || new_value::jsonb;
+      new_document := red_utils.jsonb_set2('{}', result, VARIADIC id_data.identifiers);
       pkey_placeholders := red_utils.gen_pkey_placeholders(id_data.pkey_len, pkey_type);
 
       EXECUTE format(
@@ -590,7 +602,7 @@ CREATE OR REPLACE FUNCTION
       existing_value := existing_document #> id_data.identifiers;
 
       IF existing_value IS NULL THEN
-        existing_value := default_value;
+        existing_value := default_value::jsonb;
 
       ELSIF jsonb_typeof(existing_value) != 'array' THEN
         RAISE EXCEPTION 'Cannot append to non-array value %', existing_value
@@ -599,9 +611,9 @@ CREATE OR REPLACE FUNCTION
 
       CASE extend_left
         WHEN TRUE THEN
-          result := new_value || existing_value;
+          result := new_value::jsonb || existing_value;
         ELSE
-          result := existing_value || new_value;
+          result := existing_value || new_value::jsonb;
         END CASE;
 
       IF max_length IS NOT NULL THEN
@@ -610,7 +622,8 @@ CREATE OR REPLACE FUNCTION
         END LOOP;
       END IF;
 
-      new_document := red_utils.jsonb_set2(existing_document, result, id_data.identifiers);
+      new_document := red_utils.jsonb_set2(
+        existing_document, result, VARIADIC id_data.identifiers);
 
       EXECUTE format(
         'UPDATE %I.%I SET json_data = $2 WHERE %s',
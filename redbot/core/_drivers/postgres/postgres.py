@@ -2,7 +2,7 @@ import getpass
 import json
 import sys
 from pathlib import Path
-from typing import Optional, Any, AsyncIterator, Tuple, Union, Callable, List
+from typing import Optional, Any, AsyncIterator, Tuple, Union, Callable, List, Iterable
 
 try:
     # pylint: disable=import-error
@@ -158,6 +158,48 @@ class PostgresDriver(BaseDriver):
         except asyncpg.ErrorInAssignmentError:
             raise errors.CannotSetSubfield
 
+    async def set_many(self, items: Iterable[Tuple[IdentifierData, Any]]):
+        args = [(encode_identifier_data(i), json.dumps(v)) for i, v in items]
+        log.invisible("Query: SELECT red_config.set($1, $2::jsonb) (%s times)", len(args))
+        try:
+            async with self._pool.acquire() as conn, conn.transaction():
+                await conn.executemany("SELECT red_config.set($1, $2::jsonb)", args)
+        except asyncpg.ErrorInAssignmentError:
+            raise errors.CannotSetSubfield
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        try:
+            return await self._execute(
+                "SELECT jsonb_array_length(red_config.extend($1, $2, $3))",
+                encode_identifier_data(identifier_data),
+                json.dumps([value]),
+                json.dumps(default),
+                method=self._pool.fetchval,
+            )
+        except asyncpg.WrongObjectTypeError as exc:
+            raise errors.StoredTypeError(*exc.args)
+        except asyncpg.ErrorInAssignmentError:
+            raise errors.CannotSetSubfield
+
+    async def apply_batch(self, operations: Iterable[Tuple[str, IdentifierData, Any]]):
+        operations = list(operations)
+        log.invisible("Query: batch of %s operations", len(operations))
+        try:
+            async with self._pool.acquire() as conn, conn.transaction():
+                for op, identifier_data, value in operations:
+                    if op == "set":
+                        await conn.execute(
+                            "SELECT red_config.set($1, $2::jsonb)",
+                            encode_identifier_data(identifier_data),
+                            json.dumps(value),
+                        )
+                    else:
+                        await conn.execute(
+                            "SELECT red_config.clear($1)", encode_identifier_data(identifier_data)
+                        )
+        except asyncpg.ErrorInAssignmentError:
+            raise errors.CannotSetSubfield
+
     async def clear(self, identifier_data: IdentifierData):
         await self._execute("SELECT red_config.clear($1)", encode_identifier_data(identifier_data))
 
@@ -178,7 +220,7 @@ class PostgresDriver(BaseDriver):
     async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
         try:
             return await self._execute(
-                "SELECT red_config.inc($1, $2)",
+                "SELECT red_config.toggle($1, $2)",
                 encode_identifier_data(identifier_data),
                 default,
                 method=self._pool.fetchval,
@@ -0,0 +1,415 @@
+import asyncio
+import concurrent.futures
+import json
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .. import data_manager, errors
+from ..utils.dbtools import APSWConnectionWrapper
+from .base import BaseDriver, IdentifierData, _append, _inc, _toggle
+from .log import log
+
+__all__ = ["SQLiteDriver"]
+
+DATABASE_FILE_NAME = "config.sqlite3"
+
+_PRAGMAS = (
+    "PRAGMA journal_mode = wal;",
+    "PRAGMA synchronous = normal;",
+    "PRAGMA temp_store = 2;",
+)
+
+# Every row is a single document - the data stored under a full primary key.
+# Primary keys are stored as a JSON array, which lets a partial primary key be looked up
+# as a range scan on the table's own index (see `_pkeys_range()`).
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS red_config (
+    cog_name TEXT NOT NULL,
+    cog_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    pkeys TEXT NOT NULL,
+    json_data TEXT NOT NULL,
+    PRIMARY KEY (cog_name, cog_id, category, pkeys)
+) WITHOUT ROWID;
+"""
+
+_SELECT_DOCUMENT = """
+SELECT json_data FROM red_config
+WHERE cog_name = ? AND cog_id = ? AND category = ? AND pkeys = ?;
+"""
+_SELECT_DOCUMENTS = """
+SELECT pkeys, json_data FROM red_config
+WHERE cog_name = ? AND cog_id = ? AND category = ? AND pkeys >= ? AND pkeys < ?;
+"""
+_SELECT_CATEGORY = """
+SELECT pkeys, json_data FROM red_config
+WHERE cog_name = ? AND cog_id = ? AND category = ?;
+"""
+_SELECT_COG = """
+SELECT category, pkeys, json_data FROM red_config
+WHERE cog_name = ? AND cog_id = ?;
+"""
+_SELECT_COGS = "SELECT DISTINCT cog_name, cog_id FROM red_config;"
+_UPSERT_DOCUMENT = """
+INSERT OR REPLACE INTO red_config (cog_name, cog_id, category, pkeys, json_data)
+VALUES (?, ?, ?, ?, ?);
+"""
+_DELETE_DOCUMENT = """
+DELETE FROM red_config
+WHERE cog_name = ? AND cog_id = ? AND category = ? AND pkeys = ?;
+"""
+_DELETE_DOCUMENTS = """
+DELETE FROM red_config
+WHERE cog_name = ? AND cog_id = ? AND category = ? AND pkeys >= ? AND pkeys < ?;
+"""
+_DELETE_CATEGORY = "DELETE FROM red_config WHERE cog_name = ? AND cog_id = ? AND category = ?;"
+_DELETE_COG = "DELETE FROM red_config WHERE cog_name = ? AND cog_id = ?;"
+_DROP_TABLE = "DROP TABLE IF EXISTS red_config;"
+
+
+class SQLiteDriver(BaseDriver):
+    """
+    Subclass of :py:class:`.BaseDriver`.
+
+    Stores data in an embedded SQLite database, with one row per document
+    (i.e. per full primary key), much like the PostgreSQL driver does. Reads
+    and writes only touch the rows under the requested path.
+
+    The database runs in WAL mode. All writes are made by a single writer
+    thread while reads are made on a separate connection, so that neither
+    of them blocks the event loop or each other.
+    """
+
+    _db_path: Optional[Path] = None
+    _write_conn: Optional[APSWConnectionWrapper] = None
+    _read_conn: Optional[APSWConnectionWrapper] = None
+    _writer: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    _reader: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    @classmethod
+    async def initialize(cls, **storage_details) -> None:
+        path = storage_details.get("path")
+        cls._db_path = Path(path) if path else data_manager.core_data_path() / DATABASE_FILE_NAME
+        cls._writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="red_config_writer"
+        )
+        cls._reader = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="red_config_reader"
+        )
+        cls._write_conn = APSWConnectionWrapper(cls._db_path)
+        with cls._write_conn.with_cursor() as cursor:
+            for pragma in _PRAGMAS:
+                cursor.execute(pragma)
+            cursor.execute(_CREATE_TABLE)
+        cls._read_conn = APSWConnectionWrapper(cls._db_path)
+        with cls._read_conn.with_cursor() as cursor:
+            cursor.execute("PRAGMA temp_store = 2;")
+
+    @classmethod
+    async def teardown(cls) -> None:
+        loop = asyncio.get_running_loop()
+        for executor in (cls._writer, cls._reader):
+            if executor is not None:
+                await loop.run_in_executor(None, executor.shutdown)
+        for conn in (cls._write_conn, cls._read_conn):
+            if conn is not None:
+                conn.close()
+        cls._writer = cls._reader = cls._write_conn = cls._read_conn = None
+
+    @staticmethod
+    def get_config_details() -> Dict[str, Any]:
+        # The database is stored in the instance's data path.
+        return {}
+
+    async def get(self, identifier_data: IdentifierData):
+        return await self._read(_get, identifier_data)
+
+    async def set(self, identifier_data: IdentifierData, value=None):
+        await self._write(_set, identifier_data, value)
+
+    async def set_many(self, items: Iterable[Tuple[IdentifierData, Any]]):
+        await self._write(_set_many, list(items))
+
+    async def inc(
+        self, identifier_data: IdentifierData, value: Union[int, float], default: Union[int, float]
+    ) -> Union[int, float]:
+        return await self._write(
+            _update, identifier_data, default, lambda current: _inc(current, value)
+        )
+
+    async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
+        return await self._write(_update, identifier_data, default, _toggle)
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        new_list = await self._write(
+            _update, identifier_data, default, lambda current: _append(current, value)
+        )
+        return len(new_list)
+
+    async def apply_batch(self, operations: Iterable[Tuple[str, IdentifierData, Any]]):
+        await self._write(_apply_batch, list(operations))
+
+    async def clear(self, identifier_data: IdentifierData):
+        await self._write(_clear, identifier_data)
+
+    @classmethod
+    async def aiter_cogs(cls) -> AsyncIterator[Tuple[str, str]]:
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(cls._reader, _fetchall, cls._read_conn, _SELECT_COGS)
+        for cog_name, cog_id in rows:
+            yield cog_name, cog_id
+
+    async def import_data(self, cog_data, custom_group_data):
+        rows = []
+        for category, all_data in cog_data:
+            splitted_pkey = self._split_primary_key(category, custom_group_data, all_data)
+            for pkey, data in splitted_pkey:
+                rows.append(
+                    (
+                        self.cog_name,
+                        self.unique_cog_identifier,
+                        category,
+                        _encode_pkeys(pkey),
+                        json.dumps(data),
+                    )
+                )
+        await self._write(_upsert_many, rows)
+
+    @classmethod
+    async def delete_all_data(cls, **kwargs) -> None:
+        """Delete all data being stored by this driver.
+
+        The table storing bot data will be dropped.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(cls._writer, _execute, cls._write_conn, _DROP_TABLE)
+
+    async def _read(self, func, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, func, self._read_conn, *args)
+
+    async def _write(self, func, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, func, self._write_conn, *args)
+
+
+def _encode_pkeys(pkeys: Tuple[str, ...]) -> str:
+    return json.dumps(list(pkeys), separators=(",", ":"))
+
+
+def _pkeys_range(pkeys: Tuple[str, ...]) -> Tuple[str, str]:
+    """Get the bounds of encoded primary keys which start with the given partial key."""
+    # '["1","2"]' -> '["1","2",' which every longer key starting with "1", "2" begins with.
+    # The upper bound is the same prefix with its last character incremented.
+    lower = _encode_pkeys(pkeys)[:-1]
+    if pkeys:
+        lower += ","
+    upper = lower[:-1] + chr(ord(lower[-1]) + 1)
+    return lower, upper
+
+
+def _nest(target: Dict[str, Any], keys: Tuple[str, ...], value: Any) -> None:
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def _flatten(
+    value: Any, levels: int, parent: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    if levels == 0:
+        yield parent, value
+    elif isinstance(value, dict):
+        for key, inner in value.items():
+            yield from _flatten(inner, levels - 1, parent + (key,))
+
+
+def _scope_args(id_data: IdentifierData) -> Tuple[str, str, str]:
+    return id_data.cog_name, id_data.uuid, id_data.category
+
+
+def _is_document(id_data: IdentifierData) -> bool:
+    return len(id_data.primary_key) >= id_data.primary_key_len
+
+
+def _fetchall(conn: APSWConnectionWrapper, query: str, *args) -> List[Tuple[Any, ...]]:
+    log.invisible("Query: %s", query)
+    with conn.with_cursor() as cursor:
+        return cursor.execute(query, args).fetchall()
+
+
+def _execute(conn: APSWConnectionWrapper, query: str, *args) -> None:
+    log.invisible("Query: %s", query)
+    with conn.with_cursor() as cursor:
+        cursor.execute(query, args)
+
+
+def _get(conn: APSWConnectionWrapper, id_data: IdentifierData) -> Any:
+    if not id_data.category:
+        rows = _fetchall(conn, _SELECT_COG, id_data.cog_name, id_data.uuid)
+        if not rows:
+            raise KeyError
+        ret = {}
+        for category, pkeys, json_data in rows:
+            _nest(ret, (category, *json.loads(pkeys)), json.loads(json_data))
+        return ret
+
+    if _is_document(id_data):
+        rows = _fetchall(
+            conn, _SELECT_DOCUMENT, *_scope_args(id_data), _encode_pkeys(id_data.primary_key)
+        )
+        if not rows:
+            raise KeyError
+        partial = json.loads(rows[0][0])
+        try:
+            for i in id_data.identifiers:
+                partial = partial[i]
+        except TypeError:
+            raise KeyError from None
+        return partial
+
+    if id_data.primary_key:
+        rows = _fetchall(
+            conn, _SELECT_DOCUMENTS, *_scope_args(id_data), *_pkeys_range(id_data.primary_key)
+        )
+    else:
+        rows = _fetchall(conn, _SELECT_CATEGORY, *_scope_args(id_data))
+    if not rows:
+        raise KeyError
+    ret = {}
+    num_pkeys = len(id_data.primary_key)
+    for pkeys, json_data in rows:
+        _nest(ret, tuple(json.loads(pkeys)[num_pkeys:]), json.loads(json_data))
+    return ret
+
+
+def _get_parent(document: Any, identifiers: Tuple[str, ...]) -> Dict[str, Any]:
+    partial = document
+    for i in identifiers[:-1]:
+        try:
+            partial = partial.setdefault(i, {})
+        except AttributeError:
+            # Tried to set sub-field of non-object
+            raise errors.CannotSetSubfield
+    if not isinstance(partial, dict):
+        raise errors.CannotSetSubfield
+    return partial
+
+
+def _set(conn: APSWConnectionWrapper, id_data: IdentifierData, value: Any) -> None:
+    with conn.transaction() as cursor:
+        _set_in_transaction(cursor, id_data, value)
+
+
+def _set_many(conn: APSWConnectionWrapper, items: List[Tuple[IdentifierData, Any]]) -> None:
+    with conn.transaction() as cursor:
+        for id_data, value in items:
+            _set_in_transaction(cursor, id_data, value)
+
+
+def _set_in_transaction(cursor, id_data: IdentifierData, value: Any) -> None:
+    scope = _scope_args(id_data)
+    if _is_document(id_data):
+        pkeys = _encode_pkeys(id_data.primary_key)
+        if id_data.identifiers:
+            row = cursor.execute(_SELECT_DOCUMENT, (*scope, pkeys)).fetchone()
+            document = json.loads(row[0]) if row is not None else {}
+            _get_parent(document, id_data.identifiers)[id_data.identifiers[-1]] = value
+        else:
+            document = value
+        cursor.execute(_UPSERT_DOCUMENT, (*scope, pkeys, json.dumps(document)))
+    else:
+        # Setting multiple documents, replacing any which are already there.
+        if id_data.primary_key:
+            cursor.execute(_DELETE_DOCUMENTS, (*scope, *_pkeys_range(id_data.primary_key)))
+        else:
+            cursor.execute(_DELETE_CATEGORY, scope)
+        num_missing_pkeys = id_data.primary_key_len - len(id_data.primary_key)
+        cursor.executemany(
+            _UPSERT_DOCUMENT,
+            [
+                (*scope, _encode_pkeys(id_data.primary_key + pkeys), json.dumps(document))
+                for pkeys, document in _flatten(value, num_missing_pkeys)
+            ],
+        )
+
+
+def _update(
+    conn: APSWConnectionWrapper, id_data: IdentifierData, default: Any, func: Callable[[Any], Any]
+) -> Any:
+    """Replace the value at the given path with ``func(current_value)``, atomically."""
+    if not _is_document(id_data):
+        raise errors.StoredTypeError("Cannot update multiple documents at once")
+    scope = _scope_args(id_data)
+    pkeys = _encode_pkeys(id_data.primary_key)
+    with conn.transaction() as cursor:
+        row = cursor.execute(_SELECT_DOCUMENT, (*scope, pkeys)).fetchone()
+        if id_data.identifiers:
+            document = json.loads(row[0]) if row is not None else {}
+            parent = _get_parent(document, id_data.identifiers)
+            result = parent[id_data.identifiers[-1]] = func(
+                parent.get(id_data.identifiers[-1], default)
+            )
+        else:
+            result = document = func(json.loads(row[0]) if row is not None else default)
+        cursor.execute(_UPSERT_DOCUMENT, (*scope, pkeys, json.dumps(document)))
+    return result
+
+
+def _clear(conn: APSWConnectionWrapper, id_data: IdentifierData) -> None:
+    with conn.transaction() as cursor:
+        _clear_in_transaction(cursor, id_data)
+
+
+def _clear_in_transaction(cursor, id_data: IdentifierData) -> None:
+    scope = _scope_args(id_data)
+    if not id_data.category:
+        cursor.execute(_DELETE_COG, (id_data.cog_name, id_data.uuid))
+    elif id_data.identifiers:
+        # Popping a key from a document or nested document.
+        pkeys = _encode_pkeys(id_data.primary_key)
+        row = cursor.execute(_SELECT_DOCUMENT, (*scope, pkeys)).fetchone()
+        if row is None:
+            return
+        document = json.loads(row[0])
+        partial = document
+        try:
+            for i in id_data.identifiers[:-1]:
+                partial = partial[i]
+            del partial[id_data.identifiers[-1]]
+        except (KeyError, TypeError):
+            return
+        cursor.execute(_UPSERT_DOCUMENT, (*scope, pkeys, json.dumps(document)))
+    elif _is_document(id_data):
+        cursor.execute(_DELETE_DOCUMENT, (*scope, _encode_pkeys(id_data.primary_key)))
+    elif id_data.primary_key:
+        cursor.execute(_DELETE_DOCUMENTS, (*scope, *_pkeys_range(id_data.primary_key)))
+    else:
+        cursor.execute(_DELETE_CATEGORY, scope)
+
+
+def _apply_batch(
+    conn: APSWConnectionWrapper, operations: List[Tuple[str, IdentifierData, Any]]
+) -> None:
+    with conn.transaction() as cursor:
+        for op, id_data, value in operations:
+            if op == "set":
+                _set_in_transaction(cursor, id_data, value)
+            else:
+                _clear_in_transaction(cursor, id_data)
+
+
+def _upsert_many(conn: APSWConnectionWrapper, rows: List[Tuple[str, str, str, str, str]]) -> None:
+    with conn.transaction() as cursor:
+        cursor.executemany(_UPSERT_DOCUMENT, rows)
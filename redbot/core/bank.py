@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
 from datetime import datetime, timezone
 from typing import Union, List, Optional, TYPE_CHECKING, Literal
@@ -89,6 +90,8 @@ async def _init():
     _config.register_guild(**_DEFAULT_GUILD)
     _config.register_member(**_DEFAULT_MEMBER)
     _config.register_user(**_DEFAULT_USER)
+    _config.register_index("balance", scope=Config.MEMBER)
+    _config.register_index("balance", scope=Config.USER)
     await _migrate_config()
 
 
@@ -588,6 +591,12 @@ async def get_leaderboard(positions: int = None, guild: discord.Guild = None) ->
 
     """
     if await is_global():
+        if positions is not None:
+            ranked = await _config.index("balance", scope=_config.USER).ranked()
+            if guild is not None:
+                ranked = (acc for acc in ranked if guild.get_member(acc[0]))
+            user_ids = [user_id for user_id, _balance in itertools.islice(ranked, positions)]
+            return [(user_id, await _config.user_from_id(user_id).all()) for user_id in user_ids]
         raw_accounts = await _config.all_users()
         if guild is not None:
             tmp = raw_accounts.copy()
@@ -597,12 +606,16 @@ async def get_leaderboard(positions: int = None, guild: discord.Guild = None) ->
     else:
         if guild is None:
             raise TypeError("Expected a guild, got NoneType object instead!")
+        if positions is not None:
+            ranked = await _config.index("balance", scope=_config.MEMBER).ranked(guild.id)
+            member_ids = [member_id for member_id, _balance in itertools.islice(ranked, positions)]
+            return [
+                (member_id, await _config.member_from_ids(guild.id, member_id).all())
+                for member_id in member_ids
+            ]
         raw_accounts = await _config.all_members(guild)
     sorted_acc = sorted(raw_accounts.items(), key=lambda x: x[1]["balance"], reverse=True)
-    if positions is None:
-        return sorted_acc
-    else:
-        return sorted_acc[:positions]
+    return sorted_acc
 
 
 async def get_leaderboard_position(
@@ -628,19 +641,11 @@ async def get_leaderboard_position(
 
     """
     if await is_global():
-        guild = None
-    else:
-        guild = member.guild if hasattr(member, "guild") else None
-    try:
-        leaderboard = await get_leaderboard(None, guild)
-    except TypeError:
-        raise
-    else:
-        pos = discord.utils.find(lambda x: x[1][0] == member.id, enumerate(leaderboard, 1))
-        if pos is None:
-            return None
-        else:
-            return pos[0]
+        return await _config.index("balance", scope=_config.USER).rank(member.id)
+    guild = member.guild if hasattr(member, "guild") else None
+    if guild is None:
+        raise TypeError("Expected a guild, got NoneType object instead!")
+    return await _config.index("balance", scope=_config.MEMBER).rank(guild.id, member.id)
 
 
 async def get_account(member: Union[discord.Member, discord.User]) -> Account:
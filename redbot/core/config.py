@@ -1,8 +1,11 @@
 import asyncio
+import bisect
 import collections.abc
+import contextvars
 import json
 import logging
 import pickle
+import time
 import weakref
 from typing import (
     Any,
@@ -10,6 +13,8 @@ from typing import (
     Awaitable,
     Dict,
     Generator,
+    Iterator,
+    List,
     MutableMapping,
     Optional,
     Tuple,
@@ -21,6 +26,8 @@ from typing import (
 import discord
 
 from ._drivers import BaseDriver, ConfigCategory, IdentifierData, get_driver
+from ._drivers.base import _append, _inc, _toggle
+from ._config_profiler import profiler as _profiler
 
 __all__ = (
     "ConfigCategory",
@@ -28,6 +35,7 @@ __all__ = (
     "Value",
     "Group",
     "Config",
+    "ConfigIndex",
 )
 
 log = logging.getLogger("red.config")
@@ -96,13 +104,27 @@ class _ValueCtxManager(Awaitable[_T], AsyncContextManager[_T]):  # pylint: disab
         self.__original_value = None
         self.__acquire_lock = acquire_lock
         self.__lock = self.value_obj.get_lock()
+        self.__locked = False
+        self.__batch: Optional[_ConfigBatch] = None
 
     def __await__(self) -> Generator[Any, None, _T]:
         return self.coro.__await__()
 
     async def __aenter__(self) -> _T:
-        if self.__acquire_lock is True:
-            await self.__lock.acquire()
+        self.__batch = _get_active_batch(self.value_obj._base_driver)
+        if self.__batch is not None and self.__batch.holds_lock(self.__lock):
+            # The lock is already held until the batch is committed.
+            pass
+        elif self.__acquire_lock is True:
+            self.__locked = True
+            if _profiler.enabled:
+                start = time.perf_counter()
+                await self.__lock.acquire()
+                _profiler.record_lock_wait(
+                    self.value_obj.identifier_data, time.perf_counter() - start
+                )
+            else:
+                await self.__lock.acquire()
         self.raw_value = await self
         if not isinstance(self.raw_value, (list, dict)):
             raise TypeError(
@@ -122,8 +144,518 @@ class _ValueCtxManager(Awaitable[_T], AsyncContextManager[_T]):  # pylint: disab
             if raw_value != self.__original_value:
                 await self.value_obj.set(self.raw_value)
         finally:
-            if self.__acquire_lock is True:
-                self.__lock.release()
+            if self.__locked:
+                if self.__batch is not None and self.__batch.active:
+                    # The write isn't stored until the batch is committed, so keep other
+                    # tasks from reading and modifying the value until then.
+                    self.__batch.hold_lock(self.__lock)
+                else:
+                    self.__lock.release()
+
+
+_MISSING = object()
+
+#: How many times a partition of a `ConfigIndex` is read before giving up on getting a
+#: consistent snapshot of it.
+_INDEX_LOAD_ATTEMPTS = 3
+
+# Maps drivers to the batches active in the current context.
+_active_batches: contextvars.ContextVar[Dict[BaseDriver, "_ConfigBatch"]] = contextvars.ContextVar(
+    "_active_batches", default={}
+)
+
+
+def _get_active_batch(driver: BaseDriver) -> Optional["_ConfigBatch"]:
+    batch = _active_batches.get().get(driver)
+    # Tasks spawned within a batch inherit it, and may outlive it.
+    if batch is not None and batch.active:
+        return batch
+    return None
+
+
+class _ConfigBatch(AsyncContextManager[None]):
+    """Context manager implementation of `Config.batch`.
+
+    Within the context, this object stands in for the config's driver:
+    sets and clears are buffered and reads see the buffered writes layered
+    over the stored data. On a clean exit, all of the buffered writes are
+    committed with a single call to the driver's ``apply_batch``; if the
+    body raises, they are discarded.
+
+    Since the context is tracked with a `contextvars.ContextVar`, only the
+    task which entered the batch (and tasks spawned from it) write into it.
+    Tasks spawned from it which write after it exits write to the driver
+    directly.
+
+    Value locks acquired with `Value.__call__`'s context manager within the
+    batch are held until the batch is committed.
+    """
+
+    def __init__(self, driver: BaseDriver):
+        self.driver = driver
+        self.operations: List[Tuple[str, IdentifierData, Any]] = []
+        self._paths: List[Tuple[str, ...]] = []
+        self._depth = 0
+        self._token = None
+        self._locks: List[asyncio.Lock] = []
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def holds_lock(self, lock: asyncio.Lock) -> bool:
+        return any(held is lock for held in self._locks)
+
+    def hold_lock(self, lock: asyncio.Lock) -> None:
+        """Keep an acquired lock until the batch is committed, then release it."""
+        self._locks.append(lock)
+
+    async def __aenter__(self) -> None:
+        if self._depth == 0:
+            self._token = _active_batches.set({**_active_batches.get(), self.driver: self})
+        self._depth += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth > 0:
+            # Nested batches are committed with the outermost one.
+            return
+        _active_batches.reset(self._token)
+        operations, locks = self.operations, self._locks
+        self.operations, self._paths, self._locks = [], [], []
+        try:
+            if exc_type is None and operations:
+                await self.driver.apply_batch(operations)
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.driver, item)
+
+    def _buffer(self, op: str, identifier_data: IdentifierData, value: Any = None) -> None:
+        self.operations.append((op, identifier_data, value))
+        self._paths.append(identifier_data.to_tuple())
+
+    async def get(self, identifier_data: IdentifierData) -> Any:
+        path = identifier_data.to_tuple()
+        relevant = [
+            (op, op_path, value)
+            for (op, _, value), op_path in zip(self.operations, self._paths)
+            if op_path[: len(path)] == path or path[: len(op_path)] == op_path
+        ]
+        if not relevant:
+            return await self.driver.get(identifier_data)
+
+        try:
+            result = await self.driver.get(identifier_data)
+        except KeyError:
+            result = _MISSING
+        for op, op_path, value in relevant:
+            if len(op_path) <= len(path):
+                # The operation replaced or removed this value or one of its parents.
+                result = _MISSING
+                if op == "clear":
+                    continue
+                for key in path[len(op_path) :]:
+                    if not isinstance(value, dict) or key not in value:
+                        break
+                    value = value[key]
+                else:
+                    result = pickle.loads(pickle.dumps(value, -1))
+                continue
+
+            # The operation touched something nested within this value.
+            *parents, last = op_path[len(path) :]
+            if op == "set":
+                if not isinstance(result, dict):
+                    result = {}
+                partial = result
+                for key in parents:
+                    if not isinstance(partial.get(key), dict):
+                        partial[key] = {}
+                    partial = partial[key]
+                partial[last] = pickle.loads(pickle.dumps(value, -1))
+            else:
+                partial = result
+                try:
+                    for key in parents:
+                        partial = partial[key]
+                    del partial[last]
+                except (KeyError, TypeError):
+                    pass
+        if result is _MISSING:
+            raise KeyError(path)
+        return result
+
+    get_readonly = get
+
+    async def set(self, identifier_data: IdentifierData, value=None):
+        # This is both our deepcopy() and our way of making sure this value is actually JSON
+        # serializable.
+        self._buffer("set", identifier_data, json.loads(json.dumps(value)))
+
+    async def set_many(self, items):
+        for identifier_data, value in items:
+            await self.set(identifier_data, value)
+
+    async def clear(self, identifier_data: IdentifierData):
+        self._buffer("clear", identifier_data)
+
+    async def inc(self, identifier_data: IdentifierData, value, default):
+        return await self._update(identifier_data, default, lambda current: _inc(current, value))
+
+    async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
+        return await self._update(identifier_data, default, _toggle)
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        new_list = await self._update(
+            identifier_data, default, lambda current: _append(current, value)
+        )
+        return len(new_list)
+
+    async def _update(self, identifier_data: IdentifierData, default, func):
+        try:
+            current = await self.get(identifier_data)
+        except KeyError:
+            current = default
+        result = func(current)
+        await self.set(identifier_data, result)
+        return result
+
+
+class _IndexPartition:
+    """The sorted entries of one partition of a `ConfigIndex`, e.g. one guild's members."""
+
+    __slots__ = ("values", "order")
+
+    def __init__(self, values: Dict[str, Any]):
+        self.values = values
+        self.order = sorted((value, key) for key, value in values.items())
+
+    def update(self, key: str, value: Any = _MISSING) -> None:
+        old = self.values.pop(key, _MISSING)
+        if old is not _MISSING:
+            del self.order[bisect.bisect_left(self.order, (old, key))]
+        if value is not _MISSING:
+            self.values[key] = value
+            bisect.insort(self.order, (value, key))
+
+
+class ConfigIndex:
+    """A sorted index of one attribute of a config scope.
+
+    Instances of this class should not be created directly - register
+    them with `Config.register_index` and retrieve them with
+    `Config.index`.
+
+    The index is built from the stored data the first time it's queried
+    (for each partition, e.g. for each guild of a member-scoped index),
+    and is then kept up to date on each write made through the config.
+    Only documents which are stored are indexed, and only numeric values
+    are indexed - documents whose value isn't a number are left out.
+    """
+
+    def __init__(self, config: "Config", attribute: str, scope: str):
+        self.attribute = attribute
+        self.scope = scope
+        self._config = config
+        self._partitions: Dict[Tuple[str, ...], _IndexPartition] = {}
+        # Partition being read -> [number of readers, number of writes to it since]
+        self._loading: Dict[Tuple[str, ...], List[int]] = {}
+
+    @property
+    def _pkey_len(self) -> int:
+        return ConfigCategory.get_pkey_info(self.scope, self._config.custom_groups)[0]
+
+    def _convert_key(self, key: str) -> Union[int, str]:
+        return key if self.scope in self._config.custom_groups else int(key)
+
+    def _default(self) -> Any:
+        return self._config._defaults.get(self.scope, {}).get(self.attribute)
+
+    def _value_of(self, document: Any) -> Any:
+        if not isinstance(document, collections.abc.Mapping):
+            return _MISSING
+        value = document.get(self.attribute, self._default())
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return _MISSING
+        return value
+
+    async def _get_partition(self, partition: Tuple[str, ...]) -> _IndexPartition:
+        ret = self._partitions.get(partition)
+        if ret is not None:
+            return ret
+        driver: _IndexingDriver = self._config._base_driver
+        group = self._config._get_base_group(self.scope, *partition)
+        loading = self._loading.setdefault(partition, [0, 0])
+        loading[0] += 1
+        try:
+            for _attempt in range(_INDEX_LOAD_ATTEMPTS):
+                writes = loading[1]
+                try:
+                    raw = await driver.get_readonly(group.identifier_data)
+                except KeyError:
+                    raw = {}
+                if writes == loading[1]:
+                    # The partition wasn't written to while we were waiting for the data.
+                    consistent = True
+                    break
+            else:
+                consistent = False
+        finally:
+            loading[0] -= 1
+            if not loading[0]:
+                del self._loading[partition]
+
+        values = {}
+        for key, document in raw.items():
+            value = self._value_of(document)
+            if value is not _MISSING:
+                values[key] = value
+        ret = _IndexPartition(values)
+        if consistent:
+            # Another reader may have built the partition in the meantime.
+            ret = self._partitions.setdefault(partition, ret)
+        else:
+            # The partition is busy, so the last read is used without keeping it, as it
+            # may be missing writes. It's read again the next time it's queried.
+            log.debug(
+                "Partition %s of the %s index kept changing while being read.",
+                partition,
+                self.attribute,
+            )
+        return ret
+
+    async def ranked(
+        self, *partition: Any, reverse: bool = True
+    ) -> Iterator[Tuple[Union[int, str], Any]]:
+        """Get the indexed documents of a partition, in order.
+
+        The returned iterator is lazy - don't await anything while
+        iterating over it, as the index may change in the meantime.
+
+        Example
+        -------
+        ::
+
+            top_ten = list(itertools.islice(await index.ranked(guild.id), 10))
+
+        Parameters
+        ----------
+        *partition
+            All but the last primary key of the scope, e.g. the guild ID
+            for a member-scoped index. Nothing for global scopes such as
+            users.
+        reverse : bool
+            Whether to order the documents from the highest value to the
+            lowest. Defaults to ``True``.
+
+        Returns
+        -------
+        Iterator[Tuple[Union[int, str], Any]]
+            Pairs of the document's last primary key (e.g. the member ID)
+            and its value. Ties are ordered by the primary key, in the same
+            direction as the values.
+
+        """
+        part = await self._get_partition(tuple(str(p) for p in partition))
+        order = reversed(part.order) if reverse else iter(part.order)
+        return ((self._convert_key(key), value) for value, key in order)
+
+    async def rank(self, *primary_keys: Any, reverse: bool = True) -> Optional[int]:
+        """Get the position of a document in the index.
+
+        Parameters
+        ----------
+        *primary_keys
+            All of the primary keys of the document, e.g. the guild ID and
+            the member ID for a member-scoped index.
+        reverse : bool
+            Whether the highest value is ranked first. Defaults to ``True``.
+
+        Returns
+        -------
+        Optional[int]
+            The 1-based position of the document, or ``None`` if it isn't
+            indexed.
+
+        """
+        *partition, key = (str(p) for p in primary_keys)
+        part = await self._get_partition(tuple(partition))
+        try:
+            value = part.values[key]
+        except KeyError:
+            return None
+        if reverse:
+            return len(part.order) - bisect.bisect_right(part.order, (value, key)) + 1
+        return bisect.bisect_left(part.order, (value, key)) + 1
+
+    def _on_write(self, id_data: IdentifierData, value: Any = ..., *, cleared: bool = False):
+        """Update the index after a write. A value of ``...`` means it's unknown."""
+        pkey_len = self._pkey_len
+        pkeys = id_data.primary_key
+        if self._loading:
+            written = pkeys[: pkey_len - 1]
+            for partition, loading in self._loading.items():
+                if partition[: len(written)] == written:
+                    loading[1] += 1
+        if not self._partitions:
+            return
+        if len(pkeys) < pkey_len:
+            # Many documents were replaced or removed at once.
+            if len(pkeys) == pkey_len - 1:
+                self._partitions.pop(pkeys, None)
+            else:
+                self._partitions.clear()
+            return
+
+        part = self._partitions.get(pkeys[:-1])
+        if part is None:
+            return
+        key = pkeys[-1]
+        identifiers = id_data.identifiers
+        if not identifiers:
+            part.update(key, _MISSING if cleared else self._value_of(value))
+        elif identifiers[0] != self.attribute:
+            if key not in part.values and not cleared:
+                # Setting any attribute of a new document stores the indexed default with it.
+                part.update(key, self._value_of({}))
+        elif len(identifiers) > 1 or value is ...:
+            # Something within the indexed value has changed, we can't tell what it is now.
+            del self._partitions[pkeys[:-1]]
+        elif cleared:
+            if key in part.values:
+                part.update(key, self._value_of({}))
+        else:
+            part.update(key, self._value_of({self.attribute: value}))
+
+
+class _IndexingDriver:
+    """Wrapper of a config's driver, which keeps its indexes up to date on writes."""
+
+    def __init__(self, driver: BaseDriver):
+        self.driver = driver
+        self.indexes: Dict[str, List[ConfigIndex]] = {}
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.driver, item)
+
+    def _on_write(self, id_data: IdentifierData, value: Any = ..., *, cleared: bool = False):
+        if id_data.category:
+            for index in self.indexes.get(id_data.category, ()):
+                index._on_write(id_data, value, cleared=cleared)
+        else:
+            for indexes in self.indexes.values():
+                for index in indexes:
+                    index._on_write(id_data, value, cleared=cleared)
+
+    async def set(self, identifier_data: IdentifierData, value=None):
+        await self.driver.set(identifier_data, value=value)
+        self._on_write(identifier_data, value)
+
+    async def set_many(self, items):
+        items = list(items)
+        await self.driver.set_many(items)
+        for identifier_data, value in items:
+            self._on_write(identifier_data, value)
+
+    async def clear(self, identifier_data: IdentifierData):
+        await self.driver.clear(identifier_data)
+        self._on_write(identifier_data, cleared=True)
+
+    async def inc(self, identifier_data: IdentifierData, value, default):
+        ret = await self.driver.inc(identifier_data, value, default)
+        self._on_write(identifier_data, ret)
+        return ret
+
+    async def toggle(self, identifier_data: IdentifierData, default: bool) -> bool:
+        ret = await self.driver.toggle(identifier_data, default)
+        self._on_write(identifier_data, ret)
+        return ret
+
+    async def append(self, identifier_data: IdentifierData, value: Any, default: list) -> int:
+        ret = await self.driver.append(identifier_data, value, default)
+        self._on_write(identifier_data)
+        return ret
+
+    async def apply_batch(self, operations):
+        operations = list(operations)
+        await self.driver.apply_batch(operations)
+        for op, identifier_data, value in operations:
+            if op == "set":
+                self._on_write(identifier_data, value)
+            else:
+                self._on_write(identifier_data, cleared=True)
+
+
+class _MappingView(collections.abc.Mapping):
+    """Read-only view of a config dict, with registered defaults layered
+    underneath it.
+
+    Neither the data nor the defaults are copied: nested dicts and lists are
+    wrapped in views of their own when they're accessed.
+    """
+
+    __slots__ = ("_data", "_defaults")
+
+    def __init__(self, data: Dict[str, Any], defaults: Dict[str, Any]):
+        self._data = data
+        self._defaults = defaults
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            return _freeze(self._defaults[key])
+        default = self._defaults.get(key)
+        return _freeze(value, default if isinstance(default, dict) else {})
+
+    def __iter__(self):
+        yield from self._data
+        for key in self._defaults:
+            if key not in self._data:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._data) + sum(1 for key in self._defaults if key not in self._data)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {dict(self)!r}>"
+
+
+class _SequenceView(collections.abc.Sequence):
+    """Read-only view of a config list."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _SequenceView(self._data[index])
+        return _freeze(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, _SequenceView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {list(self)!r}>"
+
+
+def _freeze(value: Any, defaults: Dict[str, Any] = None) -> Any:
+    """Wrap a config value in a read-only view, if it's mutable."""
+    if isinstance(value, dict):
+        return _MappingView(value, {} if defaults is None else defaults)
+    if isinstance(value, list):
+        return _SequenceView(value)
+    return value
 
 
 class Value:
@@ -144,9 +676,14 @@ class Value:
     def __init__(self, identifier_data: IdentifierData, default_value, driver, config: "Config"):
         self.identifier_data = identifier_data
         self.default = default_value
-        self._driver = driver
+        self._base_driver = driver
         self._config = config
 
+    @property
+    def _driver(self) -> BaseDriver:
+        # Writes are routed through the config's batch when one is active.
+        return _get_active_batch(self._base_driver) or self._base_driver
+
     def get_lock(self) -> asyncio.Lock:
         """Get a lock to create a critical region where this value is accessed.
 
@@ -181,10 +718,17 @@ class Value:
         return self._config._lock_cache.setdefault(self.identifier_data, asyncio.Lock())
 
     async def _get(self, default=...):
+        profiling = _profiler.enabled
+        if profiling:
+            start = time.perf_counter()
         try:
             ret = await self._driver.get(self.identifier_data)
         except KeyError:
+            if profiling:
+                _profiler.record(self.identifier_data, "get", time.perf_counter() - start)
             return default if default is not ... else self.default
+        if profiling:
+            _profiler.record(self.identifier_data, "get", time.perf_counter() - start, ret)
         return ret
 
     def __call__(self, default=..., *, acquire_lock: bool = True) -> _ValueCtxManager[Any]:
@@ -242,6 +786,35 @@ class Value:
         """
         return _ValueCtxManager(self, self._get(default), acquire_lock=acquire_lock)
 
+    async def view(self, default=...) -> Any:
+        """Get a read-only view of this data element.
+
+        Unlike awaiting `__call__`, this doesn't copy the stored data, which
+        makes it considerably cheaper for large values. Dicts are returned
+        as read-only `collections.abc.Mapping` and lists as read-only
+        `collections.abc.Sequence` objects.
+
+        The view may be backed by the driver's internal state, so it may or
+        may not reflect changes made after it was retrieved - don't keep it
+        around. To modify the data, use `set` or the context manager.
+
+        Parameters
+        ----------
+        default : `object`, optional
+            Same as the ``default`` parameter in `__call__`.
+
+        Returns
+        -------
+        Any
+            A read-only view of the stored value.
+
+        """
+        try:
+            raw = await self._driver.get_readonly(self.identifier_data)
+        except KeyError:
+            raw = default if default is not ... else self.default
+        return _freeze(raw)
+
     async def set(self, value):
         """Set the value of the data elements pointed to by `identifiers`.
 
@@ -263,7 +836,12 @@ class Value:
         """
         if isinstance(value, dict):
             value = _str_key_dict(value)
+        profiling = _profiler.enabled
+        if profiling:
+            start = time.perf_counter()
         await self._driver.set(self.identifier_data, value=value)
+        if profiling:
+            _profiler.record(self.identifier_data, "set", time.perf_counter() - start, value)
 
     async def clear(self):
         """
@@ -271,6 +849,81 @@ class Value:
         """
         await self._driver.clear(self.identifier_data)
 
+    async def inc(self, amount: Union[int, float] = 1) -> Union[int, float]:
+        """Atomically add ``amount`` to this numeric value.
+
+        Unlike reading the value and then calling `set`, concurrent calls
+        won't lose updates, and no lock needs to be held.
+
+        Example
+        -------
+        ::
+
+            new_count = await config.member(member).messages.inc()
+
+        Parameters
+        ----------
+        amount : Union[int, float]
+            The amount to add. May be negative. Defaults to ``1``.
+
+        Returns
+        -------
+        Union[int, float]
+            The new value.
+
+        Raises
+        ------
+        errors.StoredTypeError
+            If the stored value isn't a number.
+
+        """
+        default = 0 if self.default is None else self.default
+        return await self._driver.inc(self.identifier_data, amount, default)
+
+    async def toggle(self) -> bool:
+        """Atomically invert this boolean value.
+
+        Returns
+        -------
+        bool
+            The new value.
+
+        Raises
+        ------
+        errors.StoredTypeError
+            If the stored value isn't a boolean.
+
+        """
+        default = False if self.default is None else self.default
+        return await self._driver.toggle(self.identifier_data, default)
+
+    async def append(self, item: Any) -> int:
+        """Atomically append ``item`` to this list value.
+
+        The stored list is not copied or rewritten as a whole, which makes
+        this considerably cheaper than reading and setting a long list.
+
+        Parameters
+        ----------
+        item
+            The item to append.
+
+        Returns
+        -------
+        int
+            The new length of the list.
+
+        Raises
+        ------
+        errors.StoredTypeError
+            If the stored value isn't a list.
+
+        """
+        if isinstance(item, dict):
+            item = _str_key_dict(item)
+        default = [] if self.default is None else self.default
+        return await self._driver.append(self.identifier_data, item, default)
+
 
 class Group(Value):
     """
@@ -301,9 +954,8 @@ class Group(Value):
     ):
         self._defaults = defaults
         self.force_registration = force_registration
-        self._driver = driver
 
-        super().__init__(identifier_data, {}, self._driver, config)
+        super().__init__(identifier_data, {}, driver, config)
 
     @property
     def defaults(self):
@@ -317,6 +969,38 @@ class Group(Value):
         else:
             return raw
 
+    async def view(self, default: Dict[str, Any] = ...) -> Any:
+        """Get a read-only view of this group's data.
+
+        This works like `all`, except that neither the stored data nor the
+        registered defaults are copied. Defaults for values which have not
+        yet been set are looked up lazily, when they are accessed.
+
+        See `Value.view` for more details.
+
+        Example
+        -------
+        ::
+
+            data = await config.guild(some_guild).view()
+            if data["enabled"]:
+                ...
+
+        Returns
+        -------
+        `collections.abc.Mapping`
+            A read-only mapping of all of this Group's attributes.
+
+        """
+        defaults = default if default is not ... else self._defaults
+        try:
+            raw = await self._driver.get_readonly(self.identifier_data)
+        except KeyError:
+            raw = {}
+        if isinstance(raw, dict):
+            return _MappingView(raw, defaults)
+        return _freeze(raw)
+
     # noinspection PyTypeChecker
     def __getattr__(self, item: str) -> Union["Group", Value]:
         """Get an attribute of this group.
@@ -349,7 +1033,7 @@ class Group(Value):
             return Group(
                 identifier_data=new_identifiers,
                 defaults=self._defaults[item],
-                driver=self._driver,
+                driver=self._base_driver,
                 force_registration=self.force_registration,
                 config=self._config,
             )
@@ -357,7 +1041,7 @@ class Group(Value):
             return Value(
                 identifier_data=new_identifiers,
                 default_value=self._defaults[item],
-                driver=self._driver,
+                driver=self._base_driver,
                 config=self._config,
             )
         elif self.force_registration:
@@ -366,7 +1050,7 @@ class Group(Value):
             return Value(
                 identifier_data=new_identifiers,
                 default_value=None,
-                driver=self._driver,
+                driver=self._base_driver,
                 config=self._config,
             )
 
@@ -598,6 +1282,33 @@ class Group(Value):
             value = _str_key_dict(value)
         await self._driver.set(identifier_data, value=value)
 
+    async def set_many(self, values: Dict[Any, Any]):
+        """Set several attributes of this group in a single driver operation.
+
+        This is equivalent to calling `set_raw` once for each key, but
+        the driver may apply all of them at once, e.g. with a single file
+        write or a single database transaction.
+
+        Example
+        -------
+        ::
+
+            await config.guild(guild).set_many({"enabled": True, "channel": channel.id})
+
+        Parameters
+        ----------
+        values : Dict[Any, Any]
+            A mapping of attribute names to their new values. Keys are
+            casted to `str` for you.
+
+        """
+        items = []
+        for key, value in values.items():
+            if isinstance(value, dict):
+                value = _str_key_dict(value)
+            items.append((self.identifier_data.get_child(str(key)), value))
+        await self._driver.set_many(items)
+
 
 class Config(metaclass=ConfigMeta):
     """Configuration manager for cogs and Red.
@@ -651,7 +1362,7 @@ class Config(metaclass=ConfigMeta):
         self.cog_name = cog_name
         self.unique_identifier = unique_identifier
 
-        self._driver = driver
+        self._base_driver = driver
         self.force_registration = force_registration
         self._defaults = defaults or {}
 
@@ -664,6 +1375,51 @@ class Config(metaclass=ConfigMeta):
     def defaults(self):
         return pickle.loads(pickle.dumps(self._defaults, -1))
 
+    @property
+    def _driver(self) -> BaseDriver:
+        return _get_active_batch(self._base_driver) or self._base_driver
+
+    def batch(self) -> AsyncContextManager[None]:
+        """Buffer writes to this config and commit them all at once.
+
+        All sets and clears made through this config within the
+        :code:`async with` block, on any group or value, are committed as a
+        single driver operation when the block exits - e.g. one file write
+        with the JSON backend, or one transaction with PostgreSQL. If the
+        block raises, the buffered writes are discarded.
+
+        Reads within the block see the buffered writes, while other tasks
+        keep seeing the data from before the batch until it's committed.
+        Batches may be nested, in which case the writes are committed when
+        the outermost one exits.
+
+        Example
+        -------
+        ::
+
+            async with config.batch():
+                for member in to_unmute:
+                    await config.member(member).muted.set(False)
+
+        .. note::
+
+            Within a batch, `Value.inc`, `Value.toggle` and `Value.append`
+            are only atomic with respect to the batch being committed as
+            a whole, not to other tasks writing the same values.
+
+            Value locks taken by ``async with value() as ...`` within the
+            batch are held until it's committed, so avoid keeping a batch
+            open across slow operations, such as HTTP requests, which
+            other tasks would be kept waiting on.
+
+        Returns
+        -------
+        `asynchronous context manager`
+            The batch context manager.
+
+        """
+        return _get_active_batch(self._base_driver) or _ConfigBatch(self._base_driver)
+
     @classmethod
     def get_conf(
         cls,
@@ -921,6 +1677,66 @@ class Config(metaclass=ConfigMeta):
                 f"Cannot change identifier count of already registered group: {group_identifier}"
             )
 
+    def register_index(self, attribute: str, *, scope: str) -> None:
+        """Keep a sorted index of a numeric attribute of the given scope.
+
+        This makes ordered queries, such as leaderboards, considerably
+        cheaper than getting all of the scope's data and sorting it. The
+        index is kept in memory and updated on each write made through
+        this config. Use `index` to query it.
+
+        Example
+        -------
+        ::
+
+            config.register_member(balance=0)
+            config.register_index("balance", scope=Config.MEMBER)
+
+        Parameters
+        ----------
+        attribute : str
+            The name of the attribute to index. Its values should be numbers.
+        scope : str
+            The scope whose documents should be indexed, e.g.
+            `Config.MEMBER` or the name of a custom group.
+
+        """
+        if scope == self.GLOBAL:
+            raise ValueError("The global scope can't be indexed.")
+        if not isinstance(self._base_driver, _IndexingDriver):
+            self._base_driver = _IndexingDriver(self._base_driver)
+        indexes = self._base_driver.indexes.setdefault(scope, [])
+        if all(index.attribute != attribute for index in indexes):
+            indexes.append(ConfigIndex(self, attribute, scope))
+
+    def index(self, attribute: str, *, scope: str) -> ConfigIndex:
+        """Get an index registered with `register_index`.
+
+        Parameters
+        ----------
+        attribute : str
+            The indexed attribute.
+        scope : str
+            The indexed scope.
+
+        Returns
+        -------
+        ConfigIndex
+            The index.
+
+        Raises
+        ------
+        ValueError
+            If no such index has been registered.
+
+        """
+        driver = self._base_driver
+        if isinstance(driver, _IndexingDriver):
+            for index in driver.indexes.get(scope, ()):
+                if index.attribute == attribute:
+                    return index
+        raise ValueError(f"No index has been registered for {attribute!r} in {scope!r}.")
+
     def _get_base_group(self, category: str, *primary_keys: str) -> Group:
         """
         .. warning::
@@ -947,7 +1763,7 @@ class Config(metaclass=ConfigMeta):
         return Group(
             identifier_data=identifier_data,
             defaults=defaults,
-            driver=self._driver,
+            driver=self._base_driver,
             force_registration=self.force_registration,
             config=self,
         )
@@ -1175,7 +1991,9 @@ class Config(metaclass=ConfigMeta):
             raise ValueError(f"Group identifier not initialized: {group_identifier}")
         return self._get_base_group(str(group_identifier), *map(str, identifiers))
 
-    async def _all_from_scope(self, scope: str) -> Dict[int, Dict[Any, Any]]:
+    async def _all_from_scope(
+        self, scope: str, *, readonly: bool = False
+    ) -> Dict[int, Dict[Any, Any]]:
         """Get a dict of all values from a particular scope of data.
 
         :code:`scope` must be one of the constants attributed to
@@ -1184,17 +2002,36 @@ class Config(metaclass=ConfigMeta):
         IDs as keys in the returned dict are casted to `int` for convenience.
 
         Default values are also mixed into the data if they have not yet been
-        overwritten.
+        overwritten. With :code:`readonly` set, the data is not copied and
+        read-only views are returned instead, see `Group.view`.
         """
         group = self._get_base_group(scope)
         ret = {}
-        defaults = self.defaults.get(scope, {})
 
+        if readonly:
+            try:
+                dict_ = await self._driver.get_readonly(group.identifier_data)
+            except KeyError:
+                return ret
+            defaults = self._defaults.get(scope, {})
+            return {int(k): _MappingView(v, defaults) for k, v in dict_.items()}
+
+        defaults = self.defaults.get(scope, {})
+        profiling = _profiler.enabled
+        if profiling:
+            start = time.perf_counter()
         try:
             dict_ = await self._driver.get(group.identifier_data)
         except KeyError:
-            pass
+            if profiling:
+                _profiler.record(
+                    group.identifier_data, "all_from_scope", time.perf_counter() - start
+                )
         else:
+            if profiling:
+                _profiler.record(
+                    group.identifier_data, "all_from_scope", time.perf_counter() - start, dict_
+                )
             for k, v in dict_.items():
                 data = pickle.loads(pickle.dumps(defaults, -1))
                 data.update(v)
@@ -1202,7 +2039,7 @@ class Config(metaclass=ConfigMeta):
 
         return ret
 
-    async def all_guilds(self) -> dict:
+    async def all_guilds(self, *, readonly: bool = False) -> dict:
         """Get all guild data as a dict.
 
         Note
@@ -1210,6 +2047,13 @@ class Config(metaclass=ConfigMeta):
         The return value of this method will include registered defaults for
         values which have not yet been set.
 
+        Parameters
+        ----------
+        readonly : bool
+            If ``True``, the data is not copied and each guild's data
+            is returned as a read-only view, see `Group.view`.
+            Defaults to ``False``.
+
         Returns
         -------
         dict
@@ -1217,9 +2061,9 @@ class Config(metaclass=ConfigMeta):
             :code:`GUILD_ID -> data`.
 
         """
-        return await self._all_from_scope(self.GUILD)
+        return await self._all_from_scope(self.GUILD, readonly=readonly)
 
-    async def all_channels(self) -> dict:
+    async def all_channels(self, *, readonly: bool = False) -> dict:
         """Get all channel data as a dict.
 
         Note
@@ -1227,6 +2071,13 @@ class Config(metaclass=ConfigMeta):
         The return value of this method will include registered defaults for
         values which have not yet been set.
 
+        Parameters
+        ----------
+        readonly : bool
+            If ``True``, the data is not copied and each channel's data
+            is returned as a read-only view, see `Group.view`.
+            Defaults to ``False``.
+
         Returns
         -------
         dict
@@ -1234,9 +2085,9 @@ class Config(metaclass=ConfigMeta):
             :code:`CHANNEL_ID -> data`.
 
         """
-        return await self._all_from_scope(self.CHANNEL)
+        return await self._all_from_scope(self.CHANNEL, readonly=readonly)
 
-    async def all_roles(self) -> dict:
+    async def all_roles(self, *, readonly: bool = False) -> dict:
         """Get all role data as a dict.
 
         Note
@@ -1244,6 +2095,13 @@ class Config(metaclass=ConfigMeta):
         The return value of this method will include registered defaults for
         values which have not yet been set.
 
+        Parameters
+        ----------
+        readonly : bool
+            If ``True``, the data is not copied and each role's data
+            is returned as a read-only view, see `Group.view`.
+            Defaults to ``False``.
+
         Returns
         -------
         dict
@@ -1251,9 +2109,9 @@ class Config(metaclass=ConfigMeta):
             :code:`ROLE_ID -> data`.
 
         """
-        return await self._all_from_scope(self.ROLE)
+        return await self._all_from_scope(self.ROLE, readonly=readonly)
 
-    async def all_users(self) -> dict:
+    async def all_users(self, *, readonly: bool = False) -> dict:
         """Get all user data as a dict.
 
         Note
@@ -1261,6 +2119,13 @@ class Config(metaclass=ConfigMeta):
         The return value of this method will include registered defaults for
         values which have not yet been set.
 
+        Parameters
+        ----------
+        readonly : bool
+            If ``True``, the data is not copied and each user's data
+            is returned as a read-only view, see `Group.view`.
+            Defaults to ``False``.
+
         Returns
         -------
         dict
@@ -1268,9 +2133,15 @@ class Config(metaclass=ConfigMeta):
             :code:`USER_ID -> data`.
 
         """
-        return await self._all_from_scope(self.USER)
+        return await self._all_from_scope(self.USER, readonly=readonly)
 
-    def _all_members_from_guild(self, guild_data: dict) -> dict:
+    def _all_members_from_guild(self, guild_data: dict, *, readonly: bool = False) -> dict:
+        if readonly:
+            defaults = self._defaults.get(self.MEMBER, {})
+            return {
+                int(member_id): _MappingView(member_data, defaults)
+                for member_id, member_data in guild_data.items()
+            }
         ret = {}
         defaults = self.defaults.get(self.MEMBER, {})
         for member_id, member_data in guild_data.items():
@@ -1279,7 +2150,7 @@ class Config(metaclass=ConfigMeta):
             ret[int(member_id)] = new_member_data
         return ret
 
-    async def all_members(self, guild: discord.Guild = None) -> dict:
+    async def all_members(self, guild: discord.Guild = None, *, readonly: bool = False) -> dict:
         """Get data for all members.
 
         If :code:`guild` is specified, only the data for the members of that
@@ -1297,6 +2168,10 @@ class Config(metaclass=ConfigMeta):
         guild : `discord.Guild`, optional
             The guild to get the member data from. Can be omitted if data
             from every member of all guilds is desired.
+        readonly : bool
+            If ``True``, the data is not copied and each member's data
+            is returned as a read-only view, see `Group.view`.
+            Defaults to ``False``.
 
         Returns
         -------
@@ -1305,23 +2180,26 @@ class Config(metaclass=ConfigMeta):
 
         """
         ret = {}
+        get = self._driver.get_readonly if readonly else self._driver.get
         if guild is None:
             group = self._get_base_group(self.MEMBER)
             try:
-                dict_ = await self._driver.get(group.identifier_data)
+                dict_ = await get(group.identifier_data)
             except KeyError:
                 pass
             else:
                 for guild_id, guild_data in dict_.items():
-                    ret[int(guild_id)] = self._all_members_from_guild(guild_data)
+                    ret[int(guild_id)] = self._all_members_from_guild(
+                        guild_data, readonly=readonly
+                    )
         else:
             group = self._get_base_group(self.MEMBER, str(guild.id))
             try:
-                guild_data = await self._driver.get(group.identifier_data)
+                guild_data = await get(group.identifier_data)
             except KeyError:
                 pass
             else:
-                ret = self._all_members_from_guild(guild_data)
+                ret = self._all_members_from_guild(guild_data, readonly=readonly)
         return ret
 
     async def _clear_scope(self, *scopes: str):
@@ -1345,7 +2223,7 @@ class Config(metaclass=ConfigMeta):
         if not scopes:
             # noinspection PyTypeChecker
             identifier_data = IdentifierData(self.cog_name, self.unique_identifier, "", (), (), 0)
-            group = Group(identifier_data, defaults={}, driver=self._driver, config=self)
+            group = Group(identifier_data, defaults={}, driver=self._base_driver, config=self)
         else:
             cat, *scopes = scopes
             group = self._get_base_group(cat, *scopes)
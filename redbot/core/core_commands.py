@@ -34,6 +34,7 @@ from typing import (
     Dict,
     Set,
     Literal,
+    Any,
 )
 
 import aiohttp
@@ -50,6 +51,7 @@ from . import (
     bank,
     modlog,
 )
+from ._config_profiler import profiler
 from ._diagnoser import IssueDiagnoser
 from .utils import AsyncIter, can_user_send_messages_in
 from .utils._internal_utils import fetch_latest_red_version_info
@@ -129,6 +131,7 @@ class CoreLogic:
         self.bot.register_rpc_handler(self._prefixes)
         self.bot.register_rpc_handler(self._version_info)
         self.bot.register_rpc_handler(self._invite_url)
+        self.bot.register_rpc_handler(self._config_stats)
 
     async def _load(self, pkg_names: Iterable[str]) -> Dict[str, Union[List[str], Dict[str, str]]]:
         """
@@ -378,6 +381,24 @@ class CoreLogic:
         """
         return await self.bot.get_invite_url()
 
+    async def _config_stats(self, limit: int = 10) -> Dict[str, Any]:
+        """
+        Config access statistics, as collected while ``[p]configprofile`` is enabled.
+
+        Parameters
+        ----------
+        limit : int
+            How many of the busiest cogs and config paths to include.
+
+        Returns
+        -------
+        dict
+            ``enabled``, ``duration``, ``cogs`` and ``paths`` keys, with
+            call counts, bytes copied, lock wait time and driver latency
+            for each cog and path.
+        """
+        return profiler.report(limit)
+
     @staticmethod
     async def _can_get_invite_url(ctx):
         is_owner = await ctx.bot.is_owner(ctx.author)
@@ -4715,6 +4736,34 @@ class Core(commands.commands._RuleDropper, commands.Cog, CoreLogic):
 
         await ctx.send(await DebugInfo(self.bot).get_command_text())
 
+    @commands.group(hidden=True, invoke_without_command=True)
+    @commands.is_owner()
+    async def configprofile(self, ctx: commands.Context, limit: int = 10):
+        """Shows which cogs and config paths access storage the most.
+
+        Statistics are only collected while profiling is enabled with `[p]configprofile enable`.
+        """
+        for page in pagify(profiler.format_report(limit), shorten_by=12):
+            await ctx.send(box(page))
+
+    @configprofile.command(name="enable")
+    async def configprofile_enable(self, ctx: commands.Context):
+        """Start collecting config access statistics."""
+        profiler.enable()
+        await ctx.send(_("Config profiling has been enabled."))
+
+    @configprofile.command(name="disable")
+    async def configprofile_disable(self, ctx: commands.Context):
+        """Stop collecting config access statistics."""
+        profiler.disable()
+        await ctx.send(_("Config profiling has been disabled."))
+
+    @configprofile.command(name="reset")
+    async def configprofile_reset(self, ctx: commands.Context):
+        """Drop the config access statistics collected so far."""
+        profiler.reset()
+        await ctx.send(_("Config profiling statistics have been reset."))
+
     # You may ask why this command is owner-only,
     # cause after all it could be quite useful to guild owners!
     # Truth to be told, that would require us to make some part of this
@@ -103,13 +103,20 @@ def get_storage_type(backend: Optional[str], *, interactive: bool):
         return get_target_backend(backend)
     if not interactive:
         return BackendType.JSON
-    storage_dict = {1: BackendType.JSON, 2: BackendType.POSTGRES}
+    storage_dict = {
+        1: BackendType.JSON,
+        2: BackendType.POSTGRES,
+        3: BackendType.JOURNAL,
+        4: BackendType.SQLITE,
+    }
     storage = None
     while storage is None:
         print()
         print("Please choose your storage backend.")
         print("1. JSON (file storage, requires no database).")
         print("2. PostgreSQL (Requires a database server)")
+        print("3. Journal (file storage with an append-only change log, requires no database).")
+        print("4. SQLite (embedded database, requires no database server).")
         print("If you're unsure, press [ENTER] to use the recommended default - JSON.")
 
         storage = input("> ")
@@ -257,6 +264,10 @@ def get_target_backend(backend: str) -> BackendType:
         return BackendType.JSON
     elif backend == "postgres":
         return BackendType.POSTGRES
+    elif backend == "journal":
+        return BackendType.JOURNAL
+    elif backend == "sqlite":
+        return BackendType.SQLITE
 
 
 async def do_migration(
@@ -307,13 +318,13 @@ async def remove_instance(
 
     if interactive is True and delete_data is None:
         msg = "Would you like to delete this instance's data?"
-        if backend != BackendType.JSON:
+        if backend not in (BackendType.JSON, BackendType.JOURNAL, BackendType.SQLITE):
             msg += " The database server must be running for this to work."
         delete_data = click.confirm(msg, default=False)
 
     if interactive is True and _create_backup is None:
         msg = "Would you like to make a backup of the data for this instance?"
-        if backend != BackendType.JSON:
+        if backend not in (BackendType.JSON, BackendType.JOURNAL, BackendType.SQLITE):
             msg += " The database server must be running for this to work."
         _create_backup = click.confirm(msg, default=False)
 
@@ -401,7 +412,7 @@ async def remove_instance_interaction() -> None:
 )
 @click.option(
     "--backend",
-    type=click.Choice(["json", "postgres"]),
+    type=click.Choice(["json", "postgres", "journal", "sqlite"]),
     default=None,
     help=(
         "Choose a backend type for the new instance."
@@ -517,7 +528,7 @@ def delete(
 
 @cli.command()
 @click.argument("instance", type=click.Choice(instance_list), metavar="<INSTANCE_NAME>")
-@click.argument("backend", type=click.Choice(["json", "postgres"]))
+@click.argument("backend", type=click.Choice(["json", "postgres", "journal", "sqlite"]))
 def convert(instance: str, backend: str) -> None:
     """Convert data backend of an instance."""
     current_backend = get_current_backend(instance)
@@ -73,3 +73,26 @@ async def test_nonint_transaction_amount(bank, member_factory):
         await bank.withdraw_credits(mbr1, 1.0)
     with pytest.raises(TypeError):
         await bank.transfer_credits(mbr1, mbr2, 1.0)
+
+
+async def test_bank_leaderboard(bank, member_factory):
+    mbr1 = member_factory.get()
+    guild = mbr1.guild
+    mbr2 = mbr1._replace(id=mbr1.id + 1)
+    mbr3 = mbr1._replace(id=mbr1.id + 2)
+    await bank.set_balance(mbr1, 100)
+    await bank.set_balance(mbr2, 300)
+    await bank.set_balance(mbr3, 200)
+    leaderboard = await bank.get_leaderboard(2, guild)
+    assert [(user_id, acc["balance"]) for user_id, acc in leaderboard] == [
+        (mbr2.id, 300),
+        (mbr3.id, 200),
+    ]
+    assert [user_id for user_id, _acc in await bank.get_leaderboard(guild=guild)] == [
+        mbr2.id,
+        mbr3.id,
+        mbr1.id,
+    ]
+    assert await bank.get_leaderboard_position(mbr1) == 3
+    await bank.set_balance(mbr1, 400)
+    assert await bank.get_leaderboard_position(mbr1) == 1
@@ -1,8 +1,11 @@
 import asyncio
+import json
 from unittest.mock import patch
 import pytest
 from collections import Counter
 
+from redbot.core._drivers import IdentifierData
+
 
 # region Register Tests
 async def test_config_register_global(config):
@@ -685,3 +688,482 @@ async def test_config_custom_clear_identifiers_that_do_not_exist(config, pkeys,
         # Clear needed to be able to differ between missing config data and missing scope data
         await scope.clear_raw(*to_set)
     await group.clear_raw(*raw_args)
+
+
+async def test_json_driver_write_behind_coalesces_saves(config, monkeypatch):
+    from redbot.core._drivers import JsonDriver
+
+    if not isinstance(config._driver, JsonDriver):
+        pytest.skip("Write-behind mode is specific to the JSON driver.")
+    monkeypatch.setattr(JsonDriver, "_write_behind_interval", 60.0)
+    before = JsonDriver.get_write_stats()
+
+    for i in range(10):
+        await config.foo.set(i)
+
+    stats = JsonDriver.get_write_stats()
+    assert stats["writes"] == before["writes"]
+    assert stats["writes_avoided"] - before["writes_avoided"] == 9
+    assert stats["dirty_cogs"] == 1
+    path = config._driver.data_path
+    on_disk = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    assert config.unique_identifier not in on_disk
+
+    await JsonDriver.teardown()
+
+    stats = JsonDriver.get_write_stats()
+    assert stats["writes"] - before["writes"] == 1
+    assert stats["dirty_cogs"] == 0
+    on_disk = json.loads(path.read_text(encoding="utf-8"))
+    assert on_disk[config.unique_identifier]["GLOBAL"]["foo"] == 9
+
+
+async def test_journal_driver_replays_snapshot_and_journal(tmp_path):
+    from redbot.core._drivers import JournalDriver, journal
+
+    id_data = IdentifierData("JournalTest", "1", "GLOBAL", (), (), 0)
+    driver = JournalDriver("JournalTest", "1", data_path_override=tmp_path)
+    await driver.set(id_data.add_identifier("foo"), 1)
+    await driver.set(id_data.add_identifier("bar"), {"baz": [1, 2]})
+    await driver.clear(id_data.add_identifier("foo"))
+    assert not driver.snapshot_path.exists()
+    assert len(driver.journal_path.read_text(encoding="utf-8").splitlines()) == 3
+
+    del journal._shared_datastore["JournalTest"]
+    driver = JournalDriver("JournalTest", "1", data_path_override=tmp_path)
+    assert await driver.get(id_data) == {"bar": {"baz": [1, 2]}}
+
+
+async def test_journal_driver_replays_append_to_unset(tmp_path):
+    from redbot.core._drivers import JournalDriver, journal
+
+    id_data = IdentifierData("JournalTest", "4", "GLOBAL", (), (), 0)
+    driver = JournalDriver("JournalTest", "4", data_path_override=tmp_path)
+    assert await driver.append(id_data.add_identifier("foo"), 5, []) == 1
+    assert await driver.append(id_data.add_identifier("foo"), 6, []) == 2
+
+    del journal._shared_datastore["JournalTest"]
+    driver = JournalDriver("JournalTest", "4", data_path_override=tmp_path)
+    assert await driver.get(id_data.add_identifier("foo")) == [5, 6]
+
+
+async def test_journal_driver_drops_partial_entry(tmp_path):
+    from redbot.core._drivers import JournalDriver, journal
+
+    id_data = IdentifierData("JournalTest", "5", "GLOBAL", (), (), 0)
+    driver = JournalDriver("JournalTest", "5", data_path_override=tmp_path)
+    await driver.set(id_data.add_identifier("a"), 1)
+    with driver.journal_path.open("a", encoding="utf-8") as fs:
+        fs.write('["set",["b"],')
+
+    del journal._shared_datastore["JournalTest"]
+    driver = JournalDriver("JournalTest", "5", data_path_override=tmp_path)
+    await driver.set(id_data.add_identifier("b"), 2)
+
+    del journal._shared_datastore["JournalTest"]
+    driver = JournalDriver("JournalTest", "5", data_path_override=tmp_path)
+    assert await driver.get(id_data) == {"a": 1, "b": 2}
+
+
+async def test_journal_driver_failed_write_leaves_data(tmp_path, monkeypatch):
+    from redbot.core._drivers import JournalDriver, journal
+
+    id_data = IdentifierData("JournalTest", "6", "GLOBAL", (), (), 0)
+    driver = JournalDriver("JournalTest", "6", data_path_override=tmp_path)
+    await driver.set(id_data.add_identifier("a"), 1)
+
+    def fail(path, entries):
+        raise OSError
+
+    monkeypatch.setattr(journal, "_append_journal", fail)
+    with pytest.raises(OSError):
+        await driver.set(id_data.add_identifier("a"), 2)
+    with pytest.raises(OSError):
+        await driver.append(id_data.add_identifier("b"), 1, [])
+    assert await driver.get(id_data) == {"a": 1}
+
+
+async def test_journal_driver_compaction(tmp_path, monkeypatch):
+    from redbot.core._drivers import JournalDriver
+
+    monkeypatch.setattr(JournalDriver, "compaction_threshold", 5)
+    id_data = IdentifierData("JournalTest", "2", "GLOBAL", (), (), 0)
+    driver = JournalDriver("JournalTest", "2", data_path_override=tmp_path)
+    for i in range(5):
+        await driver.set(id_data.add_identifier("foo"), i)
+    await JournalDriver.teardown()
+
+    assert driver.journal_path.read_text(encoding="utf-8") == ""
+    with driver.snapshot_path.open(encoding="utf-8") as fs:
+        assert json.load(fs) == {"2": {"GLOBAL": {"foo": 4}}}
+    assert await driver.get(id_data.add_identifier("foo")) == 4
+
+
+async def test_journal_driver_migrate_from_json():
+    from redbot.core._drivers import JournalDriver, JsonDriver
+
+    json_driver = JsonDriver("MigrationTest", "3")
+    id_data = IdentifierData("MigrationTest", "3", "MEMBER", ("1", "2"), (), 2)
+    await json_driver.set(id_data, {"balance": 5})
+
+    await JsonDriver.migrate_to(JournalDriver, {})
+
+    journal_driver = JournalDriver("MigrationTest", "3")
+    assert await journal_driver.get(id_data) == {"balance": 5}
+    assert ("MigrationTest", "3") in [c async for c in JournalDriver.aiter_cogs()]
+
+
+async def test_sqlite_driver_migrate_from_json(tmp_path):
+    from redbot.core._drivers import JsonDriver, SQLiteDriver, get_driver_class
+
+    if get_driver_class() is SQLiteDriver:
+        pytest.skip("The SQLite driver is already in use by the test session.")
+    await SQLiteDriver.initialize(path=str(tmp_path / "config.sqlite3"))
+    try:
+        json_driver = JsonDriver("MigrationTest", "4")
+        guild_data = IdentifierData("MigrationTest", "4", "MEMBER", ("1",), (), 2)
+        await json_driver.set(guild_data, {"2": {"balance": 5}, "3": {"balance": 7}})
+
+        await JsonDriver.migrate_to(SQLiteDriver, {})
+
+        sqlite_driver = SQLiteDriver("MigrationTest", "4")
+        assert await sqlite_driver.get(guild_data) == {"2": {"balance": 5}, "3": {"balance": 7}}
+        member_data = guild_data.get_child("3", "balance")
+        await sqlite_driver.set(member_data, 8)
+        assert await sqlite_driver.get(member_data) == 8
+        assert ("MigrationTest", "4") in [c async for c in SQLiteDriver.aiter_cogs()]
+    finally:
+        await SQLiteDriver.teardown()
+
+
+async def test_group_view(config, empty_guild):
+    config.register_guild(foo=1, bar={"baz": 2, "qux": [1]})
+    await config.guild(empty_guild).bar.baz.set(3)
+
+    view = await config.guild(empty_guild).view()
+    assert view == await config.guild(empty_guild).all()
+    assert view["foo"] == 1
+    assert view["bar"]["baz"] == 3
+    assert view["bar"]["qux"] == [1]
+    with pytest.raises(TypeError):
+        view["foo"] = 2
+    with pytest.raises(AttributeError):
+        view["bar"]["qux"].append(2)
+
+
+async def test_value_view(config):
+    config.register_global(foo=[{"bar": 1}])
+    assert await config.foo.view() == [{"bar": 1}]
+    await config.foo.set([{"bar": 2}])
+    assert await config.foo.view() == [{"bar": 2}]
+
+
+async def test_all_members_readonly(config, member_factory):
+    config.register_member(foo=0, bar=[])
+    member = member_factory.get()
+    await config.member(member).foo.set(5)
+
+    all_members = await config.all_members(member.guild, readonly=True)
+    assert all_members == await config.all_members(member.guild)
+    assert all_members[member.id]["foo"] == 5
+    assert all_members[member.id]["bar"] == []
+    all_guilds = await config.all_members(readonly=True)
+    assert all_guilds[member.guild.id] == all_members
+    with pytest.raises(TypeError):
+        all_members[member.id]["foo"] = 6
+
+
+async def test_all_guilds_readonly(config, empty_guild):
+    config.register_guild(foo=0)
+    await config.guild(empty_guild).foo.set(5)
+    assert await config.all_guilds(readonly=True) == await config.all_guilds()
+
+
+async def test_value_inc(config):
+    config.register_global(foo=5, bar=1.5)
+    assert await config.foo.inc() == 6
+    assert await config.foo.inc(-10) == -4
+    assert await config.foo() == -4
+    assert await config.bar.inc(1) == 2.5
+
+
+async def test_value_inc_concurrent(config, empty_guild):
+    config.register_guild(counter=0)
+    await asyncio.gather(*(config.guild(empty_guild).counter.inc() for _ in range(100)))
+    assert await config.guild(empty_guild).counter() == 100
+
+
+async def test_value_toggle(config):
+    config.register_global(foo=False)
+    assert await config.foo.toggle() is True
+    assert await config.foo() is True
+    assert await config.foo.toggle() is False
+
+
+async def test_value_append(config):
+    config.register_global(foo=[1])
+    assert await config.foo.append(2) == 2
+    assert await config.foo.append({3: 4}) == 3
+    assert await config.foo() == [1, 2, {"3": 4}]
+    # the registered default must be left untouched
+    assert config.defaults["GLOBAL"]["foo"] == [1]
+
+
+async def test_value_primitives_wrong_type(config):
+    from redbot.core.errors import StoredTypeError
+
+    config.register_global(foo="bar")
+    with pytest.raises(StoredTypeError):
+        await config.foo.inc()
+    with pytest.raises(StoredTypeError):
+        await config.foo.toggle()
+    with pytest.raises(StoredTypeError):
+        await config.foo.append(1)
+    assert await config.foo() == "bar"
+
+
+async def test_group_set_many(config, empty_guild):
+    config.register_guild(foo=0, bar={}, baz=False)
+    await config.guild(empty_guild).set_many({"foo": 1, "bar": {1: 2}})
+    assert await config.guild(empty_guild).all() == {"foo": 1, "bar": {"1": 2}, "baz": False}
+
+
+async def test_batch_commits_once(config, empty_guild, empty_member):
+    config.register_guild(foo=0)
+    config.register_member(bar=[])
+    driver = config._driver
+    with patch.object(driver, "set", wraps=driver.set) as set_mock, patch.object(
+        driver, "apply_batch", wraps=driver.apply_batch
+    ) as batch_mock:
+        async with config.batch():
+            await config.guild(empty_guild).foo.set(1)
+            await config.member(empty_member).bar.append(2)
+            await config.guild(empty_guild).foo.inc()
+        set_mock.assert_not_called()
+        batch_mock.assert_called_once()
+    assert await config.guild(empty_guild).foo() == 2
+    assert await config.member(empty_member).bar() == [2]
+
+
+async def test_batch_reads(config, empty_guild):
+    config.register_guild(foo=0, bar={"baz": 1, "qux": 2})
+    await config.guild(empty_guild).foo.set(1)
+    outside = asyncio.Event()
+    inside = asyncio.Event()
+
+    async def read_outside():
+        await inside.wait()
+        assert await config.guild(empty_guild).foo() == 1
+        outside.set()
+
+    task = asyncio.create_task(read_outside())
+    async with config.batch():
+        await config.guild(empty_guild).foo.set(2)
+        await config.guild(empty_guild).bar.baz.clear()
+        await config.guild(empty_guild).bar.set_raw("quux", value=3)
+        assert await config.guild(empty_guild).foo() == 2
+        assert await config.guild(empty_guild).bar() == {"baz": 1, "qux": 2, "quux": 3}
+        assert (await config.guild(empty_guild).bar.view())["quux"] == 3
+        inside.set()
+        await outside.wait()
+    await task
+    assert await config.guild(empty_guild).foo() == 2
+    assert await config.guild(empty_guild).bar() == {"baz": 1, "qux": 2, "quux": 3}
+
+
+async def test_batch_discarded_on_error(config):
+    config.register_global(foo=0)
+
+    with pytest.raises(RuntimeError):
+        async with config.batch():
+            await config.foo.set(1)
+            raise RuntimeError
+    assert await config.foo() == 0
+
+
+async def test_batch_nested(config):
+    config.register_global(foo=0, bar=0)
+
+    async with config.batch():
+        async with config.batch():
+            await config.foo.set(1)
+        assert await config.foo() == 1
+        await config.bar.set(1)
+    assert await config.foo() == 1
+    assert await config.bar() == 1
+
+
+async def test_batch_outlived_by_task(config):
+    config.register_global(foo=0)
+    exited = asyncio.Event()
+
+    async def write_later():
+        await exited.wait()
+        await config.foo.set(42)
+
+    async with config.batch():
+        task = asyncio.create_task(write_later())
+    exited.set()
+    await task
+    assert await config.foo() == 42
+
+
+async def test_batch_holds_value_locks(config, empty_guild):
+    config.register_guild(foo={})
+    committed = asyncio.Event()
+    written = asyncio.Event()
+
+    async def write_outside():
+        await written.wait()
+        async with config.guild(empty_guild).foo() as foo:
+            assert committed.is_set()
+            assert foo == {"a": 1}
+            foo["b"] = 2
+
+    # started outside of the batch, so it doesn't inherit it
+    task = asyncio.create_task(write_outside())
+    async with config.batch():
+        async with config.guild(empty_guild).foo() as foo:
+            foo["a"] = 1
+        written.set()
+        await asyncio.sleep(0)
+        # re-entering the value within the batch doesn't wait on its own lock
+        async with config.guild(empty_guild).foo() as foo:
+            assert foo == {"a": 1}
+        await asyncio.sleep(0)
+    committed.set()
+    await task
+    assert await config.guild(empty_guild).foo() == {"a": 1, "b": 2}
+
+
+async def test_config_profiler(config, empty_guild):
+    from redbot.core._config_profiler import profiler
+
+    config.register_guild(foo=0, bar=[])
+    profiler.reset()
+    profiler.enable()
+    try:
+        await config.guild(empty_guild).foo.set(1)
+        await config.guild(empty_guild).foo()
+        async with config.guild(empty_guild).bar() as bar:
+            bar.append(1)
+        await config.all_guilds()
+    finally:
+        profiler.disable()
+    await config.guild(empty_guild).foo()
+
+    report = profiler.report()
+    json.dumps(report)
+    (cog,) = report["cogs"]
+    assert cog["name"] == "PyTest"
+    assert cog["total_calls"] == 5
+    assert cog["lock_waits"] == 1
+    assert sum(cog["histogram"].values()) == 5
+    paths = {p["path"]: p for p in report["paths"]}
+    assert paths["PyTest/GUILD/*/foo"]["calls"] == {"set": 1, "get": 1}
+    assert paths["PyTest/GUILD/*/bar"]["calls"] == {"set": 1, "get": 1}
+    assert paths["PyTest/GUILD"]["calls"] == {"all_from_scope": 1}
+    assert "PyTest/GUILD/*/foo" in profiler.format_report()
+    profiler.reset()
+
+
+async def test_config_profiler_bounds_paths(config, monkeypatch):
+    from redbot.core import _config_profiler
+    from redbot.core._config_profiler import profiler
+
+    config.init_custom("CUSTOM", 1)
+    monkeypatch.setattr(_config_profiler, "MAX_PATHS", 3)
+    profiler.reset()
+    profiler.enable()
+    try:
+        for i in range(5):
+            await config.custom("CUSTOM", "1").get_attr(str(1000 + i)).set(i)
+        for name in ("a", "b", "c", "d"):
+            await config.custom("CUSTOM", "1").get_attr(name).set(0)
+    finally:
+        profiler.disable()
+
+    paths = {p["path"]: p["total_calls"] for p in profiler.report(limit=10)["paths"]}
+    assert paths == {
+        "PyTest/CUSTOM/*/*": 5,
+        "PyTest/CUSTOM/*/a": 1,
+        "PyTest/CUSTOM/*/b": 1,
+        "PyTest/<other>": 2,
+    }
+    profiler.reset()
+
+
+async def test_config_index(config, guild_factory):
+    config.register_member(balance=0, name="")
+    config.register_index("balance", scope=config.MEMBER)
+    index = config.index("balance", scope=config.MEMBER)
+    guild = guild_factory.get()
+    other_guild = guild_factory.get()
+
+    await config.member_from_ids(guild.id, 1).balance.set(10)
+    await config.member_from_ids(guild.id, 2).balance.set(30)
+    await config.member_from_ids(other_guild.id, 3).balance.set(50)
+    assert list(await index.ranked(guild.id)) == [(2, 30), (1, 10)]
+    assert await index.rank(guild.id, 1) == 2
+    assert await index.rank(guild.id, 3) is None
+
+    # the index is kept up to date after it's built
+    await config.member_from_ids(guild.id, 1).balance.inc(25)
+    await config.member_from_ids(guild.id, 4).name.set("foo")
+    await config.member_from_ids(guild.id, 5).set({"balance": 20})
+    assert list(await index.ranked(guild.id)) == [(1, 35), (2, 30), (5, 20), (4, 0)]
+    assert list(await index.ranked(guild.id, reverse=False))[0] == (4, 0)
+    await config.member_from_ids(guild.id, 2).clear()
+    await config.member_from_ids(guild.id, 5).balance.clear()
+    assert list(await index.ranked(guild.id)) == [(1, 35), (5, 0), (4, 0)]
+    async with config.batch():
+        await config.member_from_ids(guild.id, 4).balance.set(40)
+    assert await index.rank(guild.id, 4) == 1
+
+    await config.clear_all_members(guild)
+    assert list(await index.ranked(guild.id)) == []
+    assert list(await index.ranked(other_guild.id)) == [(3, 50)]
+
+    with pytest.raises(ValueError):
+        config.index("name", scope=config.MEMBER)
+
+
+async def test_config_index_concurrent_writes(config, guild_factory, monkeypatch):
+    from redbot.core import config as config_module
+
+    config.register_member(balance=0)
+    config.register_index("balance", scope=config.MEMBER)
+    index = config.index("balance", scope=config.MEMBER)
+    guild = guild_factory.get()
+    other_guild = guild_factory.get()
+    await config.member_from_ids(guild.id, 1).balance.set(10)
+
+    driver = config._base_driver
+    get_readonly = driver.get_readonly
+    reads = 0
+    write_to = other_guild
+
+    async def slow_get_readonly(identifier_data):
+        nonlocal reads
+        reads += 1
+        ret = await get_readonly(identifier_data)
+        # Another task writes while the read is suspended.
+        await config.member_from_ids(write_to.id, reads + 1).balance.set(reads)
+        return ret
+
+    monkeypatch.setattr(driver, "get_readonly", slow_get_readonly)
+
+    # writes to other partitions don't force the partition to be read again
+    assert list(await index.ranked(guild.id)) == [(1, 10)]
+    assert reads == 1
+
+    # a partition which keeps being written to is read a bounded number of times,
+    # and read again on the next query
+    write_to = guild
+    index._partitions.clear()
+    assert (1, 10) in list(await index.ranked(guild.id))
+    assert reads == 1 + config_module._INDEX_LOAD_ATTEMPTS
+    assert not index._partitions
+    monkeypatch.setattr(driver, "get_readonly", get_readonly)
+    assert list(await index.ranked(guild.id)) == [(1, 10), (5, 4), (4, 3), (3, 2)]
+    assert index._partitions